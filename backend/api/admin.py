@@ -4,7 +4,8 @@ Admin configuration for the API app.
 from django.contrib import admin
 from .models import (
     Profile, Module, ModuleProgress, Mission,
-    MissionProgress, Achievement, UserAchievement, Streak, LevelTitle
+    MissionProgress, Achievement, UserAchievement, Streak, LevelTitle,
+    ModuleUnlockRule, XPEvent
 )
 
 @admin.register(Profile)
@@ -12,11 +13,16 @@ class ProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'current_level', 'experience_points']
     search_fields = ['user__username']
 
+class ModuleUnlockRuleInline(admin.TabularInline):
+    model = ModuleUnlockRule
+    extra = 0
+
 @admin.register(Module)
 class ModuleAdmin(admin.ModelAdmin):
     list_display = ['id', 'name', 'order', 'xp_required']
     search_fields = ['name']
     ordering = ['order']
+    inlines = [ModuleUnlockRuleInline]
 
 @admin.register(ModuleProgress)
 class ModuleProgressAdmin(admin.ModelAdmin):
@@ -61,3 +67,9 @@ class StreakAdmin(admin.ModelAdmin):
 class LevelTitleAdmin(admin.ModelAdmin):
     list_display = ['level', 'title']
     search_fields = ['title']
+
+@admin.register(XPEvent)
+class XPEventAdmin(admin.ModelAdmin):
+    list_display = ['user', 'amount', 'reason', 'reference', 'created_at']
+    list_filter = ['reason']
+    search_fields = ['user__username', 'reference']
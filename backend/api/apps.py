@@ -6,3 +6,12 @@ class ApiConfig(AppConfig):
 
     def ready(self):
         import api.models  # noqa
+        import api.utils.catalog  # noqa: invalida el catálogo al cambiar módulos y misiones
+        import api.utils.module_unlocks  # noqa: registra los manejadores de eventos
+        import api.utils.pillar_coverage  # noqa: mantiene la cobertura de pilares de las declaraciones
+        import api.utils.declaration_search  # noqa: mantiene la tabla FTS5 de SQLite tras migrar
+        import api.utils.declaration_sync  # noqa: deja lápidas de las declaraciones borradas
+        import api.utils.progress_summary  # noqa: mantiene UserProgressSummary con los eventos de dominio
+        import api.utils.leaderboard  # noqa: mantiene LeaderboardEntry con los eventos de dominio
+        from api.wellness_survey.questions import preload_question_bank
+        preload_question_bank()  # Valida el banco de preguntas al arrancar
@@ -0,0 +1,96 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.models import Declaration
+from api.utils.catalog import get_catalog
+from api.utils.declaration_search import search_declarations
+
+USERNAME_PREFIX = 'bench-search-'
+VOCABULARY = (
+    "quiero lograr mejorar salud familia trabajo dinero tiempo energía disciplina hábito "
+    "meta sueño propósito visión creencia estrategia cuerpo mente descanso ejercicio lectura "
+    "amigos pareja viaje aprender enseñar crecer confianza miedo valor constancia paciencia "
+    "gratitud alegría calma foco orden ahorro inversión proyecto carrera equipo líder servicio "
+    "comunidad naturaleza música arte escribir correr nadar meditar cocinar dormir despertar"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Mide la latencia (p50/p95/p99) de la búsqueda de declaraciones sobre un corpus sintético"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Declaraciones del corpus")
+        parser.add_argument('--users', type=int, default=1000, help="Usuarios entre los que se reparte")
+        parser.add_argument('--queries', type=int, default=500, help="Búsquedas a medir")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--reuse', action='store_true', help="Usar el corpus de una ejecución anterior")
+        parser.add_argument('--cleanup', action='store_true', help="Borrar el corpus al terminar")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        modules = [module.id for module in get_catalog().modules]
+        if not modules:
+            raise CommandError("No hay módulos cargados; ejecuta load_initial_missions primero")
+        pillars = [choice[0] for choice in Declaration.PILLAR_CHOICES]
+
+        users = list(User.objects.filter(username__startswith=USERNAME_PREFIX))
+        if not options['reuse'] or not users:
+            users = self._build_corpus(rng, modules, pillars, options)
+
+        timings = []
+        for _ in range(options['queries']):
+            user = rng.choice(users)
+            query = ' '.join(rng.sample(VOCABULARY, rng.choice((1, 1, 2))))
+            module_id = rng.choice(modules) if rng.random() < 0.3 else None
+            start = time.perf_counter()
+            search_declarations(user, query, module_id)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        cuts = statistics.quantiles(timings, n=100)
+        self.stdout.write(
+            f"{connection.vendor}: {len(timings)} búsquedas, "
+            f"p50={cuts[49]:.2f} ms p95={cuts[94]:.2f} ms p99={cuts[98]:.2f} ms max={max(timings):.2f} ms"
+        )
+        if options['cleanup']:
+            self._cleanup()
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado."))
+
+    def _build_corpus(self, rng, modules, pillars, options):
+        self._cleanup()
+        User.objects.bulk_create(
+            [User(username=f"{USERNAME_PREFIX}{i}") for i in range(options['users'])],
+            batch_size=options['batch_size'],
+        )
+        users = list(User.objects.filter(username__startswith=USERNAME_PREFIX))
+        batch, created = [], 0
+        for i in range(options['rows']):
+            words = rng.choices(VOCABULARY, k=rng.randint(8, 24))
+            batch.append(Declaration(
+                user=users[i % len(users)], module_id=rng.choice(modules), pillar=rng.choice(pillars),
+                # El sufijo evita choques con unique_together (user, module, pillar, text)
+                text=f"{' '.join(words)} #{i}",
+            ))
+            if len(batch) >= options['batch_size']:
+                created += len(Declaration.objects.bulk_create(batch))
+                batch = []
+                self.stdout.write(f"\r{created} declaraciones", ending='')
+        if batch:
+            created += len(Declaration.objects.bulk_create(batch))
+        self.stdout.write(f"\rCorpus: {created} declaraciones de {len(users)} usuarios")
+        return users
+
+    def _cleanup(self):
+        # Sin señales: borrar un millón de filas con Model.delete() dispararía post_delete por fila
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {Declaration._meta.db_table} WHERE user_id IN "
+                f"(SELECT id FROM {User._meta.db_table} WHERE username LIKE %s)",
+                [f"{USERNAME_PREFIX}%"],
+            )
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
@@ -0,0 +1,41 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.utils.leaderboard import RankedIndex
+
+
+class Command(BaseCommand):
+    help = "Mide top-N, posición de un usuario y actualización de puntaje sobre un ranking sintético en memoria"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000, help="Usuarios en el ranking")
+        parser.add_argument('--operations', type=int, default=10_000, help="Operaciones a medir por tipo")
+        parser.add_argument('--top', type=int, default=50, help="Tamaño del top-N")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        users = options['users']
+        start = time.perf_counter()
+        index = RankedIndex((user_id, rng.randint(0, 50_000)) for user_id in range(1, users + 1))
+        self.stdout.write(f"Carga de {len(index)} usuarios: {time.perf_counter() - start:.2f} s")
+
+        operations = {
+            'top': lambda: index.top(options['top'], rng.randrange(0, 1000)),
+            'rank': lambda: index.rank(rng.randint(1, users)),
+            'update': lambda: index.set(rng.randint(1, users), rng.randint(0, 50_000)),
+        }
+        for name, operation in operations.items():
+            timings = []
+            for _ in range(options['operations']):
+                start = time.perf_counter()
+                operation()
+                timings.append((time.perf_counter() - start) * 1_000_000)
+            cuts = statistics.quantiles(timings, n=100)
+            self.stdout.write(
+                f"{name}: p50={cuts[49]:.1f} µs p95={cuts[94]:.1f} µs p99={cuts[98]:.1f} µs max={max(timings):.1f} µs"
+            )
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado."))
@@ -0,0 +1,64 @@
+import statistics
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.wellness_survey.analytics import CohortColumns, cohort_analytics, compute_cohort_stats
+from api.wellness_survey.questions import get_question_bank
+
+
+class Command(BaseCommand):
+    help = "Mide la analítica de cohortes sobre columnas sintéticas (por defecto, 10 millones de respuestas)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000, help="Respuestas sintéticas")
+        parser.add_argument('--users', type=int, default=50_000)
+        parser.add_argument('--days', type=int, default=365, help="Ventana de los envíos")
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--db', action='store_true', help="Medir también la lectura desde la base de datos actual")
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        bank = sorted(get_question_bank().categories)
+        categories = [category for category, _, _ in bank]
+        sizes = [len(questions) for _, _, questions in bank]
+        per_submission = sum(sizes)
+        submissions = max(options['rows'] // per_submission, 1)
+        rows = submissions * per_submission
+        start = timezone.now() - timedelta(days=options['days'])
+
+        # Cada envío responde todas las preguntas; cada usuario tiende a su propio nivel
+        levels = rng.uniform(2, 9, size=(options['users'], len(categories)))
+        user = rng.integers(0, options['users'], size=submissions)
+        question_category = np.repeat(np.arange(len(categories)), sizes).astype(np.int16)
+        submission = np.repeat(np.arange(submissions), per_submission)
+        category = np.tile(question_category, submissions)
+        noise = rng.normal(0, 1.5, size=rows)
+        answer = np.clip(np.rint(levels[user[submission], category] + noise), 0, 10).astype(np.int8)
+        columns = CohortColumns(
+            categories=categories, submission=submission, category=category, answer=answer, user=user,
+            submitted_at=np.sort(rng.uniform(start.timestamp(), start.timestamp() + options['days'] * 86400, submissions)),
+        )
+        self.stdout.write(f"Columnas: {rows} respuestas, {submissions} envíos, {options['users']} usuarios")
+
+        timings = []
+        for _ in range(options['repeat']):
+            began = time.perf_counter()
+            stats = compute_cohort_stats(columns, start)
+            timings.append(time.perf_counter() - began)
+        self.stdout.write(
+            f"Cálculo: mediana={statistics.median(timings):.2f} s min={min(timings):.2f} s "
+            f"({len(stats['over_time']['periods'])} períodos, {stats['deltas']['users']} usuarios con delta)"
+        )
+
+        if options['db']:
+            began = time.perf_counter()
+            stats = cohort_analytics(use_cache=False)
+            self.stdout.write(
+                f"Base de datos: {stats['answers']} respuestas leídas y calculadas en {time.perf_counter() - began:.2f} s"
+            )
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado."))
@@ -0,0 +1,31 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.xp import BULK_CHUNK_SIZE, award_xp_bulk
+
+
+class Command(BaseCommand):
+    help = "Otorga XP en bloque a varios usuarios (o a todos) registrando cada movimiento en XPEvent"
+
+    def add_arguments(self, parser):
+        parser.add_argument('amount', type=int, help="XP a otorgar (negativa para descontar)")
+        parser.add_argument('--usernames', nargs='+', help="Usuarios que reciben la XP")
+        parser.add_argument('--all', action='store_true', help="Otorgar a todos los usuarios")
+        parser.add_argument('--reason', default='grant', help="Motivo registrado en el libro mayor")
+        parser.add_argument('--reference', default='', help="Referencia opcional (campaña, ticket...)")
+
+    def handle(self, *args, **options):
+        if not options['all'] and not options['usernames']:
+            raise CommandError("Indica --usernames o --all")
+        users = User.objects.all() if options['all'] else User.objects.filter(username__in=options['usernames'])
+        user_ids = users.values_list('id', flat=True).iterator(chunk_size=BULK_CHUNK_SIZE)
+
+        total, batch = 0, {}
+        for user_id in user_ids:
+            batch[user_id] = options['amount']
+            if len(batch) >= BULK_CHUNK_SIZE:
+                total += award_xp_bulk(batch, options['reason'], options['reference'])
+                batch = {}
+        if batch:
+            total += award_xp_bulk(batch, options['reason'], options['reference'])
+        self.stdout.write(self.style.SUCCESS(f"XP otorgada a {total} perfiles."))
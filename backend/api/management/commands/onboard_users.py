@@ -0,0 +1,29 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.utils.onboarding import ONBOARDING_BATCH_SIZE, onboard_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Da de alta en bloque los usuarios de un CSV (columnas: username y, opcionalmente, "
+        "email, password, first_name, last_name) con su perfil y primer módulo desbloqueado"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help="Ruta del CSV con cabecera")
+        parser.add_argument('--batch-size', type=int, default=ONBOARDING_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as f:
+                rows = [row for row in csv.DictReader(f) if row.get('username')]
+        except OSError as exc:
+            raise CommandError(f"No se pudo leer el CSV: {exc}")
+        result = onboard_users(rows, batch_size=options['batch_size'])
+        if result['skipped']:
+            self.stdout.write(self.style.WARNING(
+                f"{len(result['skipped'])} usuarios omitidos (ya existían o estaban repetidos): {result['skipped'][:20]}"
+            ))
+        self.stdout.write(self.style.SUCCESS(f"Usuarios creados: {len(result['created'])}"))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.utils.events import process_pending
+
+
+class Command(BaseCommand):
+    help = "Procesa los eventos de dominio encolados en la tabla DomainEvent (modo 'queue')"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help="Sigue esperando eventos nuevos")
+        parser.add_argument('--interval', type=float, default=1.0, help="Segundos entre sondeos con --loop")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processed = process_pending(options['batch_size'])
+            total += processed
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Eventos procesados: {total}"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.utils.leaderboard import rebuild_boards
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la foto de los rankings (LeaderboardEntry) desde Profile y Streak"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_boards()
+        self.stdout.write(self.style.SUCCESS(f"{total} entradas de ranking reconstruidas."))
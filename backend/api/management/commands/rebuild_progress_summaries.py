@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from api.utils.progress_summary import REBUILD_CHUNK_SIZE, rebuild_summaries, verify_summaries
+
+
+class Command(BaseCommand):
+    help = "Reconstruye (o verifica con --verify) la tabla UserProgressSummary desde las tablas de progreso"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usernames', nargs='+', help="Solo estos usuarios (por defecto, todos)")
+        parser.add_argument('--verify', action='store_true', help="Solo informa de resúmenes desactualizados")
+        parser.add_argument('--fix', action='store_true', help="Con --verify, reconstruye los desactualizados")
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        user_ids = list(users.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=REBUILD_CHUNK_SIZE))
+
+        if not options['verify']:
+            total = rebuild_summaries(user_ids)
+            self.stdout.write(self.style.SUCCESS(f"Resúmenes reconstruidos: {total}"))
+            return
+
+        stale = verify_summaries(user_ids)
+        if not stale:
+            self.stdout.write(self.style.SUCCESS(f"Los {len(user_ids)} resúmenes están al día."))
+            return
+        self.stdout.write(self.style.WARNING(
+            f"{len(stale)} de {len(user_ids)} resúmenes desactualizados: {stale[:20]}"
+        ))
+        if options['fix']:
+            rebuild_summaries(stale)
+            self.stdout.write(self.style.SUCCESS(f"Resúmenes corregidos: {len(stale)}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.utils.pillar_coverage import unlock_covered_modules
+
+
+class Command(BaseCommand):
+    help = "Desbloquea el siguiente módulo a quienes ya cubrieron los cuatro pilares del anterior"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = unlock_covered_modules(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"{total} módulos desbloqueados."))
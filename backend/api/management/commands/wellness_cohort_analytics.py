@@ -0,0 +1,32 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from api.wellness_survey.analytics import DEFAULT_PERIOD_DAYS, DEFAULT_WINDOW_DAYS, cohort_analytics, window_end
+
+
+class Command(BaseCommand):
+    help = "Calcula la analítica de bienestar de una cohorte (distribuciones, percentiles, deltas y correlaciones)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usernames', nargs='+', help="Usuarios de la cohorte (por defecto, todos)")
+        parser.add_argument('--days', type=int, default=DEFAULT_WINDOW_DAYS, help="Ventana hacia atrás desde hoy")
+        parser.add_argument('--period-days', type=int, default=DEFAULT_PERIOD_DAYS, help="Tamaño de cada período")
+        parser.add_argument('--no-cache', action='store_true', help="Recalcular aunque haya un resultado en caché")
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['usernames']:
+            user_ids = list(User.objects.filter(username__in=options['usernames']).values_list('pk', flat=True))
+        # Fin redondeado a la hora, como en cohort_analytics, para reutilizar la caché entre ejecuciones
+        end = window_end()
+        stats = cohort_analytics(
+            user_ids, end - timedelta(days=options['days']), end,
+            period_days=options['period_days'], use_cache=not options['no_cache'],
+        )
+        self.stdout.write(json.dumps(stats, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Cohorte: {stats['users']} usuarios, {stats['submissions']} envíos, {stats['answers']} respuestas."
+        ))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_alter_comfortwall_hp_actual_alter_comfortwall_hp_max'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='unlock_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.CreateModel(
+            name='ModuleUnlockRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_xp', models.IntegerField(blank=True, null=True)),
+                ('required_mission_id', models.UUIDField(blank=True, null=True)),
+                ('message', models.CharField(blank=True, max_length=200)),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unlock_rules', to='api.module')),
+            ],
+            options={
+                'ordering': ['module', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_xpevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='api_declara_user_id_4f1487_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+PILLARS = ['Vision', 'Proposito', 'Creencias', 'Estrategias']
+
+
+def backfill_coverage(apps, schema_editor):
+    Declaration = apps.get_model('api', 'Declaration')
+    PillarCoverage = apps.get_model('api', 'PillarCoverage')
+    masks = {}
+    for user_id, module_id, pillar in Declaration.objects.values_list('user_id', 'module_id', 'pillar').distinct():
+        if pillar in PILLARS:
+            key = (user_id, module_id)
+            masks[key] = masks.get(key, 0) | (1 << PILLARS.index(pillar))
+    PillarCoverage.objects.bulk_create(
+        [PillarCoverage(user_id=user_id, module_id=module_id, mask=mask) for (user_id, module_id), mask in masks.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_declaration_sync_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PillarCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mask', models.PositiveSmallIntegerField(default=0)),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.module')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'module')},
+            },
+        ),
+        migrations.RunPython(backfill_coverage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_pillarcoverage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='declaration',
+            options={'ordering': ['-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='declaration_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(fields=['user', 'module', '-created_at', '-id'], name='declaration_module_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(fields=['user', 'pillar', '-created_at', '-id'], name='declaration_pillar_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(fields=['user', 'module', 'pillar', '-created_at', '-id'], name='declaration_mod_pil_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_declaration_search'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserProgressSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_xp', models.IntegerField(default=0)),
+                ('level', models.IntegerField(default=1)),
+                ('modules_unlocked', models.PositiveIntegerField(default=0)),
+                ('missions_completed', models.PositiveIntegerField(default=0)),
+                ('achievements_earned', models.PositiveIntegerField(default=0)),
+                ('current_streaks', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_active_date(apps, schema_editor):
+    from django.db.models.functions import TruncDate
+    Streak = apps.get_model('api', 'Streak')
+    Streak.objects.filter(last_activity__isnull=False).update(last_active_date=TruncDate('last_activity'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_userprogresssummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='timezone',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='streak',
+            name='last_active_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='streak',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='streak',
+            name='module',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.module'),
+        ),
+        migrations.AddConstraint(
+            model_name='streak',
+            constraint=models.UniqueConstraint(condition=models.Q(('module__isnull', True)), fields=('user',), name='unique_global_streak'),
+        ),
+        migrations.RunPython(backfill_active_date, migrations.RunPython.noop),
+    ]
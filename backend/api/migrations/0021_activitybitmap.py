@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_activity(apps, schema_editor):
+    """Marca los días (UTC) con declaraciones o misiones completadas."""
+    from django.db.models.functions import TruncDate
+    Declaration = apps.get_model('api', 'Declaration')
+    MissionProgress = apps.get_model('api', 'MissionProgress')
+    ActivityBitmap = apps.get_model('api', 'ActivityBitmap')
+    days = {}
+    rows = list(Declaration.objects.annotate(day=TruncDate('created_at')).values_list('user_id', 'day').distinct())
+    rows += MissionProgress.objects.filter(completed_at__isnull=False).annotate(
+        day=TruncDate('completed_at')
+    ).values_list('user_id', 'day').distinct()
+    for user_id, day in rows:
+        days.setdefault(user_id, set()).add(day)
+    bitmaps = []
+    for user_id, active in days.items():
+        origin = min(active)
+        value = sum(1 << (day - origin).days for day in active)
+        bits = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+        bitmaps.append(ActivityBitmap(user_id=user_id, origin=origin, bits=bits))
+    ActivityBitmap.objects.bulk_create(bitmaps, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_streak_engine'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityBitmap',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='activity_bitmap', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('origin', models.DateField()),
+                ('bits', models.BinaryField(default=b'')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='habit',
+            name='ultimo_check_in',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_leaderboards(apps, schema_editor):
+    """Foto inicial de los rankings: XP de Profile y racha más larga de Streak."""
+    Profile = apps.get_model('api', 'Profile')
+    Streak = apps.get_model('api', 'Streak')
+    LeaderboardEntry = apps.get_model('api', 'LeaderboardEntry')
+    entries = [
+        LeaderboardEntry(board='xp', user_id=user_id, score=points)
+        for user_id, points in Profile.objects.filter(experience_points__gt=0).values_list('user_id', 'experience_points')
+    ]
+    entries += [
+        LeaderboardEntry(board=f"streak:{module_id}" if module_id else 'streak', user_id=user_id, score=longest)
+        for user_id, module_id, longest in Streak.objects.filter(longest_streak__gt=0).values_list(
+            'user_id', 'module_id', 'longest_streak'
+        )
+    ]
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_activitybitmap'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=64)),
+                ('score', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-experience_points'], name='profile_xp_rank_idx'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['board', '-score', 'user'], name='leaderboard_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['board', 'updated_at'], name='leaderboard_changes_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='leaderboardentry',
+            unique_together={('board', 'user')},
+        ),
+        migrations.RunPython(backfill_leaderboards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_results(apps, schema_editor):
+    """Un resultado por usuario con las respuestas que tiene guardadas hoy."""
+    from django.db.models import Avg, Count
+    WellnessSurveyAnswer = apps.get_model('api', 'WellnessSurveyAnswer')
+    WellnessSurveyResult = apps.get_model('api', 'WellnessSurveyResult')
+    vectors = {}
+    rows = WellnessSurveyAnswer.objects.values('user_id', 'category').annotate(
+        average=Avg('answer'), total=Count('id')
+    ).order_by('user_id', 'category')
+    for row in rows:
+        vector = vectors.setdefault(row['user_id'], ([], [], [0]))
+        vector[0].append(row['category'])
+        vector[1].append(round(row['average'], 2))
+        vector[2][0] += row['total']
+    WellnessSurveyResult.objects.bulk_create([
+        WellnessSurveyResult(user_id=user_id, categories=categories, values=values, answer_count=count[0])
+        for user_id, (categories, values, count) in vectors.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_leaderboard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WellnessSurveyResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('categories', models.JSONField(default=list)),
+                ('values', models.JSONField(default=list)),
+                ('answer_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='wellness_result_user_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_results, migrations.RunPython.noop),
+    ]
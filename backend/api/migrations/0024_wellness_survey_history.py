@@ -0,0 +1,77 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_history(apps, schema_editor):
+    """
+    Numera los resultados existentes por usuario y asocia el último de cada uno
+    (el único con respuestas guardadas) a una sesión junto con sus respuestas.
+    """
+    WellnessSurveyAnswer = apps.get_model('api', 'WellnessSurveyAnswer')
+    WellnessSurveyResult = apps.get_model('api', 'WellnessSurveyResult')
+    WellnessSurveySession = apps.get_model('api', 'WellnessSurveySession')
+    latest = {}
+    results = list(WellnessSurveyResult.objects.order_by('user_id', 'created_at', 'id'))
+    for result in results:
+        result.version = latest[result.user_id].version + 1 if result.user_id in latest else 1
+        latest[result.user_id] = result
+    WellnessSurveyResult.objects.bulk_update(results, ['version'], batch_size=1000)
+
+    for user_id, result in latest.items():
+        session = WellnessSurveySession.objects.filter(user_id=user_id).order_by('-started_at', '-id').first()
+        if session is None:
+            session = WellnessSurveySession.objects.create(
+                user_id=user_id, is_completed=True, finished_at=result.created_at
+            )
+        scores = {}
+        for category, answer in WellnessSurveyAnswer.objects.filter(user_id=user_id).order_by('id').values_list(
+            'category', 'answer'
+        ):
+            scores.setdefault(category, []).append(answer)
+        WellnessSurveyAnswer.objects.filter(user_id=user_id).update(session=session)
+        result.session = session
+        result.scores = [scores.get(category, []) for category in result.categories]
+        result.save(update_fields=['session', 'scores'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_wellness_survey_result'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='wellnesssurveyresult',
+            name='wellness_result_user_idx',
+        ),
+        migrations.AddField(
+            model_name='wellnesssurveyanswer',
+            name='session',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='api.wellnesssurveysession'),
+        ),
+        migrations.AddField(
+            model_name='wellnesssurveyresult',
+            name='scores',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='wellnesssurveyresult',
+            name='session',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='result', to='api.wellnesssurveysession'),
+        ),
+        migrations.AddField(
+            model_name='wellnesssurveyresult',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(backfill_history, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='wellnesssurveyresult',
+            constraint=models.UniqueConstraint(fields=('user', 'version'), name='wellness_result_version_uniq'),
+        ),
+    ]
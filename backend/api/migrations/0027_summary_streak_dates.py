@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def store_streak_dates(apps, schema_editor):
+    """Las rachas del resumen pasan a guardar su último día activo ({"streak", "last_active_date"})."""
+    Streak = apps.get_model('api', 'Streak')
+    UserProgressSummary = apps.get_model('api', 'UserProgressSummary')
+    summaries = list(UserProgressSummary.objects.all())
+    streaks = {}
+    for user_id, module_id, current, last_active in Streak.objects.values_list(
+        'user_id', 'module_id', 'current_streak', 'last_active_date'
+    ):
+        streaks.setdefault(user_id, {})[module_id or 'global'] = {
+            "streak": current,
+            "last_active_date": last_active.isoformat() if last_active else None,
+        }
+    for summary in summaries:
+        summary.current_streaks = streaks.get(summary.user_id, {})
+    UserProgressSummary.objects.bulk_update(summaries, ['current_streaks'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_declarationtombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(store_streak_dates, migrations.RunPython.noop),
+    ]
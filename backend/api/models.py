@@ -6,12 +6,36 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django_fsm import FSMField, transition
+from django.utils import timezone
+from django_fsm import FSMField, TransitionNotAllowed, can_proceed, transition
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 import uuid
 
-import json
-import os
+class ConditionalTransitionMixin:
+    """
+    Guarda una transición FSM con un único UPDATE condicional sobre el estado de
+    origen (WHERE state=<origen>) en lugar de save() completos. La transición
+    se valida antes del UPDATE, pero el método (y sus señales de django-fsm)
+    solo se ejecuta si el UPDATE ganó: quien pierde la carrera no tiene efectos.
+    Los efectos secundarios (eventos) los aplica quien llama, si devuelve True.
+    """
+    def save_transition(self, name, **fields) -> bool:
+        """Aplica la transición `name`; devuelve False si otra escritura ya la había aplicado."""
+        method = getattr(self, name)
+        source = self.state
+        if not can_proceed(method):
+            raise TransitionNotAllowed(
+                f"No se puede aplicar '{name}' desde el estado '{source}'", object=self, method=method
+            )
+        target = method._django_fsm.get_transition(source).target
+        if type(self)._default_manager.filter(pk=self.pk, state=source).update(state=target, **fields):
+            method()
+            for field, value in fields.items():
+                setattr(self, field, value)
+            return True
+        self.refresh_from_db(fields=['state', *fields])
+        return False
 
 class LevelTitle(models.Model):
     level = models.PositiveIntegerField(unique=True)
@@ -26,44 +50,49 @@ class Profile(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     experience_points = models.IntegerField(default=0)
     current_level = models.IntegerField(default=1)
+    unlock_fingerprint = models.CharField(max_length=40, blank=True, default='')  # Última sincronización de desbloqueos
+    timezone = models.CharField(max_length=64, blank=True, default='')  # Zona IANA para las rachas; vacío = TIME_ZONE
 
-    # Cargar títulos de nivel una sola vez
-    _level_titles = None
+    class Meta:
+        indexes = [models.Index(fields=['-experience_points'], name='profile_xp_rank_idx')]
 
     @classmethod
     def get_titles_dict(cls):
-        if cls._level_titles is None:
-            fixture_path = os.path.join(os.path.dirname(__file__), "fixtures", "level_titles.json")
-            with open(fixture_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                cls._level_titles = {item["level"]: item["title"] for item in data}
-        return cls._level_titles
+        # Títulos de la tabla LevelTitle, servidos desde el catálogo en memoria
+        from api.utils.catalog import get_catalog
+        return get_catalog().level_titles
 
     def get_level_title(self):
-        titles = self.get_titles_dict()
-        return titles.get(self.current_level, "Aventurero")
+        from api.utils.catalog import get_catalog
+        return get_catalog().level_title(self.current_level)
 
     def __str__(self):
         return f"{self.user.username}'s profile"
     def calculate_level(self):
-        self.current_level = (self.experience_points // 100) + 1
-        self.save()
+        # Solo calcula; la XP se persiste con api.utils.xp.award_xp (un único UPDATE)
+        self.current_level = max(self.experience_points // 100 + 1, 1)
+        return self.current_level
+
+class XPEvent(models.Model):
+    """Libro mayor de XP: una fila inmutable por cada cambio de experiencia."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='xp_events')
+    amount = models.IntegerField()
+    reason = models.CharField(max_length=50)
+    reference = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        indexes = [models.Index(fields=['user', 'created_at'])]
+    def __str__(self):
+        return f"{self.user_id}: {self.amount:+d} XP ({self.reason})"
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.create(user=instance)
-        # Desbloquear automáticamente el primer módulo (orden 1)
-        from .models import Module, ModuleProgress
-        first_module = Module.objects.order_by('order').first()
-        if first_module:
-            progress, _ = ModuleProgress.objects.get_or_create(user=instance, module=first_module)
-            if progress.state == 'locked':
-                progress.unlock()
-                progress.auto_unlocked = True
-                progress.save()
-
-class Module(models.Model):
+        # Perfil y primer módulo desbloqueado; las altas masivas usan api.utils.onboarding.onboard_users
+        from api.utils.onboarding import provision_user
+        provision_user(instance)
+
+class Module(ConditionalTransitionMixin, models.Model):
     STATES = (
         ('locked', 'Locked'),
         ('unlocked', 'Unlocked'),
@@ -80,15 +109,27 @@ class Module(models.Model):
         ordering = ['order']
     def __str__(self):
         return self.name
+    def save_transition(self, name, **fields) -> bool:
+        # update() no emite post_save: el catálogo en memoria se invalida aquí
+        saved = super().save_transition(name, **fields)
+        if saved:
+            from api.utils.catalog import invalidate
+            invalidate()
+        return saved
+    # Las transiciones solo cambian el estado en memoria; se persisten con save_transition
     @transition(field=state, source='locked', target='unlocked')
     def unlock(self):
-        self.state = 'unlocked'
-        self.save(update_fields=['state'])
+        pass
     @transition(field=state, source='unlocked', target='completed')
     def complete(self):
         pass
 
-class ModuleProgress(models.Model):
+class ModuleProgressQuerySet(models.QuerySet):
+    def apply_transition(self, source, target) -> int:
+        """Transición en bloque: un único UPDATE de las filas que siguen en `source`."""
+        return self.filter(state=source).update(state=target, last_activity=timezone.now())
+
+class ModuleProgress(ConditionalTransitionMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     module = models.ForeignKey(Module, on_delete=models.CASCADE)
     state = FSMField(default='locked', choices=Module.STATES)
@@ -96,17 +137,35 @@ class ModuleProgress(models.Model):
     last_activity = models.DateTimeField(auto_now=True)
     auto_unlocked = models.BooleanField(default=False)  # Nuevo campo
 
+    objects = ModuleProgressQuerySet.as_manager()
+
     class Meta:
         unique_together = ['user', 'module']
     def __str__(self):
         return f"{self.user.username}'s progress in {self.module.name}"
     @transition(field=state, source='locked', target='unlocked')
     def unlock(self):
-        self.state = 'unlocked'
-        self.save(update_fields=['state'])
+        pass
     @transition(field=state, source='unlocked', target='completed')
     def complete(self):
         pass
+    def save_transition(self, name, **fields) -> bool:
+        # auto_now no se aplica en update(): last_activity se fija aquí, una sola vez
+        return super().save_transition(name, last_activity=timezone.now(), **fields)
+
+class ModuleUnlockRule(models.Model):
+    """
+    Requisito de desbloqueo de un módulo. Un módulo sin reglas solo exige su
+    `xp_required`; con reglas, deben cumplirse todas (en orden de id).
+    """
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, related_name='unlock_rules')
+    min_xp = models.IntegerField(null=True, blank=True)  # None = usar module.xp_required
+    required_mission_id = models.UUIDField(null=True, blank=True)
+    message = models.CharField(max_length=200, blank=True)
+    class Meta:
+        ordering = ['module', 'id']
+    def __str__(self):
+        return f"Regla de desbloqueo de {self.module_id}"
 
 from django.db.models import JSONField
 
@@ -146,12 +205,23 @@ class MissionProgress(models.Model):
         return f"{self.user.username}'s progress on {self.mission.title}"
     @transition(field=state, source='active', target='completed')
     def complete(self):
-        from django.utils import timezone
+        # Sin efectos secundarios: MISSION_COMPLETED lo emite api.utils.mission_completion
         self.completed_at = timezone.now()
     @transition(field=state, source='active', target='failed')
     def fail(self):
         pass
 
+class MissionCompletionReceipt(models.Model):
+    """Respuesta de una completación de misión, guardada por clave de idempotencia para los reintentos."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mission_receipts')
+    key = models.CharField(max_length=255)
+    response = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'key'], name='mission_receipt_user_key_uniq')]
+    def __str__(self):
+        return f"{self.user_id}: {self.key}"
+
 class Achievement(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
@@ -171,38 +241,26 @@ class UserAchievement(models.Model):
         return f"{self.user.username} unlocked {self.achievement.name}"
 
 class Streak(models.Model):
+    """Racha por módulo o global (module vacío). La mantiene api.utils.streaks."""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    module = models.ForeignKey(Module, on_delete=models.CASCADE)
+    module = models.ForeignKey(Module, on_delete=models.CASCADE, null=True, blank=True)
     current_streak = models.IntegerField(default=0)
     longest_streak = models.IntegerField(default=0)
-    last_activity = models.DateTimeField(auto_now=True)
+    last_activity = models.DateTimeField(null=True, blank=True)
+    last_active_date = models.DateField(null=True, blank=True)  # Día local (zona del perfil) de la última actividad
     class Meta:
         unique_together = ['user', 'module']
+        constraints = [
+            models.UniqueConstraint(fields=['user'], condition=models.Q(module__isnull=True), name='unique_global_streak'),
+        ]
     def __str__(self):
-        return f"{self.user.username}'s streak in {self.module.name}"
+        return f"{self.user.username}'s streak in {self.module.name if self.module_id else 'global'}"
     def update_streak(self):
-        from django.utils import timezone
-        now = timezone.now()
-        if (now - self.last_activity).days <= 1:
-            self.current_streak += 1
-            if self.current_streak > self.longest_streak:
-                self.longest_streak = self.current_streak
-        else:
-            self.current_streak = 1
-        self.last_activity = now
-        self.save()
-
-        # --- Lógica para misión global de racha de 1 día ---
-        if self.current_streak >= 1:
-            try:
-                from .models import Mission, MissionProgress
-                mission = Mission.objects.get(id="46e39fc7-8a77-4e39-9559-283a73655d12")
-                mp, created = MissionProgress.objects.get_or_create(user=self.user, mission=mission)
-                if mp.state != "completed":
-                    mp.complete()
-                    mp.save()
-            except Mission.DoesNotExist:
-                pass
+        # Compatibilidad: el cálculo vive en el motor de rachas
+        from api.utils.streaks import record_activity
+        record_activity(self.user, self.module_id)
+        if self.pk:
+            self.refresh_from_db(fields=['current_streak', 'longest_streak', 'last_activity', 'last_active_date'])
 
 class Declaration(models.Model):
     PILLAR_CHOICES = [
@@ -219,11 +277,29 @@ class Declaration(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     synced = models.BooleanField(default=True)
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
         unique_together = ['user', 'module', 'pillar', 'text']
+        indexes = [
+            models.Index(fields=['user', 'updated_at', 'id']),
+            # Listado paginado por (-created_at, -id) con y sin filtros de módulo/pilar
+            models.Index(fields=['user', '-created_at', '-id'], name='declaration_user_recent_idx'),
+            models.Index(fields=['user', 'module', '-created_at', '-id'], name='declaration_module_recent_idx'),
+            models.Index(fields=['user', 'pillar', '-created_at', '-id'], name='declaration_pillar_recent_idx'),
+            models.Index(fields=['user', 'module', 'pillar', '-created_at', '-id'], name='declaration_mod_pil_recent_idx'),
+        ]
     def __str__(self):
         return f"{self.user.username} - {self.module.name} - {self.pillar}: {self.text[:30]}"
 
+class DeclarationTombstone(models.Model):
+    """Declaración borrada: la sincronización delta avisa del borrado a los clientes offline."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='declaration_tombstones')
+    declaration_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        indexes = [models.Index(fields=['user', 'deleted_at', 'declaration_id'])]
+    def __str__(self):
+        return f"{self.user_id}: declaración {self.declaration_id} borrada"
+
 class UnlockedPillar(models.Model):
     """Pilares desbloqueados por usuario en un módulo/área."""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -235,6 +311,16 @@ class UnlockedPillar(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.module.name} - {self.pillar}"
 
+class PillarCoverage(models.Model):
+    """Pilares con al menos una declaración, como máscara de bits por usuario y módulo."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    module = models.ForeignKey(Module, on_delete=models.CASCADE)
+    mask = models.PositiveSmallIntegerField(default=0)
+    class Meta:
+        unique_together = ['user', 'module']
+    def __str__(self):
+        return f"{self.user_id} - {self.module_id}: {self.mask:04b}"
+
 class Habit(models.Model):
     DIFFICULTY_CHOICES = [
         ('fácil', 'Fácil'),
@@ -252,6 +338,7 @@ class Habit(models.Model):
     horario_sugerido = models.TimeField(null=True, blank=True)
     fecha_creacion = models.DateField(auto_now_add=True)
     dias_activos = models.PositiveIntegerField(default=0)
+    ultimo_check_in = models.DateField(null=True, blank=True)  # Día local del último check-in
     estrellas = models.DecimalField(max_digits=2, decimal_places=1, default=0)
     nivel = models.PositiveIntegerField(default=1)
     estado = models.CharField(max_length=16, choices=STATE_CHOICES, default='incubando')
@@ -268,53 +355,59 @@ class ComfortWall(models.Model):
     def __str__(self):
         return f"Muro de {self.user.username} (Nivel {self.nivel_muro})"
 
-# --- DESBLOQUEO SECUENCIAL DE CONSTELACIONES ---
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+class UserProgressSummary(models.Model):
+    """Resumen materializado de progreso (lo mantiene api.utils.progress_summary)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='progress_summary')
+    total_xp = models.IntegerField(default=0)
+    level = models.IntegerField(default=1)
+    modules_unlocked = models.PositiveIntegerField(default=0)
+    missions_completed = models.PositiveIntegerField(default=0)
+    achievements_earned = models.PositiveIntegerField(default=0)
+    current_streaks = JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    def __str__(self):
+        return f"Resumen de {self.user_id} ({self.total_xp} XP)"
 
-import logging
+class ActivityBitmap(models.Model):
+    """Un bit por día con actividad desde `origin` (bit 0 del byte 0 = origin). La mantiene api.utils.activity."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='activity_bitmap')
+    origin = models.DateField()
+    bits = models.BinaryField(default=b'')
+    def __str__(self):
+        return f"Actividad de {self.user_id} desde {self.origin}"
 
-@receiver(post_save, sender=Declaration)
-def check_and_unlock_next_module(sender, instance, created, **kwargs):
-    """
-    Cuando el usuario tiene al menos una declaración en cada pilar de un módulo,
-    desbloquea el siguiente módulo (constelación) en orden.
-    """
-    logger = logging.getLogger("api.models")
-    if not created:
-        return
-
-    user = instance.user
-    module = instance.module
-
-    # Obtener todos los pilares requeridos para el módulo actual
-    required_pillars = [choice[0] for choice in Declaration.PILLAR_CHOICES]
-
-    # Verificar si el usuario tiene al menos una declaración en cada pilar de este módulo
-    user_pillars = Declaration.objects.filter(
-        user=user,
-        module=module
-    ).values_list('pillar', flat=True).distinct()
-
-    logger.info(f"[DEBUG] Declaraciones para usuario {user.username} en módulo {module.id}: {list(user_pillars)}")
-    logger.info(f"[DEBUG] Pilares requeridos: {required_pillars}")
-
-    if set(required_pillars).issubset(set(user_pillars)):
-        logger.info(f"[DEBUG] Usuario {user.username} completó todos los pilares de {module.id}. Intentando desbloquear siguiente módulo...")
-        # Buscar el siguiente módulo por orden
-        next_module = Module.objects.filter(order__gt=module.order).order_by('order').first()
-        if next_module:
-            logger.info(f"[DEBUG] Siguiente módulo a desbloquear: {next_module.id}")
-            # Desbloquear el siguiente módulo para el usuario
-            progress, created = ModuleProgress.objects.get_or_create(user=user, module=next_module)
-            logger.info(f"[DEBUG] Estado actual de ModuleProgress: {progress.state}")
-            if progress.state == 'locked':
-                progress.unlock()
-                progress.save()
-                logger.info(f"[DEBUG] Módulo {next_module.id} desbloqueado para {user.username}")
-            else:
-                logger.info(f"[DEBUG] Módulo {next_module.id} ya estaba desbloqueado para {user.username}")
-        else:
-            logger.info(f"[DEBUG] No hay siguiente módulo para desbloquear.")
-    else:
-        logger.info(f"[DEBUG] Usuario {user.username} aún no tiene declaraciones en todos los pilares de {module.id}")
+class LeaderboardEntry(models.Model):
+    """Foto en base de datos de los rankings (la mantiene api.utils.leaderboard)."""
+    board = models.CharField(max_length=64)  # 'xp', 'streak' o 'streak:<módulo>'
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    score = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    class Meta:
+        unique_together = ['board', 'user']
+        indexes = [
+            models.Index(fields=['board', '-score', 'user'], name='leaderboard_rank_idx'),
+            models.Index(fields=['board', 'updated_at'], name='leaderboard_changes_idx'),
+        ]
+    def __str__(self):
+        return f"{self.board}: {self.user_id} = {self.score}"
+
+class SharedVersion(models.Model):
+    """Versiones de las fotos en memoria de cada worker (la mantiene api.utils.versions)."""
+    key = models.CharField(max_length=64, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+class DomainEvent(models.Model):
+    """Cola local de eventos de dominio (modo 'queue' de api.utils.events)."""
+    name = models.CharField(max_length=64)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    payload = JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    class Meta:
+        indexes = [models.Index(fields=['processed_at', 'id'])]
+    def __str__(self):
+        return f"{self.name} ({self.user_id})"
@@ -15,6 +15,7 @@ from .module_serializers import (
 from .mission_serializers import (
     MissionSerializer,
     MissionProgressSerializer,
+    MissionBatchCompleteSerializer,
 )
 from .achievement_serializers import (
     AchievementSerializer,
@@ -25,6 +26,8 @@ from .habit_serializers import HabitSerializer
 from .comfortwall_serializers import ComfortWallSerializer
 from .misc_serializers import (
     DeclarationSerializer,
+    DeclarationSyncSerializer,
+    DeclarationSearchSerializer,
     UnlockedPillarSerializer,
     ProgressOverviewSerializer,
 )
@@ -40,12 +43,15 @@ __all__ = [
     "ModuleProgressSerializer",
     "MissionSerializer",
     "MissionProgressSerializer",
+    "MissionBatchCompleteSerializer",
     "AchievementSerializer",
     "UserAchievementSerializer",
     "StreakSerializer",
     "HabitSerializer",
     "ComfortWallSerializer",
     "DeclarationSerializer",
+    "DeclarationSyncSerializer",
+    "DeclarationSearchSerializer",
     "UnlockedPillarSerializer",
     "ProgressOverviewSerializer",
 ]
@@ -1,17 +1,52 @@
 """
-Serializers misceláneos: Declaration, UnlockedPillar, ProgressOverview.
+Serializers misceláneos: Declaration, DeclarationSync, DeclarationSearch, UnlockedPillar, ProgressOverview.
 """
 
 from rest_framework import serializers
 from ..models import Declaration, UnlockedPillar
+from ..utils.catalog import get_catalog
+from ..utils.declaration_search import MAX_RESULTS
+from ..utils.declaration_sync import PULL_PAGE_SIZE
 
 class DeclarationSerializer(serializers.ModelSerializer):
-    """Serializer for user declarations."""
+    """Serializer for user declarations. `fields` restricts the output (sparse fieldset)."""
     class Meta:
         model = Declaration
         fields = ('id', 'user', 'module', 'pillar', 'text', 'created_at', 'updated_at', 'synced')
         read_only_fields = ('id', 'created_at', 'updated_at', 'user')
 
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class DeclarationSyncItemSerializer(serializers.Serializer):
+    """Declaración creada sin conexión en el cliente."""
+    client_id = serializers.CharField(max_length=64, required=False, allow_blank=True)
+    module = serializers.CharField(max_length=50)
+    pillar = serializers.ChoiceField(choices=Declaration.PILLAR_CHOICES)
+    text = serializers.CharField()
+    created_at = serializers.DateTimeField(required=False)
+
+    def validate_module(self, value):
+        if value not in get_catalog().modules_by_id:
+            raise serializers.ValidationError("Módulo no encontrado.")
+        return value
+
+class DeclarationSyncSerializer(serializers.Serializer):
+    """Entrada de POST /declarations/sync/."""
+    cursor = serializers.CharField(required=False, allow_blank=True)
+    declarations = DeclarationSyncItemSerializer(many=True, required=False, max_length=PULL_PAGE_SIZE)
+
+class DeclarationSearchSerializer(serializers.Serializer):
+    """Parámetros de GET /declarations/search/."""
+    q = serializers.CharField(max_length=200)
+    module = serializers.CharField(max_length=50, required=False)
+    pillar = serializers.ChoiceField(choices=Declaration.PILLAR_CHOICES, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_RESULTS, default=50)
+
 class UnlockedPillarSerializer(serializers.ModelSerializer):
     """Serializer for unlocked pillars."""
     class Meta:
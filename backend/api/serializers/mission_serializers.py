@@ -5,6 +5,7 @@ Serializers relacionados con el modelo Mission y MissionProgress.
 from rest_framework import serializers
 from ..models import Mission, MissionProgress
 from .module_serializers import ModuleSerializer
+from ..utils.mission_completion import MAX_BATCH_SIZE
 
 class MissionSerializer(serializers.ModelSerializer):
     """Serializer for missions."""
@@ -23,3 +24,9 @@ class MissionProgressSerializer(serializers.ModelSerializer):
         model = MissionProgress
         fields = ('mission', 'state', 'started_at', 'completed_at')
         read_only_fields = ('started_at', 'completed_at')
+
+class MissionBatchCompleteSerializer(serializers.Serializer):
+    """Entrada de POST /missions/complete-batch/."""
+    mission_ids = serializers.ListField(
+        child=serializers.CharField(max_length=64), allow_empty=False, max_length=MAX_BATCH_SIZE
+    )
@@ -2,11 +2,14 @@
 Serializers relacionados con el modelo Profile.
 """
 
+from zoneinfo import available_timezones
+
 from rest_framework import serializers
 from .user_serializers import UserSerializer, UserWriteSerializer
 from ..models import Profile
 from ..utils.serializers_helpers import (
-    get_title, get_first_name, get_last_name, update_user_fields, get_active_missions
+    get_title, get_first_name, get_last_name, update_user_fields, get_active_missions,
+    MODULE_STATES_CONTEXT_KEY
 )
 
 class ProfileSerializer(serializers.ModelSerializer):
@@ -27,22 +30,32 @@ class UserProfileUpdateSerializer(serializers.ModelSerializer):
     email = serializers.EmailField(source='user.email')
     first_name = serializers.CharField(source='user.first_name', required=False, allow_blank=True)
     last_name = serializers.CharField(source='user.last_name', required=False, allow_blank=True)
+    timezone = serializers.CharField(max_length=64, required=False, allow_blank=True)
 
     class Meta:
         model = Profile
-        fields = ['email', 'first_name', 'last_name']
+        fields = ['email', 'first_name', 'last_name', 'timezone']
+
+    def validate_timezone(self, value):
+        if value and value not in available_timezones():
+            raise serializers.ValidationError("Zona horaria no válida.")
+        return value
 
     def update(self, instance, validated_data):
         user_data = validated_data.pop('user', {})
         user = instance.user
         update_user_fields(user, user_data)
+        if 'timezone' in validated_data:
+            instance.timezone = validated_data['timezone']
+            instance.save(update_fields=['timezone', 'updated_at'])
         return instance
 
     def to_representation(self, instance):
         return {
             'email': instance.user.email,
             'first_name': instance.user.first_name,
-            'last_name': instance.user.last_name
+            'last_name': instance.user.last_name,
+            'timezone': instance.timezone,
         }
 
 class UserProfileDetailSerializer(serializers.ModelSerializer):
@@ -60,26 +73,61 @@ class UserProfileDetailSerializer(serializers.ModelSerializer):
     def get_title(self, obj):
         return get_title(obj)
 
+    def _prefetched(self, obj, attr, queryset):
+        """Usa las filas precargadas por get_profile_queryset o, si no existen, la consulta."""
+        prefetched = getattr(obj.user, attr, None)
+        if prefetched is None:
+            prefetched = list(queryset)
+            setattr(obj.user, attr, prefetched)
+        return prefetched
+
+    def _module_progress(self, obj):
+        from ..models import ModuleProgress
+        return self._prefetched(
+            obj, 'prefetched_module_progress',
+            ModuleProgress.objects.filter(user=obj.user).select_related('module')
+        )
+
+    def _nested_context(self, obj):
+        """Contexto para los serializers anidados con el mapa de estados de módulos ya cargado."""
+        context = dict(self.context)
+        if MODULE_STATES_CONTEXT_KEY not in context:
+            context[MODULE_STATES_CONTEXT_KEY] = {
+                progress.module_id: progress.state for progress in self._module_progress(obj)
+            }
+        return context
+
     def get_module_progress(self, obj):
         from .module_serializers import ModuleProgressSerializer
-        from ..models import ModuleProgress
-        return ModuleProgressSerializer(ModuleProgress.objects.filter(user=obj.user), many=True).data
+        return ModuleProgressSerializer(
+            self._module_progress(obj), many=True, context=self._nested_context(obj)
+        ).data
 
     def get_achievements(self, obj):
         from .achievement_serializers import UserAchievementSerializer
         from ..models import UserAchievement
-        return UserAchievementSerializer(UserAchievement.objects.filter(user=obj.user), many=True).data
+        achievements = self._prefetched(
+            obj, 'prefetched_achievements',
+            UserAchievement.objects.filter(user=obj.user).select_related('achievement')
+        )
+        return UserAchievementSerializer(achievements, many=True).data
 
     def get_streaks(self, obj):
         from .streak_serializers import StreakSerializer
         from ..models import Streak
-        return StreakSerializer(Streak.objects.filter(user=obj.user), many=True).data
+        streaks = self._prefetched(
+            obj, 'prefetched_streaks',
+            Streak.objects.filter(user=obj.user).select_related('module')
+        )
+        return StreakSerializer(streaks, many=True, context=self._nested_context(obj)).data
 
     def get_active_missions(self, obj):
-        from drf_spectacular.utils import extend_schema_field
         from .mission_serializers import MissionProgressSerializer
-        active_missions = get_active_missions(obj.user)
-        return MissionProgressSerializer(active_missions, many=True).data
+        active_missions = self._prefetched(
+            obj, 'prefetched_active_missions',
+            get_active_missions(obj.user).select_related('mission__module')
+        )
+        return MissionProgressSerializer(active_missions, many=True, context=self._nested_context(obj)).data
 
     def get_first_name(self, obj):
         return get_first_name(obj)
@@ -12,5 +12,5 @@ class StreakSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Streak
-        fields = ('module', 'current_streak', 'longest_streak', 'last_activity')
-        read_only_fields = ('last_activity',)
+        fields = ('module', 'current_streak', 'longest_streak', 'last_activity', 'last_active_date')
+        read_only_fields = ('last_activity', 'last_active_date')
@@ -5,6 +5,7 @@ Serializers relacionados con el modelo User.
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
+from django.db import transaction
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for User model."""
@@ -22,11 +23,13 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ('username', 'password', 'email')
 
     def create(self, validated_data):
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password']
-        )
+        # Usuario, perfil y primer módulo en una sola transacción (ver api.utils.onboarding)
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=validated_data['username'],
+                email=validated_data['email'],
+                password=validated_data['password']
+            )
         return user
 
 class UserWriteSerializer(serializers.ModelSerializer):
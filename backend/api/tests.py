@@ -1,3 +1,1096 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import F, QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django_fsm.signals import post_transition
+from rest_framework.test import APIClient
+
+from .models import (
+    Achievement, ActivityBitmap, Declaration, DeclarationTombstone, DomainEvent, Habit, LevelTitle, Mission, MissionCompletionReceipt, MissionProgress, Module, ModuleProgress,
+    ModuleUnlockRule, PillarCoverage, Profile, SharedVersion, Streak, UserAchievement, UserProgressSummary, XPEvent
+)
+from .utils import catalog as catalog_module, events, leaderboard, versions
+from .wellness_survey import questions
+from .wellness_survey.analytics import cohort_analytics
+from .wellness_survey.results import save_submission
+from .wellness_survey.models import WellnessSurveyAnswer, WellnessSurveyResult
+from .utils.activity import load_activity, mark_active
+from .utils.catalog import CATALOG_VERSION_KEY, get_catalog
+from .utils.leaderboard import RankedIndex, get_board, leaderboard_page, rebuild_boards
+from .utils.xp import award_xp, award_xp_bulk
+from .utils.mission_logic import check_and_complete_missions
+from .utils.onboarding import onboard_users
+from .utils.module_unlocks import sync_module_unlocks, unlock_module, unlock_module_for_users
+from .utils.pillar_coverage import unlock_covered_modules
+from .utils.progress_summary import verify_summaries
+from .utils.streaks import record_activity
+
+
+class FixturesMixin:
+    """Fábricas de los datos que comparten los tests: usuarios, módulos, misiones y el cliente autenticado."""
+
+    def create_user(self, username='ana'):
+        return User.objects.create_user(username=username, password='x')
+
+    def create_module(self, module_id, order, **fields):
+        fields = {'name': module_id.capitalize(), 'description': '', 'icon': 'x', **fields}
+        return Module.objects.create(id=module_id, order=order, **fields)
+
+    def create_mission(self, title, module=None, **fields):
+        return Mission.objects.create(module=module, title=title, description='', **fields)
+
+    def login(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class CatalogTestCase(FixturesMixin, TestCase):
+    """Parte de una caché vacía y sin la foto del catálogo de otro test (se revirtió con el rollback)."""
+
+    def setUp(self):
+        cache.clear()
+        catalog_module._snapshot = None
+        leaderboard._boards.clear()
+
+
+class UserMissionsQueryCountTests(CatalogTestCase):
+    """El tablero de /user-missions/ no debe escalar con el tamaño del catálogo."""
+
+    def setUp(self):
+        super().setUp()
+        self.module = self.create_module('salud', 1)
+        self.locked_module = self.create_module('personalidad', 2, xp_required=500)
+        self.user = self.create_user()
+        self.client = self.login(self.user)
+
+    def _add_missions(self, count):
+        for i in range(count):
+            self.create_mission(f'Diaria {i}', frequency='daily')
+            self.create_mission(f'Racha semanal {i}', frequency='weekly')
+            self.create_mission(f'Desbloquea {i}', frequency='weekly')
+            done = self.create_mission(f'Salud {i}', self.module)
+            MissionProgress.objects.create(user=self.user, mission=done, state='completed')
+            self.create_mission(f'Personalidad {i}', self.locked_module)
+
+    def _count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('user-missions'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_query_count_is_independent_of_catalog_size(self):
+        self._add_missions(2)
+        small, _ = self._count_queries()
+        self._add_missions(20)
+        large, board = self._count_queries()
+        self.assertEqual(small, large)
+        self.assertEqual(len(board), 22 * 5)
+
+    def test_board_states(self):
+        self._add_missions(1)
+        _, board = self._count_queries()
+        by_title = {item['title']: item for item in board}
+        self.assertTrue(ModuleProgress.objects.filter(user=self.user, module=self.module, state='unlocked').exists())
+        self.assertEqual(by_title['Salud 0']['state'], 'completed')
+        self.assertEqual(by_title['Personalidad 0']['state'], 'blocked')
+        self.assertEqual(by_title['Diaria 0']['progress']['current'], 0)
+        self.assertEqual(by_title['Racha semanal 0']['progress']['target'], 5)
+        self.assertEqual([item['type'] for item in board[:3]], ['global'] * 3)
+
+    def test_today_follows_profile_timezone(self):
+        self._add_missions(1)
+        Profile.objects.filter(user=self.user).update(timezone='America/Santiago')
+        # 20:00 del 9 de marzo en Santiago; a las 23:30 allá ya es el 10 de marzo en UTC
+        Declaration.objects.create(user=self.user, module=self.module, pillar='Vision', text='x')
+        Declaration.objects.update(created_at=datetime(2026, 3, 9, 23, tzinfo=dt_timezone.utc))
+        with mock.patch('django.utils.timezone.now', return_value=datetime(2026, 3, 10, 2, 30, tzinfo=dt_timezone.utc)):
+            _, board = self._count_queries()
+        daily = next(item for item in board if item['title'] == 'Diaria 0')
+        self.assertEqual((daily['progress']['current'], daily['state']), (1, 'completed'))
+
+
+class CheckAndCompleteMissionsTests(CatalogTestCase):
+    """El evaluador compilado resuelve cadenas de requisitos con consultas fijas."""
+
+    def setUp(self):
+        super().setUp()
+        self.module = self.create_module('salud', 1)
+        self.user = self.create_user()
+
+    def test_chained_requirements_complete_in_one_call(self):
+        first = self.create_mission('Primera', self.module)
+        second = self.create_mission('Segunda', self.module, requirements=[{'type': 'mission', 'id': str(first.id)}])
+        gated = self.create_mission('Con pilar', self.module, requirements=[{'type': 'pillar', 'id': 'Vision'}])
+        MissionProgress.objects.create(user=self.user, mission=second)
+        Declaration.objects.create(user=self.user, module=self.module, pillar='Proposito', text='x')
+
+        check_and_complete_missions(self.user, self.module)
+
+        states = dict(MissionProgress.objects.filter(user=self.user).values_list('mission_id', 'state'))
+        self.assertEqual(states[first.id], 'completed')
+        self.assertEqual(states[second.id], 'completed')
+        self.assertNotIn(gated.id, states)
+
+    def test_query_count_is_independent_of_module_size(self):
+        for i in range(10):
+            self.create_mission(f'M{i}', self.module)
+        check_and_complete_missions(self.user, self.module)
+        for i in range(10):
+            self.create_mission(f'N{i}', self.module)
+        # Recompila el grafo fuera de la medición.
+        check_and_complete_missions(self.user, Module(id='otro'))
+        # La versión del catálogo más las lecturas del progreso
+        with self.assertNumQueries(5):
+            check_and_complete_missions(self.user, self.module)
+
+
+class ModuleUnlockRuleTests(CatalogTestCase):
+    """Las reglas de desbloqueo viven en la tabla ModuleUnlockRule."""
+
+    def setUp(self):
+        super().setUp()
+        self.salud = self.create_module('salud', 1)
+        self.personalidad = self.create_module('personalidad', 2, xp_required=500)
+        self.intelecto = self.create_module('intelecto', 3, xp_required=1000)
+        self.streak_mission = self.create_mission('Racha de 1 día')
+        ModuleUnlockRule.objects.create(module=self.personalidad, min_xp=200, message='XP {xp}')
+        ModuleUnlockRule.objects.create(
+            module=self.personalidad, min_xp=0, required_mission_id=self.streak_mission.id, message='Misión'
+        )
+        self.user = self.create_user()
+        Profile.objects.filter(user=self.user).update(experience_points=300)
+
+    def _states(self):
+        return dict(ModuleProgress.objects.filter(user=self.user).values_list('module_id', 'state'))
+
+    def test_rules_gate_unlocks(self):
+        self.assertEqual(unlock_module(self.user, self.personalidad), (None, 'Misión'))
+        MissionProgress.objects.create(user=self.user, mission=self.streak_mission, state='completed')
+        self.assertEqual(sync_module_unlocks(self.user), ['personalidad'])
+        self.assertEqual(self._states(), {'salud': 'unlocked', 'personalidad': 'unlocked', 'intelecto': 'locked'})
+        progress, error = unlock_module(self.user, self.intelecto)
+        self.assertIsNone(progress)
+        self.assertIn('1000', error)
+
+    def test_sync_short_circuits_when_nothing_changed(self):
+        sync_module_unlocks(self.user)
+        with self.assertNumQueries(3):
+            self.assertEqual(sync_module_unlocks(self.user), [])
+
+
+class DomainEventTests(CatalogTestCase):
+    """Los desbloqueos se evalúan al confirmar escrituras, no al leer."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_module('salud', 1)
+        self.create_module('personalidad', 2, xp_required=50)
+        self.user = self.create_user()
+        Profile.objects.filter(user=self.user).update(experience_points=100)
+
+    def _state(self):
+        return ModuleProgress.objects.filter(user=self.user, module_id='personalidad').values_list('state', flat=True).first()
+
+    def test_sync_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            events.emit(events.XP_CHANGED, self.user.pk)
+            self.assertIsNone(self._state())
+        self.assertEqual(self._state(), 'unlocked')
+
+    @override_settings(DOMAIN_EVENTS_MODE='queue')
+    def test_queue_mode_coalesces_pending_events(self):
+        events.emit(events.XP_CHANGED, self.user.pk)
+        events.emit(events.XP_CHANGED, self.user.pk)
+        self.assertIsNone(self._state())
+        self.assertEqual(events.process_pending(), 2)
+        self.assertEqual(self._state(), 'unlocked')
+        # El desbloqueo encola su propio evento (module_unlocked) para el siguiente lote
+        self.assertEqual(list(DomainEvent.objects.filter(processed_at__isnull=True).values_list('name', flat=True)),
+                         [events.MODULE_UNLOCKED])
+        self.assertEqual(events.process_pending(), 1)
+        self.assertFalse(DomainEvent.objects.filter(processed_at__isnull=True).exists())
+
+    @override_settings(DOMAIN_EVENTS_MODE='queue')
+    def test_failing_handler_does_not_skip_the_others(self):
+        def broken(user_id, **payload):
+            raise RuntimeError('ranking caído')
+
+        with mock.patch.dict(events._handlers, {events.XP_CHANGED: [broken, *events._handlers[events.XP_CHANGED]]}):
+            events.emit(events.XP_CHANGED, self.user.pk)
+            with self.assertLogs('api.utils.events', level='ERROR'):
+                self.assertEqual(events.process_pending(), 1)
+        self.assertEqual(self._state(), 'unlocked')
+        # El evento queda pendiente para reintentarlo
+        event = DomainEvent.objects.get(name=events.XP_CHANGED)
+        self.assertEqual((event.processed_at, event.attempts, event.last_error), (None, 1, 'ranking caído'))
+
+    def test_progress_overview_is_a_pure_read(self):
+        client = self.login(self.user)
+        response = client.get(reverse('progress-overview'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(self._state())
+
+
+class UserProfileQueryCountTests(CatalogTestCase):
+    """/auth/me/ mantiene un número constante de consultas."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+        self.client = self.login(self.user)
+
+    def _add_rows(self, start, count):
+        for i in range(start, start + count):
+            module = self.create_module(f'm{i}', i)
+            ModuleProgress.objects.create(user=self.user, module=module, state='unlocked')
+            Streak.objects.create(user=self.user, module=module, current_streak=1)
+            MissionProgress.objects.create(
+                user=self.user, mission=self.create_mission(f'T{i}', module)
+            )
+            UserAchievement.objects.create(
+                user=self.user, achievement=Achievement.objects.create(name=f'A{i}', description='', icon='x')
+            )
+
+    def _count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('me'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_query_count_is_constant(self):
+        self._add_rows(1, 2)
+        small, _ = self._count_queries()
+        self._add_rows(3, 10)
+        large, data = self._count_queries()
+        self.assertEqual(small, large)
+        self.assertEqual(len(data['module_progress']), 12)
+        self.assertEqual(data['active_missions'][0]['mission']['module']['state'], 'unlocked')
+
+
+class ModuleStatesContextTests(CatalogTestCase):
+    """/missions/ y /modules/ no escalan sus consultas con el tamaño del resultado."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+        self.client = self.login(self.user)
+
+    def _add_modules(self, start, count):
+        for i in range(start, start + count):
+            module = self.create_module(f'm{i}', i)
+            ModuleProgress.objects.create(user=self.user, module=module, state='unlocked')
+            self.create_mission(f'T{i}', module)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_list_query_counts_are_constant(self):
+        for url in ('/api/missions/', '/api/modules/'):
+            self._add_modules(Module.objects.count() + 1, 2)
+            small, _ = self._count_queries(url)
+            self._add_modules(Module.objects.count() + 1, 8)
+            large, data = self._count_queries(url)
+            self.assertEqual(small, large, url)
+            states = {item.get('state') or item['module']['state'] for item in data}
+            self.assertEqual(states, {'unlocked'})
+
+
+class CatalogCacheTests(CatalogTestCase):
+    """El catálogo se sirve desde memoria y se invalida al guardar."""
+
+    def test_snapshot_is_rebuilt_only_after_changes(self):
+        module = self.create_module('salud', 1)
+        catalog = get_catalog()
+        with versions.version_scope():
+            get_catalog()
+            with self.assertNumQueries(0):
+                self.assertIs(get_catalog(), catalog)
+        module.name = 'Bienestar'
+        module.save()
+        self.assertEqual(get_catalog().modules_by_id['salud'].name, 'Bienestar')
+        with self.assertRaises(AttributeError):
+            get_catalog().modules[0].name = 'x'
+
+    def test_change_from_another_worker_invalidates_snapshot(self):
+        self.create_module('salud', 1)
+        first = get_catalog()
+        # Otro worker cambia el catálogo: aquí solo se ve la versión compartida en la base de datos
+        Module.objects.filter(id='salud').update(name='Bienestar')
+        self.assertIs(get_catalog(), first)
+        SharedVersion.objects.filter(key=CATALOG_VERSION_KEY).update(value=F('value') + 1)
+        second = get_catalog()
+        self.assertIsNot(second, first)
+        self.assertEqual(first.modules_by_id['salud'].name, 'Salud')
+        self.assertEqual(second.modules_by_id['salud'].name, 'Bienestar')
+
+    def test_level_titles_come_from_table(self):
+        LevelTitle.objects.create(level=1, title='Novato')
+        profile = self.create_user().profile
+        self.assertEqual(profile.get_level_title(), 'Novato')
+
+
+class XPLedgerTests(CatalogTestCase):
+    """La XP se suma con un UPDATE atómico y queda registrada en XPEvent."""
+
+    def setUp(self):
+        super().setUp()
+        self.ana = self.create_user()
+        self.beto = self.create_user('beto')
+
+    def test_award_xp_updates_points_and_level_in_sql(self):
+        with self.assertNumQueries(2):
+            award_xp(self.ana, 150, 'mission', 'm1')
+        award_xp(self.ana, 60, 'declaration')
+        profile = Profile.objects.get(user=self.ana)
+        self.assertEqual((profile.experience_points, profile.current_level), (210, 3))
+        self.assertEqual(list(XPEvent.objects.filter(user=self.ana).values_list('amount', flat=True)), [150, 60])
+
+    def test_award_xp_bulk(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(award_xp_bulk({self.ana.pk: 99, self.beto.pk: 250}, 'grant'), 2)
+        # Un solo despacho para todo el lote
+        self.assertEqual(len(callbacks), 1)
+        levels = dict(Profile.objects.values_list('user_id', 'current_level'))
+        self.assertEqual(levels, {self.ana.pk: 1, self.beto.pk: 3})
+        self.assertEqual(XPEvent.objects.count(), 2)
+
+    def test_negative_adjustment_keeps_level_one(self):
+        award_xp_bulk({self.ana.pk: -250}, 'ajuste')
+        award_xp(self.beto, -50, 'ajuste')
+        profiles = Profile.objects.values_list('user_id', 'experience_points', 'current_level')
+        self.assertEqual(set(profiles), {(self.ana.pk, -250, 1), (self.beto.pk, -50, 1)})
+
+
+class MissionCompletionIdempotencyTests(CatalogTestCase):
+    """Un doble toque solo otorga la XP una vez."""
+
+    def setUp(self):
+        super().setUp()
+        self.module = self.create_module('salud', 1)
+        self.mission = self.create_mission('Muévete', self.module, xp_reward=30)
+        self.user = self.create_user()
+        self.client = self.login(self.user)
+        self.url = reverse('mission-complete', args=[self.mission.id])
+
+    def _xp(self):
+        return Profile.objects.get(user=self.user).experience_points
+
+    def test_double_tap_awards_once(self):
+        first = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='abc')
+        # El reintento lo puede atender otro worker: la respuesta sale de la base de datos, no de la caché local
+        cache.clear()
+        # Si el reintento se recalculara, completed_at cambiaría la respuesta
+        MissionProgress.objects.filter(user=self.user, mission=self.mission).update(completed_at=timezone.now())
+        second = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(MissionCompletionReceipt.objects.get(user=self.user, key='abc').response, first.json())
+        self.client.post(self.url)
+        self.assertEqual(self._xp(), 30)
+        self.assertEqual(XPEvent.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Streak.objects.get(user=self.user, module=self.module).current_streak, 1)
+
+
+class MissionBatchCompleteTests(CatalogTestCase):
+    """POST /missions/complete-batch/ devuelve un resultado por misión."""
+
+    def setUp(self):
+        super().setUp()
+        self.salud = self.create_module('salud', 1)
+        self.otro = self.create_module('otro', 2, xp_required=999)
+        self.user = self.create_user()
+        self.a = self.create_mission('A', self.salud, xp_reward=10)
+        self.b = self.create_mission('B', self.salud, xp_reward=20)
+        self.locked = self.create_mission('C', self.otro, xp_reward=40)
+        MissionProgress.objects.create(user=self.user, mission=self.b, state='completed')
+        self.client = self.login(self.user)
+
+    def test_batch_results(self):
+        ids = [str(self.a.id), str(self.a.id), str(self.b.id), str(self.locked.id), 'nope',
+               '00000000-0000-0000-0000-000000000000']
+        response = self.client.post(reverse('mission-complete-batch'), {'mission_ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        statuses = [item['status'] for item in response.json()['results']]
+        self.assertEqual(statuses, ['completed', 'already_completed', 'already_completed', 'locked', 'invalid', 'not_found'])
+        self.assertEqual(response.json()['xp_awarded'], 10)
+        self.assertEqual(Profile.objects.get(user=self.user).experience_points, 10)
+        self.assertEqual(Streak.objects.get(user=self.user, module=self.salud).current_streak, 1)
+
+    def test_concurrent_completion_is_not_rewarded(self):
+        update = QuerySet.update
+
+        def racing_update(queryset, **kwargs):
+            # Otra petición completa la misión A entre la lectura de filas y el UPDATE del lote
+            if queryset.model is MissionProgress and kwargs.get('state') == 'completed':
+                update(MissionProgress.objects.filter(user=self.user, mission=self.a), state='completed')
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', racing_update):
+            response = self.client.post(
+                reverse('mission-complete-batch'), {'mission_ids': [str(self.a.id)]}, format='json'
+            )
+        self.assertEqual(response.json()['results'][0]['status'], 'already_completed')
+        self.assertEqual(response.json()['xp_awarded'], 0)
+        self.assertEqual(Profile.objects.get(user=self.user).experience_points, 0)
+
+
+class DeclarationSyncTests(CatalogTestCase):
+    """POST/GET /declarations/sync/ inserta el lote offline y devuelve el delta."""
+
+    def setUp(self):
+        super().setUp()
+        self.salud = self.create_module('salud', 1)
+        self.otro = self.create_module('otro', 2, xp_required=999)
+        self.user = self.create_user()
+        self.client = self.login(self.user)
+
+    def test_push_then_pull(self):
+        pillars = [choice[0] for choice in Declaration.PILLAR_CHOICES]
+        items = [
+            {'client_id': f'c{i}', 'module': 'salud', 'pillar': pillar, 'text': f'texto {i}'}
+            for i, pillar in enumerate(pillars)
+        ]
+        items.append({'client_id': 'dup', 'module': 'salud', 'pillar': pillars[0], 'text': 'texto 0'})
+        response = self.client.post(reverse('declaration-sync'), {'declarations': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([item['status'] for item in body['results']], ['created'] * 4 + ['duplicate'])
+        self.assertEqual(body['results'][0]['id'], body['results'][4]['id'])
+        self.assertEqual(len(body['declarations']), 4)
+        self.assertFalse(body['has_more'])
+        self.assertEqual(Profile.objects.get(user=self.user).experience_points, 80)
+        self.assertEqual(ModuleProgress.objects.get(user=self.user, module=self.otro).state, 'unlocked')
+
+        response = self.client.get(reverse('declaration-sync'), {'cursor': body['cursor']})
+        self.assertEqual(response.json()['declarations'], [])
+
+        deleted_id = body['results'][1]['id']
+        self.client.delete(reverse('declaration-detail', args=[deleted_id]))
+        body = self.client.get(reverse('declaration-sync'), {'cursor': body['cursor']}).json()
+        self.assertEqual((body['declarations'], body['deleted']), ([], [deleted_id]))
+        # Al borrar la cuenta no quedan lápidas
+        self.user.delete()
+        self.assertFalse(DeclarationTombstone.objects.exists())
+
+    def test_offline_days_count_toward_streak(self):
+        items = [
+            {'module': 'salud', 'pillar': 'Vision', 'text': 'a', 'created_at': '2026-03-09T12:00:00Z'},
+            {'module': 'salud', 'pillar': 'Proposito', 'text': 'b', 'created_at': '2026-03-10T12:00:00Z'},
+            {'module': 'salud', 'pillar': 'Creencias', 'text': 'c', 'created_at': '2026-03-10T13:00:00Z'},
+        ]
+        self.client.post(reverse('declaration-sync'), {'declarations': items}, format='json')
+        streak = Streak.objects.get(user=self.user, module=self.salud)
+        self.assertEqual((streak.current_streak, streak.longest_streak), (2, 2))
+        activity = load_activity(self.user.pk)
+        self.assertEqual(activity.days_active(datetime(2026, 3, 1).date(), datetime(2026, 3, 31).date()), 2)
+
+    def test_results_follow_request_order(self):
+        items = [
+            {'module': 'salud', 'pillar': 'Vision', 'text': 'tarde', 'created_at': '2026-03-10T12:00:00Z'},
+            {'module': 'salud', 'pillar': 'Vision', 'text': 'temprano', 'created_at': '2026-03-09T12:00:00Z'},
+        ]
+        results = self.client.post(reverse('declaration-sync'), {'declarations': items}, format='json').json()['results']
+        texts = dict(Declaration.objects.values_list('id', 'text'))
+        self.assertEqual([texts[result['id']] for result in results], ['tarde', 'temprano'])
+        # Se procesan en el orden del cliente: la más antigua se inserta primero
+        self.assertLess(results[1]['id'], results[0]['id'])
+
+    def test_unknown_module_is_rejected(self):
+        items = [{'module': 'nope', 'pillar': 'Vision', 'text': 'x'}]
+        response = self.client.post(reverse('declaration-sync'), {'declarations': items}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Declaration.objects.exists())
+
+
+class PillarCoverageTests(CatalogTestCase):
+    """La cobertura de pilares se mantiene de forma incremental y desbloquea en la transición."""
+
+    def setUp(self):
+        super().setUp()
+        self.salud = self.create_module('salud', 1)
+        self.otro = self.create_module('otro', 2, xp_required=999)
+        self.user = self.create_user()
+        self.pillars = [choice[0] for choice in Declaration.PILLAR_CHOICES]
+
+    def _declare(self, pillar, text='x'):
+        return Declaration.objects.create(user=self.user, module=self.salud, pillar=pillar, text=text)
+
+    def _mask(self):
+        return PillarCoverage.objects.get(user=self.user, module=self.salud).mask
+
+    def test_unlocks_on_transition_only(self):
+        for pillar in self.pillars[:3]:
+            self._declare(pillar)
+        self.assertEqual(self._mask(), 0b0111)
+        self.assertFalse(ModuleProgress.objects.filter(user=self.user, module=self.otro).exists())
+        last = self._declare(self.pillars[3])
+        self.assertEqual(self._mask(), 0b1111)
+        self.assertEqual(ModuleProgress.objects.get(user=self.user, module=self.otro).state, 'unlocked')
+
+        # Un pilar ya cubierto no toca la tabla de progreso de módulos
+        with CaptureQueriesContext(connection) as ctx:
+            self._declare(self.pillars[0], text='otra')
+        self.assertFalse(any('api_moduleprogress' in q['sql'] for q in ctx.captured_queries))
+
+        last.delete()
+        self.assertEqual(self._mask(), 0b0111)
+
+    def test_unlock_covered_modules_repairs_backfilled_coverage(self):
+        # Cobertura completa cargada por la migración, sin pasar por la transición
+        PillarCoverage.objects.create(user=self.user, module=self.salud, mask=0b1111)
+        ModuleProgress.objects.create(user=self.user, module=self.otro)
+        self.assertEqual(unlock_covered_modules(), 1)
+        self.assertEqual(ModuleProgress.objects.get(user=self.user, module=self.otro).state, 'unlocked')
+        self.assertEqual(unlock_covered_modules(), 0)
+
+    def test_update_moves_pillar_bit(self):
+        client = self.login(self.user)
+        response = client.post(reverse('declaration-list'), {'module': 'salud', 'pillar': 'Vision', 'text': 'x'})
+        self.assertEqual(response.status_code, 201)
+        url = reverse('declaration-detail', args=[response.data['id']])
+        self.assertEqual(client.patch(url, {'pillar': 'Proposito'}).status_code, 200)
+        self.assertEqual(self._mask(), 0b0010)
+
+        # Sin declaración de Visión los otros tres pilares no completan el módulo
+        for pillar in self.pillars[2:]:
+            self._declare(pillar)
+        self.assertEqual(self._mask(), 0b1110)
+        self.assertFalse(ModuleProgress.objects.filter(user=self.user, module=self.otro).exists())
+        self.assertEqual(client.patch(url, {'pillar': 'Vision'}).status_code, 200)
+        self.assertEqual(self._mask(), 0b1101)
+        self.assertFalse(ModuleProgress.objects.filter(user=self.user, module=self.otro).exists())
+
+
+class DeclarationListTests(CatalogTestCase):
+    """La paginación por cursor y los campos dispersos de /declarations/ son opcionales."""
+
+    def setUp(self):
+        super().setUp()
+        self.salud = self.create_module('salud', 1)
+        self.user = self.create_user()
+        Declaration.objects.bulk_create([
+            Declaration(user=self.user, module=self.salud, pillar='Vision', text=f'texto {i}') for i in range(5)
+        ])
+        self.client = self.login(self.user)
+
+    def test_plain_list_by_default(self):
+        response = self.client.get(reverse('declaration-list'))
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 5)
+
+    def test_cursor_pages_cover_every_row(self):
+        seen, url, params = [], reverse('declaration-list'), {'page_size': 2, 'module': 'salud'}
+        while url:
+            body = self.client.get(url, params).json()
+            seen.extend(item['id'] for item in body['results'])
+            url, params = body['next'], None
+        self.assertEqual(seen, list(Declaration.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_cursor_is_stable_when_timestamps_tie(self):
+        Declaration.objects.update(created_at=timezone.now())
+        expected = list(Declaration.objects.order_by('-id').values_list('id', flat=True))
+        pages, url, params = [], reverse('declaration-list'), {'page_size': 2}
+        while url:
+            body = self.client.get(url, params).json()
+            pages.append([item['id'] for item in body['results']])
+            url, params, previous = body['next'], None, body['previous']
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        # El cursor "previous" de la última página devuelve exactamente la penúltima
+        self.assertEqual([item['id'] for item in self.client.get(previous).json()['results']], pages[-2])
+        self.assertEqual(self.client.get(reverse('declaration-list'), {'cursor': 'cD1ub3Bl'}).status_code, 404)
+
+    def test_sparse_fields_skip_text(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('declaration-list'), {'fields': 'id,pillar'})
+        self.assertEqual(set(response.json()[0]), {'id', 'pillar'})
+        self.assertFalse(any('"text"' in q['sql'] for q in ctx.captured_queries))
+
+
+class DeclarationSearchTests(CatalogTestCase):
+    """GET /declarations/search/ busca solo en las declaraciones del usuario."""
+
+    def setUp(self):
+        super().setUp()
+        self.salud = self.create_module('salud', 1)
+        self.user = self.create_user()
+        other = self.create_user('beto')
+        self.best = Declaration.objects.create(user=self.user, module=self.salud, pillar='Vision', text='Correr cada mañana y correr lejos')
+        Declaration.objects.create(user=self.user, module=self.salud, pillar='Proposito', text='Quiero correr una maratón algún día con mi familia')
+        Declaration.objects.create(user=self.user, module=self.salud, pillar='Creencias', text='Dormir ocho horas')
+        Declaration.objects.create(user=other, module=self.salud, pillar='Vision', text='Correr también')
+        self.client = self.login(self.user)
+
+    def _search(self, **params):
+        response = self.client.get(reverse('declaration-search'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranked_and_highlighted(self):
+        results = self._search(q='correr')
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['id'], self.best.id)
+        self.assertIn('<mark>Correr</mark>', results[0]['highlight'])
+        self.assertEqual(len(self._search(q='correr', pillar='Proposito')), 1)
+
+    def test_highlight_escapes_declaration_text(self):
+        Declaration.objects.create(
+            user=self.user, module=self.salud, pillar='Estrategias', text='<img src=x onerror=alert(1)> bailar'
+        )
+        highlight = self._search(q='bailar')[0]['highlight']
+        self.assertNotIn('<img', highlight)
+        self.assertIn('&lt;img src=x onerror=alert(1)&gt; <mark>bailar</mark>', highlight)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.best.text = 'Nadar los domingos'
+        self.best.save()
+        self.assertEqual([r['id'] for r in self._search(q='nadar')], [self.best.id])
+        self.best.delete()
+        self.assertEqual(self._search(q='nadar'), [])
+
+
+class UserProgressSummaryTests(CatalogTestCase):
+    """/progress/overview/ lee una fila que mantienen las rutas de escritura."""
+
+    def setUp(self):
+        super().setUp()
+        self.salud = self.create_module('salud', 1)
+        self.mission = self.create_mission('A', self.salud, xp_reward=30)
+        # El registro desbloquea el primer módulo
+        self.user = self.create_user()
+        self.client = self.login(self.user)
+
+    def test_write_paths_keep_summary_current(self):
+        self.client.get(reverse('progress-overview'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('mission-complete', args=[self.mission.id]))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('declaration-list'), {'module': 'salud', 'pillar': 'Vision', 'text': 'x'})
+        with self.captureOnCommitCallbacks(execute=True):
+            UserAchievement.objects.create(
+                user=self.user, achievement=Achievement.objects.create(name='L', description='', icon='x')
+            )
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(reverse('progress-overview')).json()
+        # Versión del catálogo y fila del resumen
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(data['total_xp'], 50)
+        self.assertEqual(data['missions_completed'], 1)
+        self.assertEqual(data['modules_unlocked'], 1)
+        self.assertEqual(data['achievements_earned'], 1)
+        # Misión y declaración el mismo día: la racha sube una sola vez
+        self.assertEqual(data['current_streaks'], {'salud': 1, 'global': 1})
+        self.assertEqual(verify_summaries([self.user.pk]), [])
+
+    def test_lapsed_streak_reads_as_zero(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record_activity(self.user, 'salud', timezone.now() - timedelta(days=3))
+        data = self.client.get(reverse('progress-overview')).json()
+        self.assertEqual(data['current_streaks'], {'salud': 0, 'global': 0})
+
+    def test_verify_detects_stale_rows(self):
+        self.client.get(reverse('progress-overview'))
+        UserProgressSummary.objects.filter(pk=self.user.pk).update(total_xp=999)
+        self.assertEqual(verify_summaries([self.user.pk]), [self.user.pk])
+
+
+class StreakEngineTests(CatalogTestCase):
+    """Las rachas suben como mucho una vez por día local del usuario."""
+
+    def setUp(self):
+        super().setUp()
+        self.salud = self.create_module('salud', 1)
+        self.global_mission = self.create_mission('Racha', xp_reward=10)
+        self.user = self.create_user()
+        Profile.objects.filter(user=self.user).update(timezone='America/Santiago')
+
+    def _at(self, day, hour):
+        return datetime(2026, 3, day, hour, tzinfo=dt_timezone.utc)
+
+    def _streak(self, module=None):
+        return Streak.objects.get(user=self.user, module=module)
+
+    def test_calendar_days_in_user_timezone(self):
+        with self.settings(GLOBAL_STREAK_MISSION_ID=str(self.global_mission.id)):
+            get_catalog()
+            # 10 UTC y 23 UTC del día 10 son el mismo día en Santiago (UTC-3)
+            self.assertEqual(record_activity(self.user, 'salud', self._at(10, 10)), {'salud': 1, None: 1})
+            with self.assertNumQueries(1):
+                self.assertEqual(record_activity(self.user, 'salud', self._at(10, 23)), {})
+            # 02 UTC del día 11 sigue siendo el día 10 en Santiago
+            self.assertEqual(record_activity(self.user, 'salud', self._at(11, 2)), {})
+            self.assertEqual(record_activity(self.user, 'salud', self._at(11, 12)), {'salud': 2, None: 2})
+            self.assertEqual(record_activity(self.user, None, self._at(14, 12)), {None: 1})
+        self.assertEqual((self._streak(self.salud).current_streak, self._streak().longest_streak), (2, 2))
+        self.assertEqual(self._streak().current_streak, 1)
+        self.assertEqual(
+            MissionProgress.objects.get(user=self.user, mission=self.global_mission).state, 'completed'
+        )
+
+
+class ActivityBitmapTests(CatalogTestCase):
+    """Un bit por día activo; las consultas operan sobre la fila empaquetada."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+
+    def test_series_queries(self):
+        start = datetime(2026, 3, 1).date()
+        for offset in (0, 1, 2, 5, 6, 7, 8, 30):
+            mark_active(self.user.pk, start + timedelta(days=offset))
+        self.assertFalse(mark_active(self.user.pk, start))
+        # Un día anterior al origen desplaza el origen bytes completos
+        mark_active(self.user.pk, start - timedelta(days=3))
+        bitmap = ActivityBitmap.objects.get(user=self.user)
+        self.assertEqual(bitmap.origin, start - timedelta(days=8))
+
+        series = load_activity(self.user.pk)
+        end = start + timedelta(days=30)
+        self.assertEqual(series.days_active(start, start + timedelta(days=6)), 5)
+        self.assertEqual(series.longest_run(start - timedelta(days=10), end), 4)
+        heatmap = series.heatmap(end, days=31)
+        self.assertEqual(len(heatmap), 31)
+        self.assertEqual([i for i, active in enumerate(heatmap) if active], [0, 1, 2, 5, 6, 7, 8, 30])
+
+    def test_habit_check_in_once_per_day(self):
+        habit = Habit.objects.create(user=self.user, nombre='Leer', dificultad='fácil')
+        client = self.login(self.user)
+        for _ in range(2):
+            response = client.post(reverse('habit-check-in', args=[habit.pk]))
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['dias_activos'], 1)
+        data = client.get(reverse('progress-activity')).json()
+        self.assertEqual(data['days'][-1], 1)
+        self.assertEqual(data['active_this_week'], 1)
+
+
+class LeaderboardTests(CatalogTestCase):
+    """Los rankings se leen del índice en memoria y se ponen al día tras cada escritura."""
+
+    def setUp(self):
+        super().setUp()
+        self.salud = self.create_module('salud', 1)
+        self.users = [self.create_user(name) for name in ('ana', 'beto', 'caro')]
+
+    def test_ranked_index_ties_and_updates(self):
+        index = RankedIndex([(1, 50), (2, 120), (3, 50), (4, 10)])
+        self.assertEqual(index.top(3), [(1, 2, 120), (2, 1, 50), (2, 3, 50)])
+        self.assertEqual(index.top(2, offset=2), [(2, 3, 50), (4, 4, 10)])
+        self.assertEqual(index.rank(4), (4, 10))
+        index.set(4, 200)
+        self.assertEqual(index.rank(4), (1, 200))
+        self.assertEqual(index.rank(99), (5, 0))
+
+    def test_xp_and_level_boards(self):
+        ana, beto, caro = self.users
+        client = self.login(caro)
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(ana, 150, 'test')
+            award_xp(beto, 120, 'test')
+        get_board('xp')
+        # El índice ya cargado aplica solo los cambios posteriores
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(caro, 300, 'test')
+        data = client.get(reverse('leaderboard', args=['xp'])).json()
+        self.assertEqual([(row['rank'], row['username'], row['level']) for row in data['results']],
+                         [(1, 'caro', 4), (2, 'ana', 2), (3, 'beto', 2)])
+        self.assertEqual(data['me'], {'rank': 1, 'score': 300, 'level': 4})
+        data = client.get(reverse('leaderboard', args=['level']), {'offset': 1}).json()
+        self.assertEqual([(row['rank'], row['username']) for row in data['results']], [(2, 'ana'), (2, 'beto')])
+
+    def test_streak_boards(self):
+        ana, beto, _ = self.users
+        client = self.login(ana)
+        with self.captureOnCommitCallbacks(execute=True):
+            record_activity(ana, 'salud', datetime(2026, 3, 10, 12, tzinfo=dt_timezone.utc))
+            record_activity(ana, 'salud', datetime(2026, 3, 11, 12, tzinfo=dt_timezone.utc))
+            record_activity(beto, None, datetime(2026, 3, 11, 12, tzinfo=dt_timezone.utc))
+        data = client.get(reverse('leaderboard', args=['streak']), {'module': 'salud'}).json()
+        self.assertEqual([(row['username'], row['score']) for row in data['results']], [('ana', 2)])
+        data = client.get(reverse('leaderboard', args=['streak'])).json()
+        self.assertEqual([(row['rank'], row['username']) for row in data['results']], [(1, 'ana'), (2, 'beto')])
+        self.assertEqual(client.get(reverse('leaderboard', args=['streak']), {'module': 'otro'}).status_code, 404)
+
+    def test_module_xp_boards(self):
+        ana, beto, caro = self.users
+        mission = self.create_mission('M', self.salud)
+        self.create_module('familia', 2)
+        client = self.login(caro)
+        with self.captureOnCommitCallbacks(execute=True):
+            award_xp(ana, 40, 'mission', str(mission.id))
+            award_xp(beto, 30, 'declaration', 'salud:Vision')
+            award_xp(beto, 30, 'declaration', 'salud:Valores')
+            award_xp(caro, 500, 'test')
+            award_xp(caro, 20, 'declaration', 'familia:Vision')
+        data = client.get(reverse('leaderboard', args=['xp']), {'module': 'salud'}).json()
+        self.assertEqual(data['board'], 'xp:salud')
+        self.assertEqual([(row['username'], row['score'], row['level']) for row in data['results']],
+                         [('beto', 60, 1), ('ana', 40, 1)])
+        self.assertEqual(data['me'], {'rank': 3, 'score': 0, 'level': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_boards()
+        self.assertEqual(leaderboard_page('xp:familia', 10), [(1, caro.id, 20)])
+
+    def test_deleted_rows_reload_the_whole_board(self):
+        ana, beto, caro = self.users
+        with self.captureOnCommitCallbacks(execute=True):
+            for user, points in zip(self.users, (300, 200, 100)):
+                award_xp(user, points, 'test')
+        self.assertEqual([row[1] for row in leaderboard_page('xp', 10)], [ana.id, beto.id, caro.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            beto.delete()
+        self.assertEqual([row[1] for row in leaderboard_page('xp', 10)], [ana.id, caro.id])
+        Profile.objects.filter(user=caro).update(experience_points=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            rebuild_boards()
+        self.assertEqual(leaderboard_page('xp', 10), [(1, ana.id, 300)])
+
+
+class OnboardingTests(CatalogTestCase):
+    """Alta individual con pocas escrituras y alta masiva en bloque."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_module('salud', 1)
+        self.create_module('familia', 2)
+
+    def test_registration_unlocks_first_module(self):
+        get_catalog()
+        with CaptureQueriesContext(connection) as ctx:
+            response = APIClient().post(reverse('register'), {
+                'username': 'ana', 'email': 'ana@example.com', 'password': 'Clave-segura-123',
+            })
+        self.assertEqual(response.status_code, 201)
+        # User, Profile y ModuleProgress: sin lecturas del módulo ni guardados extra
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]), 3)
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')])
+        progress = ModuleProgress.objects.get(user__username='ana')
+        self.assertEqual((progress.module_id, progress.state, progress.auto_unlocked), ('salud', 'unlocked', True))
+
+    def test_bulk_onboarding(self):
+        self.create_user()
+        rows = [{'username': f'alumno{i}', 'email': f'a{i}@example.com'} for i in range(30)]
+        rows += [{'username': 'ana'}, {'username': 'alumno0'}, {'username': 'beto', 'password': 'Clave-123'}]
+        get_catalog()
+        with self.assertNumQueries(11):
+            result = onboard_users(rows, batch_size=20)
+        self.assertEqual(len(result['created']), 31)
+        self.assertEqual(result['skipped'], ['ana', 'alumno0'])
+        self.assertEqual(Profile.objects.filter(user__username__startswith='alumno').count(), 30)
+        self.assertEqual(ModuleProgress.objects.filter(module_id='salud', state='unlocked').count(), 32)
+        self.assertFalse(User.objects.get(username='alumno1').has_usable_password())
+        self.assertTrue(User.objects.get(username='beto').check_password('Clave-123'))
+
+
+class ModuleTransitionTests(CatalogTestCase):
+    """Cada transición de ModuleProgress es un único UPDATE condicional."""
+
+    def setUp(self):
+        super().setUp()
+        self.create_module('salud', 1)
+        self.familia = self.create_module('familia', 2)
+        self.users = [self.create_user(f'u{i}') for i in range(4)]
+
+    def test_save_transition_single_conditional_update(self):
+        progress = ModuleProgress.objects.create(user=self.users[0], module=self.familia)
+        stale = ModuleProgress.objects.get(pk=progress.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(progress.save_transition('unlock'))
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('"state" = \'locked\'', ctx.captured_queries[0]['sql'])
+        # Una copia desactualizada no vuelve a aplicar la transición ni ejecuta sus señales
+        fired = []
+        post_transition.connect(lambda **kwargs: fired.append(kwargs['name']), weak=False, dispatch_uid='test-fsm')
+        try:
+            self.assertFalse(stale.save_transition('unlock'))
+        finally:
+            post_transition.disconnect(dispatch_uid='test-fsm')
+        self.assertEqual(stale.state, 'unlocked')
+        self.assertEqual(fired, [])
+
+    def test_module_transition_invalidates_catalog(self):
+        get_catalog()
+        self.assertTrue(self.familia.save_transition('unlock'))
+        self.assertEqual(get_catalog().modules_by_id['familia'].state, 'unlocked')
+
+    def test_bulk_unlock(self):
+        ModuleProgress.objects.create(user=self.users[0], module=self.familia)
+        ModuleProgress.objects.create(user=self.users[1], module=self.familia, state='unlocked')
+        user_ids = [user.pk for user in self.users]
+        with self.captureOnCommitCallbacks(execute=True):
+            # INSERT, SELECT ... FOR UPDATE y UPDATE, más el savepoint de la transacción
+            with self.assertNumQueries(5):
+                unlocked = unlock_module_for_users('familia', user_ids)
+        self.assertEqual(unlocked, sorted([user_ids[0], user_ids[2], user_ids[3]]))
+        self.assertEqual(ModuleProgress.objects.filter(module=self.familia, state='unlocked').count(), 4)
+        self.assertEqual(UserProgressSummary.objects.get(user=self.users[2]).modules_unlocked, 2)
+
+
+class WellnessSurveySubmissionTests(FixturesMixin, TestCase):
+    """Un envío es un bulk_create y un vector de promedios guardado."""
+
+    def setUp(self):
+        self.user = self.create_user()
+        self.client = self.login(self.user)
+
+    def _payload(self, salud, familia):
+        return [{'category': 'Salud', 'question': f'S{i}', 'answer': value} for i, value in enumerate(salud)] + [
+            {'category': 'Familia', 'question': f'F{i}', 'answer': value} for i, value in enumerate(familia)
+        ]
+
+    def test_submission_stores_result(self):
+        self.client.post(reverse('wellness-survey-answers'), self._payload([1, 1], [2]), format='json')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse('wellness-survey-answers'), self._payload([7, 8, 10], [5, 6]), format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['values'], [5.5, 8.33])
+        inserts = [q for q in ctx.captured_queries if 'INSERT INTO "api_wellnesssurveyanswer"' in q['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse([q for q in ctx.captured_queries if 'AVG(' in q['sql']])
+        result = WellnessSurveyResult.objects.get(user=self.user, version=2)
+        self.assertEqual((result.categories, result.values, result.answer_count), (['Familia', 'Salud'], [5.5, 8.33], 5))
+        self.assertEqual(result.scores, [[5, 6], [7, 8, 10]])
+        self.assertEqual(result.session.answers.count(), 5)
+        self.assertTrue(result.session.is_completed)
+
+    def test_history_keeps_every_submission(self):
+        for value in (2, 4, 6):
+            self.client.post(reverse('wellness-survey-answers'), self._payload([value], [value + 1]), format='json')
+        # El envío anterior no se borra; el listado muestra solo el último
+        self.assertEqual(WellnessSurveyAnswer.objects.filter(user=self.user).count(), 6)
+        listing = json.loads(b''.join(self.client.get(reverse('wellness-survey-answers')).streaming_content))
+        self.assertEqual([len(group['answers']) for group in listing['categories']], [1, 1])
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse('wellness-survey-history'), {'limit': 2}).json()
+        self.assertEqual([(row['version'], row['values']) for row in data['results']], [(2, [5.0, 4.0]), (3, [7.0, 6.0])])
+        data = self.client.get(reverse('wellness-survey-history'), {'before': 2}).json()
+        self.assertEqual([row['version'] for row in data['results']], [1])
+
+    def test_grouped_listing_and_summary(self):
+        self.client.post(reverse('wellness-survey-answers'), self._payload([7, 8, 10], [5, 6]), format='json')
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('wellness-survey-answers'))
+            data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['values'], [5.5, 8.33])
+        self.assertEqual([(group['category'], group['average'], len(group['answers'])) for group in data['categories']],
+                         [('Familia', 5.5, 2), ('Salud', 8.33, 3)])
+        self.assertEqual(data['categories'][0]['answers'][0], {'category': 'Familia', 'question': 'F0', 'answer': 5})
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse('wellness-survey-answers'), {'summary_only': 'true'}).json()
+        self.assertEqual((data['categories'], data['values']), (['Familia', 'Salud'], [5.5, 8.33]))
+
+    def test_listing_errors(self):
+        def failing_rows(*args, **kwargs):
+            raise DatabaseError('caída')
+            yield
+
+        with mock.patch('django.db.models.query.QuerySet.iterator', failing_rows), self.assertLogs(level='ERROR'):
+            response = self.client.get(reverse('wellness-survey-answers'))
+        self.assertEqual(response.status_code, 500)
+
+        def broken_stream(rows):
+            yield '{"categories":['
+            raise ValueError('serialización')
+        with mock.patch('api.wellness_survey.views.stream_grouped_answers', broken_stream):
+            response = self.client.get(reverse('wellness-survey-answers'))
+            with self.assertLogs('api.wellness_survey.results', level='ERROR'), self.assertRaises(ValueError):
+                b''.join(response.streaming_content)
+
+
+class WellnessSurveyQuestionsTests(FixturesMixin, TestCase):
+    """El banco de preguntas se sirve precargado, con ETag, y se recarga si cambia el archivo."""
+
+    def setUp(self):
+        self.client = self.login(self.create_user())
+        handle, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self._write([{'category': 'Salud', 'type': 'satisfaction', 'questions': ['Descanso']}])
+        patcher = mock.patch.object(questions, 'QUESTIONS_PATH', self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(os.remove, self.path)
+
+    def _write(self, data, mtime=None):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        if mtime:
+            os.utime(self.path, (mtime, mtime))
+
+    def test_etag_and_hot_reload(self):
+        response = self.client.get(reverse('wellness-survey-questions'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)[0]['questions'], ['Descanso'])
+        self.assertIn('max-age', response['Cache-Control'])
+        etag = response['ETag']
+        response = self.client.get(reverse('wellness-survey-questions'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Un archivo inválido no reemplaza el banco cargado
+        with self.assertLogs('api.wellness_survey.questions', 'ERROR'):
+            self._write([{'category': 'Salud', 'type': 'otro', 'questions': []}], mtime=1_000_000)
+            self.assertEqual(self.client.get(reverse('wellness-survey-questions'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self._write([{'category': 'Salud', 'type': 'agreement', 'questions': ['Ejercicio']}], mtime=2_000_000)
+        response = self.client.get(reverse('wellness-survey-questions'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(json.loads(response.content)[0]['questions'], ['Ejercicio'])
+
+
+class WellnessCohortAnalyticsTests(FixturesMixin, TestCase):
+    """La analítica de cohortes se calcula con arreglos NumPy y se guarda en la caché compartida."""
+
+    def _submit(self, user, salud, familia):
+        save_submission(user, [
+            {'category': 'Salud', 'question': 'S', 'answer': salud},
+            {'category': 'Familia', 'question': 'F', 'answer': familia},
+        ])
+
+    def test_cohort_stats(self):
+        ana, beto = (self.create_user(name) for name in ('ana', 'beto'))
+        for user, submissions in ((ana, ([4, 6], [2, 4])), (beto, ([8, 8], [9, 7]))):
+            for salud, familia in zip(*submissions):
+                self._submit(user, salud, familia)
+        categories = cohort_analytics()['categories']
+        salud, familia = categories.index('Salud'), categories.index('Familia')
+        # La huella de los envíos y la lectura de la caché
+        with self.assertNumQueries(2):
+            stats = cohort_analytics()
+        self.assertEqual((stats['users'], stats['submissions'], stats['answers']), (2, 4, 8))
+        self.assertEqual(stats['distributions']['Salud'][4], 1)
+        self.assertEqual(stats['percentiles']['p50'][salud], 7.0)
+        self.assertEqual(stats['deltas']['users'], 2)
+        self.assertEqual((stats['deltas']['mean'][salud], stats['deltas']['mean'][familia]), (1.0, 0.0))
+        self.assertIsNone(stats['percentiles']['p50'][categories.index('Finanzas')])
+        self.assertEqual(stats['over_time']['values'][-1][familia], 5.5)
+
+        # Un envío nuevo cambia la huella y se recalcula
+        save_submission(ana, [{'category': 'Salud', 'question': 'S', 'answer': 10}])
+        self.assertEqual(cohort_analytics([ana.pk])['submissions'], 3)
+
+    def test_command_reuses_cached_window(self):
+        self._submit(self.create_user(), 6, 4)
+        first = StringIO()
+        call_command('wellness_cohort_analytics', stdout=first)
+        second = StringIO()
+        with self.assertNumQueries(2):
+            call_command('wellness_cohort_analytics', stdout=second)
+        self.assertEqual(first.getvalue(), second.getvalue())
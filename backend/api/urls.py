@@ -28,12 +28,15 @@ urlpatterns = [
     # Module specific endpoints
     path('modules/<str:module_id>/unlock/', views.ModuleUnlockView.as_view(), name='module-unlock'),
     path('missions/<uuid:mission_id>/complete/', views.MissionCompleteView.as_view(), name='mission-complete'),
+    path('missions/complete-batch/', views.MissionBatchCompleteView.as_view(), name='mission-complete-batch'),
 
     # User missions endpoint (unificado)
     path('user-missions/', UserMissionsAPIView.as_view(), name='user-missions'),
 
     # Progress endpoints
     path('progress/overview/', views.ProgressOverviewView.as_view(), name='progress-overview'),
+    path('progress/activity/', views.ActivityView.as_view(), name='progress-activity'),
+    path('leaderboards/<str:kind>/', views.LeaderboardView.as_view(), name='leaderboard'),
     path('progress/module/<str:module_id>/', views.ModuleProgressView.as_view(), name='module-progress'),
 
 # Wellness Survey URLs
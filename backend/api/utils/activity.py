@@ -0,0 +1,94 @@
+"""
+Mapa de bits de actividad diaria por usuario (`ActivityBitmap`).
+Un bit por día local desde `origin`, empaquetado en bytes (LSB primero): un año
+de historial son 46 bytes. Se marca desde el motor de rachas la primera vez que
+el usuario tiene actividad en el día (declaración, misión o check-in de
+hábito). Las consultas cargan la fila una vez y operan sobre un entero de
+Python con máscaras y desplazamientos, sin recorrer días uno a uno.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+
+from api.models import ActivityBitmap
+
+HEATMAP_DAYS = 365
+
+
+def set_day(origin, bits: bytes, day):
+    """
+    Devuelve (origin, bits) con el día marcado, o None si ya lo estaba. Un día
+    anterior a `origin` mueve el origen bytes completos hacia atrás.
+    """
+    if origin is None:
+        origin, bits = day, b''
+    if day < origin:
+        shift = -(-(origin - day).days // 8)
+        origin -= timedelta(days=8 * shift)
+        bits = bytes(shift) + bits
+    index = (day - origin).days
+    byte, bit = divmod(index, 8)
+    if byte < len(bits) and bits[byte] & (1 << bit):
+        return None
+    data = bytearray(bits)
+    if byte >= len(data):
+        data.extend(bytes(byte + 1 - len(data)))
+    data[byte] |= 1 << bit
+    return origin, bytes(data)
+
+
+def mark_active(user_id, day) -> bool:
+    """Marca el día como activo. Devuelve False si ya estaba marcado."""
+    with transaction.atomic():
+        row = ActivityBitmap.objects.select_for_update().filter(user_id=user_id).first()
+        if row is None:
+            ActivityBitmap.objects.bulk_create(
+                [ActivityBitmap(user_id=user_id, origin=day, bits=b'')], ignore_conflicts=True
+            )
+            row = ActivityBitmap.objects.select_for_update().get(user_id=user_id)
+        marked = set_day(row.origin, bytes(row.bits), day)
+        if marked is None:
+            return False
+        ActivityBitmap.objects.filter(pk=user_id).update(origin=marked[0], bits=marked[1])
+    return True
+
+
+class ActivitySeries:
+    """Días activos de un usuario como entero: el bit i es el día origin + i."""
+    __slots__ = ('origin', 'value')
+
+    def __init__(self, origin=None, bits=b''):
+        self.origin = origin
+        self.value = int.from_bytes(bytes(bits), 'little')
+
+    def window(self, start, end) -> int:
+        """Bits de [start, end] (ambos incluidos); el bit 0 es `start`."""
+        length = (end - start).days + 1
+        if self.origin is None or length <= 0:
+            return 0
+        offset = (start - self.origin).days
+        value = self.value >> offset if offset >= 0 else self.value << -offset
+        return value & ((1 << length) - 1)
+
+    def days_active(self, start, end) -> int:
+        return self.window(start, end).bit_count()
+
+    def longest_run(self, start, end) -> int:
+        # Cada paso elimina el último día de cada tramo: el número de pasos es el tramo más largo
+        value, run = self.window(start, end), 0
+        while value:
+            value &= value >> 1
+            run += 1
+        return run
+
+    def heatmap(self, end, days=HEATMAP_DAYS) -> list:
+        """Lista de 0/1 de los últimos `days` días, el último es `end`."""
+        start = end - timedelta(days=days - 1)
+        value = self.window(start, end)
+        return [(value >> index) & 1 for index in range(days)]
+
+
+def load_activity(user_id) -> ActivitySeries:
+    row = ActivityBitmap.objects.filter(user_id=user_id).values_list('origin', 'bits').first()
+    return ActivitySeries(*row) if row else ActivitySeries()
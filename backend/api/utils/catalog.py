@@ -0,0 +1,175 @@
+"""
+Caché en memoria del catálogo (módulos, misiones y títulos de nivel).
+El catálogo solo cambia con fixtures o desde el admin, así que cada worker
+guarda una foto inmutable y la reconstruye cuando cambia la versión compartida
+`CATALOG_VERSION_KEY` (tabla `SharedVersion`, ver api.utils.versions), que se
+actualiza en `post_save`/`post_delete` de Module, Mission, ModuleUnlockRule y
+LevelTitle.
+"""
+
+import json
+import os
+import threading
+from uuid import UUID
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from api.models import LevelTitle, Mission, Module, ModuleUnlockRule
+from api.utils import versions
+
+CATALOG_VERSION_KEY = 'catalog:version'
+DEFAULT_LEVEL_TITLE = "Aventurero"
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class _Frozen:
+    """Base de las entradas del catálogo: atributos con slots y de solo lectura."""
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} es inmutable")
+
+    @property
+    def pk(self):
+        return self.id
+
+
+class UnlockRuleEntry(_Frozen):
+    __slots__ = ('id', 'min_xp', 'required_mission_id', 'message')
+
+
+class ModuleEntry(_Frozen):
+    __slots__ = ('id', 'name', 'description', 'icon', 'order', 'xp_required', 'state', 'unlock_rules')
+
+
+class MissionEntry(_Frozen):
+    __slots__ = (
+        'id', 'module_id', 'module', 'title', 'description', 'xp_reward', 'required_level',
+        'created_at', 'frequency', 'requirements',
+        'required_missions', 'required_modules', 'required_pillars',
+    )
+
+
+class Catalog(_Frozen):
+    __slots__ = ('version', 'modules', 'modules_by_id', 'missions', 'missions_by_id', 'level_titles')
+
+    def next_module(self, module_id):
+        """Siguiente módulo por `order` o None si es el último."""
+        module = self.modules_by_id.get(module_id)
+        if module is None:
+            return None
+        return next((m for m in self.modules if m.order > module.order), None)
+
+    def first_module(self):
+        return self.modules[0] if self.modules else None
+
+    def missions_for_module(self, module_id):
+        return tuple(m for m in self.missions if m.module_id == module_id)
+
+    def level_title(self, level):
+        return self.level_titles.get(level, DEFAULT_LEVEL_TITLE)
+
+
+def _parse_mission_ids(requirements):
+    for req in requirements:
+        if req.get("type") != "mission":
+            continue
+        try:
+            yield UUID(str(req.get("id")))
+        except ValueError:
+            # Un id inválido nunca se cumple.
+            yield req.get("id")
+
+
+def _load_level_titles():
+    titles = dict(LevelTitle.objects.values_list('level', 'title'))
+    if titles:
+        return titles
+    # La tabla aún no se cargó con `load_level_titles`: usar el fixture.
+    fixture_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures", "level_titles.json")
+    with open(fixture_path, "r", encoding="utf-8") as f:
+        return {item["level"]: item["title"] for item in json.load(f)}
+
+
+def _build(version) -> Catalog:
+    rules = {}
+    for rule in ModuleUnlockRule.objects.order_by('module', 'id'):
+        rules.setdefault(rule.module_id, []).append(UnlockRuleEntry(
+            id=rule.id,
+            min_xp=rule.min_xp,
+            required_mission_id=rule.required_mission_id,
+            message=rule.message,
+        ))
+    modules = tuple(
+        ModuleEntry(
+            id=m.id, name=m.name, description=m.description, icon=m.icon, order=m.order,
+            xp_required=m.xp_required, state=m.state, unlock_rules=tuple(rules.get(m.id, ())),
+        )
+        for m in Module.objects.order_by('order', 'id')
+    )
+    modules_by_id = {m.id: m for m in modules}
+    missions = []
+    for m in Mission.objects.order_by('created_at', 'id'):
+        requirements = tuple(m.requirements or ())
+        missions.append(MissionEntry(
+            id=m.id, module_id=m.module_id, module=modules_by_id.get(m.module_id),
+            title=m.title, description=m.description, xp_reward=m.xp_reward,
+            required_level=m.required_level, created_at=m.created_at, frequency=m.frequency,
+            requirements=requirements,
+            required_missions=frozenset(_parse_mission_ids(requirements)),
+            required_modules=frozenset(str(r.get("id")) for r in requirements if r.get("type") == "module"),
+            required_pillars=frozenset(r.get("id") for r in requirements if r.get("type") == "pillar"),
+        ))
+    missions = tuple(missions)
+    return Catalog(
+        version=version,
+        modules=modules,
+        modules_by_id=modules_by_id,
+        missions=missions,
+        missions_by_id={m.id: m for m in missions},
+        level_titles=_load_level_titles(),
+    )
+
+
+def get_version():
+    return versions.get_version(CATALOG_VERSION_KEY)
+
+
+def bump_version():
+    versions.bump_version(CATALOG_VERSION_KEY)
+
+
+def get_catalog() -> Catalog:
+    """Devuelve la foto vigente del catálogo, reconstruyéndola si cambió la versión."""
+    global _snapshot
+    version = get_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = _build(version)
+        return _snapshot
+
+
+def invalidate():
+    # Se invalida de inmediato (lecturas dentro de la misma transacción) y de nuevo
+    # tras el commit, por si otro worker reconstruyó con datos aún sin confirmar.
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+def _on_catalog_change(**kwargs):
+    invalidate()
+
+
+for _model in (Module, Mission, ModuleUnlockRule, LevelTitle):
+    post_save.connect(_on_catalog_change, sender=_model, dispatch_uid=f'catalog-save-{_model.__name__}')
+    post_delete.connect(_on_catalog_change, sender=_model, dispatch_uid=f'catalog-delete-{_model.__name__}')
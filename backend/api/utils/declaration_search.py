@@ -0,0 +1,165 @@
+"""
+Búsqueda de texto completo en las declaraciones de un usuario.
+- PostgreSQL: `SearchVector`/`SearchRank`/`SearchHeadline` en español, apoyados
+  en el índice GIN `DECLARATION_SEARCH_INDEX` que crea la migración 0018.
+- SQLite (DEBUG): tabla sombra FTS5 `FTS_TABLE`, mantenida con triggers, con
+  `bm25` para el ranking y `snippet` para resaltar. Las migraciones de SQLite
+  que reconstruyen `api_declaration` borran los triggers, así que se recrean
+  (y se reindexa) en `post_migrate` si faltan.
+Otros motores caen a un `icontains` sin ranking.
+El motor marca los términos con caracteres de control (`MARK_START`/`MARK_STOP`);
+el fragmento se escapa como HTML y solo después se cambian por `<mark>`, así
+que el texto del usuario nunca llega como marcado al cliente.
+"""
+
+import html
+
+from django.db import connection
+from django.db.models.signals import post_migrate
+
+from api.models import Declaration
+
+SEARCH_CONFIG = 'spanish'
+DECLARATION_SEARCH_INDEX = 'declaration_text_search_idx'
+FTS_TABLE = 'api_declaration_fts'
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+MARK_START = '\x02'
+MARK_STOP = '\x03'
+MAX_RESULTS = 100
+
+FTS_SCHEMA = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "text, content='api_declaration', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON api_declaration BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON api_declaration BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF text ON api_declaration BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def search_vector():
+    """Expresión indexada; la consulta y el índice GIN deben usar exactamente la misma."""
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('text', config=SEARCH_CONFIG)
+
+
+def render_highlight(fragment) -> str:
+    """Escapa el fragmento como HTML y convierte las marcas del motor en <mark>."""
+    escaped = html.escape(fragment or '')
+    return escaped.replace(MARK_START, HIGHLIGHT_START).replace(MARK_STOP, HIGHLIGHT_STOP)
+
+
+def _result(declaration_id, module_id, pillar, created_at, rank, highlight):
+    return {
+        "id": declaration_id,
+        "module": module_id,
+        "pillar": pillar,
+        "created_at": created_at,
+        "rank": float(rank or 0),
+        "highlight": render_highlight(highlight),
+    }
+
+
+def _search_postgresql(queryset, query, limit):
+    from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    vector = search_vector()
+    rows = (
+        queryset.annotate(document=vector)
+        .filter(document=search_query)
+        .annotate(
+            rank=SearchRank(vector, search_query),
+            highlight=SearchHeadline(
+                'text', search_query, config=SEARCH_CONFIG,
+                start_sel=MARK_START, stop_sel=MARK_STOP, max_fragments=2,
+            ),
+        )
+        .order_by('-rank', '-created_at', '-id')
+        .values_list('id', 'module_id', 'pillar', 'created_at', 'rank', 'highlight')[:limit]
+    )
+    return [_result(*row) for row in rows]
+
+
+def fts_query(query: str) -> str:
+    """Convierte el texto libre en términos FTS5 entre comillas (AND implícito, sin sintaxis)."""
+    terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+    return ' '.join(terms)
+
+
+def _search_sqlite(user, query, module_id, pillar, limit):
+    match = fts_query(query)
+    if not match:
+        return []
+    sql = [
+        f"SELECT d.id, d.module_id, d.pillar, d.created_at, -bm25({FTS_TABLE}) AS rank,",
+        f" snippet({FTS_TABLE}, 0, %s, %s, '…', 24) AS highlight",
+        f" FROM {FTS_TABLE} JOIN {Declaration._meta.db_table} d ON d.id = {FTS_TABLE}.rowid",
+        f" WHERE {FTS_TABLE} MATCH %s AND d.user_id = %s",
+    ]
+    params = [MARK_START, MARK_STOP, match, user.pk]
+    if module_id:
+        sql.append(" AND d.module_id = %s")
+        params.append(module_id)
+    if pillar:
+        sql.append(" AND d.pillar = %s")
+        params.append(pillar)
+    sql.append(f" ORDER BY bm25({FTS_TABLE}), d.created_at DESC, d.id DESC LIMIT %s")
+    params.append(limit)
+    # raw() aplica los conversores del ORM (created_at es texto en SQLite)
+    rows = Declaration.objects.raw(''.join(sql), params)
+    return [_result(d.id, d.module_id, d.pillar, d.created_at, d.rank, d.highlight) for d in rows]
+
+
+def _search_fallback(queryset, query, limit):
+    rows = queryset.filter(text__icontains=query).order_by('-created_at', '-id').values_list(
+        'id', 'module_id', 'pillar', 'created_at', 'text'
+    )[:limit]
+    return [_result(i, m, p, c, 0, text) for i, m, p, c, text in rows]
+
+
+def search_declarations(user, query, module_id=None, pillar=None, limit=50) -> list:
+    """
+    Busca `query` en las declaraciones del usuario (opcionalmente de un módulo y
+    pilar) y devuelve hasta `limit` resultados ordenados por relevancia:
+    {"id", "module", "pillar", "created_at", "rank", "highlight"}.
+    """
+    query = (query or '').strip()
+    if not query:
+        return []
+    limit = max(1, min(limit, MAX_RESULTS))
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(user, query, module_id, pillar, limit)
+
+    queryset = Declaration.objects.filter(user=user)
+    if module_id:
+        queryset = queryset.filter(module_id=module_id)
+    if pillar:
+        queryset = queryset.filter(pillar=pillar)
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(queryset, query, limit)
+    return _search_fallback(queryset, query, limit)
+
+
+def ensure_sqlite_fts(app_config=None, using='default', **kwargs):
+    """Recrea la tabla FTS5 y sus triggers si una migración los eliminó."""
+    from django.db import connections
+    db = connections[using]
+    if db.vendor != 'sqlite' or (app_config is not None and app_config.label != 'api'):
+        return
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f"{FTS_TABLE}_%"])
+        if cursor.fetchone()[0] == 3:
+            return
+        if Declaration._meta.db_table not in db.introspection.table_names(cursor):
+            return
+        for statement in FTS_SCHEMA:
+            cursor.execute(statement)
+
+
+post_migrate.connect(ensure_sqlite_fts, dispatch_uid='declaration-search-fts')
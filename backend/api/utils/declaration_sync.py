@@ -0,0 +1,187 @@
+"""
+Sincronización delta de declaraciones para clientes offline.
+El cliente envía un lote de declaraciones creadas sin conexión (con su
+`client_id`) y recibe las filas del servidor que cambiaron desde su último
+cursor. El lote se inserta con un solo bulk_create (los duplicados por
+`unique_together (user, module, pillar, text)` se ignoran) y los efectos
+secundarios (XP, misiones y desbloqueos) se aplican una vez por lote. La racha
+y el mapa de actividad se registran una vez por día local distinto según el
+`created_at` del cliente, así que los días trabajados sin conexión cuentan.
+Los borrados quedan en `DeclarationTombstone` y se devuelven en el pull.
+"""
+
+import base64
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from api.models import Declaration, DeclarationTombstone, Module, Profile
+from api.utils import events
+from api.utils.activity import mark_active
+from api.utils.catalog import get_catalog
+from api.utils.mission_logic import check_and_complete_missions
+from api.utils.pillar_coverage import record_pillars
+from api.utils.streaks import local_date, record_activity
+from api.utils.xp import award_xp_entries
+
+PULL_PAGE_SIZE = 500
+
+
+def declaration_xp(module) -> int:
+    """XP de la primera declaración de un pilar: base 20 + 10 * (orden-1)."""
+    return 20 + 10 * (module.order - 1)
+
+
+def encode_cursor(updated_at, declaration_id) -> str:
+    raw = f"{updated_at.isoformat()}|{declaration_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Devuelve (updated_at, id) o None si el cursor está vacío o es inválido."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        updated_at, declaration_id = raw.split("|", 1)
+        return datetime.fromisoformat(updated_at), int(declaration_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def push_declarations(user, items) -> list:
+    """
+    Inserta el lote y devuelve un resultado por elemento:
+    {"client_id", "id", "status": "created" | "duplicate"}.
+    `items` son dicts validados con module (id), pillar, text, client_id y,
+    opcionalmente, created_at (momento en que se creó en el cliente).
+    """
+    if not items:
+        return []
+    catalog = get_catalog()
+    now = timezone.now()
+
+    def client_time(item):
+        # Una fecha futura (reloj del dispositivo adelantado) cuenta como ahora
+        created_at = item.get('created_at')
+        return min(created_at, now) if created_at else now
+
+    # El orden del cliente decide qué declaración es la primera de cada pilar; los
+    # resultados se devuelven en el orden del lote recibido
+    order = sorted(enumerate(items), key=lambda pair: client_time(pair[1]))
+    module_ids = {item['module'] for item in items}
+    texts = {item['text'] for item in items}
+
+    with transaction.atomic():
+        # Serializa los lotes del mismo usuario: dos sincronizaciones simultáneas
+        # no pueden leer ambas el pilar como nuevo y otorgar la XP dos veces.
+        User.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True).first()
+        tz_name = Profile.objects.filter(user_id=user.pk).values_list('timezone', flat=True).first()
+        existing_pillars = set(Declaration.objects.filter(
+            user=user, module_id__in=module_ids
+        ).values_list('module_id', 'pillar').distinct())
+        existing_keys = set(Declaration.objects.filter(
+            user=user, module_id__in=module_ids, text__in=texts
+        ).values_list('module_id', 'pillar', 'text'))
+
+        Declaration.objects.bulk_create(
+            [Declaration(user=user, module_id=item['module'], pillar=item['pillar'], text=item['text'], synced=True)
+             for _, item in order],
+            ignore_conflicts=True,
+        )
+        ids = {
+            (module_id, pillar, text): declaration_id
+            for declaration_id, module_id, pillar, text in Declaration.objects.filter(
+                user=user, module_id__in=module_ids, text__in=texts
+            ).values_list('id', 'module_id', 'pillar', 'text')
+        }
+
+        results, seen, xp_entries, touched, days = [None] * len(items), set(), [], {}, {}
+        for index, item in order:
+            key = (item['module'], item['pillar'], item['text'])
+            created = key not in existing_keys and key not in seen
+            seen.add(key)
+            results[index] = {
+                "client_id": item.get('client_id'),
+                "id": ids.get(key),
+                "status": "created" if created else "duplicate",
+            }
+            if not created:
+                continue
+            touched.setdefault(item['module'], set()).add(item['pillar'])
+            when = client_time(item)
+            days.setdefault(item['module'], {}).setdefault(local_date(tz_name, when), when)
+            pair = (item['module'], item['pillar'])
+            if pair not in existing_pillars:
+                existing_pillars.add(pair)
+                module = catalog.modules_by_id[item['module']]
+                xp_entries.append((declaration_xp(module), 'declaration', f"{module.id}:{item['pillar']}"))
+
+        award_xp_entries(user, xp_entries)
+        modules = Module.objects.in_bulk(touched)
+        marked = set()
+        for module_id, pillars in touched.items():
+            module = modules[module_id]
+            for day, when in sorted(days[module_id].items()):
+                if None in record_activity(user, module_id, when):
+                    marked.add(day)
+                elif day not in marked:
+                    # Día anterior a la racha vigente (o ya contado): solo el mapa de actividad
+                    mark_active(user.pk, day)
+                    marked.add(day)
+            check_and_complete_missions(user, module)
+            record_pillars(user.pk, module_id, pillars)
+        if touched:
+            events.emit(events.DECLARATION_CREATED, user.pk, module_ids=list(touched))
+    return results
+
+
+def pull_declarations(user, cursor=None, limit=PULL_PAGE_SIZE):
+    """
+    Devuelve (declaraciones, ids_borrados, nuevo_cursor, hay_mas) con las filas
+    del usuario modificadas después del cursor, en orden (updated_at, id), y las
+    declaraciones borradas en el mismo intervalo. Sin cursor (primera
+    sincronización) no hay borrados que informar. Un borrado en el límite del
+    cursor puede repetirse en el siguiente pull; el cliente lo ignora.
+    """
+    queryset = Declaration.objects.filter(user=user)
+    position = decode_cursor(cursor)
+    if position is not None:
+        updated_at, declaration_id = position
+        queryset = queryset.filter(
+            Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=declaration_id)
+        )
+    rows = list(queryset.order_by('updated_at', 'id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        cursor = encode_cursor(rows[-1].updated_at, rows[-1].id)
+
+    deleted = []
+    if position is not None:
+        tombstones = DeclarationTombstone.objects.filter(user=user, deleted_at__gte=position[0])
+        if has_more:
+            # El resto de borrados llega con la página siguiente
+            tombstones = tombstones.filter(deleted_at__lte=rows[-1].updated_at)
+        tombstones = list(tombstones.order_by('deleted_at', 'declaration_id').values_list(
+            'declaration_id', 'deleted_at'
+        ))
+        deleted = [declaration_id for declaration_id, _ in tombstones]
+        last_deleted = tombstones[-1][1] if tombstones else None
+        if last_deleted is not None and last_deleted > (rows[-1].updated_at if rows else position[0]):
+            cursor = encode_cursor(last_deleted, 0)
+    return rows, deleted, cursor, has_more
+
+
+def _on_declaration_deleted(sender, instance, origin=None, **kwargs):
+    # Al borrar el usuario completo no hay cliente al que avisar (y la lápida caería con él)
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return
+    DeclarationTombstone.objects.create(user_id=instance.user_id, declaration_id=instance.pk)
+
+
+post_delete.connect(_on_declaration_deleted, sender=Declaration, dispatch_uid='declaration-tombstone')
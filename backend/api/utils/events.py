@@ -0,0 +1,129 @@
+"""
+Eventos de dominio y su despachador.
+Las rutas de escritura emiten eventos (`emit`) y los manejadores suscritos
+(`subscribe`) se ejecutan después del commit. Según `settings.DOMAIN_EVENTS_MODE`:
+- 'sync': en el mismo proceso, mediante `transaction.on_commit`.
+- 'queue': se encolan en la tabla `DomainEvent` dentro de la misma transacción
+  y los procesa el worker `python manage.py process_domain_events`.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+XP_CHANGED = 'xp_changed'
+MISSION_COMPLETED = 'mission_completed'
+MODULE_UNLOCKED = 'module_unlocked'
+ACHIEVEMENT_EARNED = 'achievement_earned'
+DECLARATION_CREATED = 'declaration_created'
+STREAK_CHANGED = 'streak_changed'
+
+MAX_ATTEMPTS = 5
+
+_handlers = defaultdict(list)
+
+
+def subscribe(name: str):
+    """Registra un manejador `handler(user_id, **payload)` para el evento."""
+    def decorator(func):
+        _handlers[name].append(func)
+        return func
+    return decorator
+
+
+def get_mode() -> str:
+    return getattr(settings, 'DOMAIN_EVENTS_MODE', 'sync')
+
+
+def emit(name: str, user_id: int, **payload) -> None:
+    """
+    Emite un evento de dominio. Nunca se procesa antes de que la transacción
+    actual se confirme.
+    """
+    if get_mode() == 'queue':
+        from api.models import DomainEvent
+        DomainEvent.objects.create(name=name, user_id=user_id, payload=payload)
+        return
+    transaction.on_commit(lambda: dispatch(name, user_id, payload), robust=True)
+
+
+def emit_many(name: str, user_ids, **payload) -> None:
+    """Emite el mismo evento para muchos usuarios (un INSERT en modo 'queue')."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    if get_mode() == 'queue':
+        from api.models import DomainEvent
+        DomainEvent.objects.bulk_create(
+            [DomainEvent(name=name, user_id=user_id, payload=payload) for user_id in user_ids]
+        )
+        return
+
+    def dispatch_all():
+        for user_id in user_ids:
+            dispatch(name, user_id, payload)
+    transaction.on_commit(dispatch_all, robust=True)
+
+
+def dispatch(name: str, user_id: int, payload: dict) -> list:
+    """
+    Ejecuta todos los manejadores suscritos al evento, cada uno en su propio
+    savepoint: si uno falla se registra el error, se deshacen solo sus cambios
+    y los demás se ejecutan igual. Devuelve las excepciones de los que fallaron.
+    """
+    errors = []
+    for handler in _handlers.get(name, ()):
+        try:
+            with transaction.atomic():
+                handler(user_id, **payload)
+        except Exception as exc:
+            logger.exception("El manejador %s falló con el evento %s del usuario %s", handler.__qualname__, name, user_id)
+            errors.append(exc)
+    return errors
+
+
+def process_pending(batch_size: int = 100) -> int:
+    """
+    Procesa un lote de eventos pendientes de la cola local y devuelve cuántos
+    se consumieron. Los eventos repetidos (mismo nombre y usuario) del lote se
+    despachan una sola vez, porque los manejadores son idempotentes.
+    """
+    from api.models import DomainEvent
+    from api.utils.versions import version_scope
+
+    with transaction.atomic(), version_scope():
+        events = list(
+            DomainEvent.objects.select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .order_by('id')[:batch_size]
+        )
+        groups = {}
+        for event in events:
+            groups.setdefault((event.name, event.user_id), []).append(event)
+
+        now = timezone.now()
+        for (name, user_id), group in groups.items():
+            payload = dict(group[0].payload)
+            # Las listas (mission_ids, module_ids...) se acumulan entre los eventos del grupo
+            for key, value in payload.items():
+                if isinstance(value, list):
+                    payload[key] = [item for event in group for item in event.payload.get(key, [])]
+            # Los manejadores son idempotentes: si alguno falla, el evento se reintenta completo
+            errors = dispatch(name, user_id, payload)
+            if errors:
+                for event in group:
+                    event.attempts += 1
+                    event.last_error = '; '.join(str(error) for error in errors)
+                    if event.attempts >= MAX_ATTEMPTS:
+                        event.processed_at = now
+            else:
+                for event in group:
+                    event.attempts += 1
+                    event.processed_at = now
+        DomainEvent.objects.bulk_update(events, ['attempts', 'last_error', 'processed_at'])
+    return len(events)
@@ -0,0 +1,274 @@
+"""
+Rankings (leaderboards) de XP, nivel y racha más larga, global y por módulo.
+La XP de un módulo es la suma de los movimientos de `XPEvent` ligados a él:
+declaraciones (referencia "módulo:pilar") y misiones (referencia = id de misión).
+Cada worker guarda por ranking un arreglo ordenado de claves (-puntaje, user_id)
+y busca con `bisect`: top-N en O(log n + N) y posición de un usuario en
+O(log n). La fuente compartida es la tabla `LeaderboardEntry`, que las rutas de
+escritura actualizan con un upsert (eventos xp_changed y streak_changed). Las
+versiones viven en la tabla `SharedVersion` (api.utils.versions), visible para
+todos los workers:
+- `LEADERBOARD_VERSION_KEY` cambia tras cada upsert; el worker aplica solo las
+  filas cambiadas desde su última lectura.
+- `LEADERBOARD_EPOCH_KEY` cambia cuando se borran filas (`rebuild_boards` o
+  usuarios eliminados), que una lectura incremental no detecta; el worker
+  recarga el ranking completo.
+El índice se modifica en su lugar, así que las lecturas también toman `_lock`.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import timedelta
+from uuid import UUID
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from api.models import LeaderboardEntry, Profile, Streak, XPEvent
+from api.utils import events, versions
+from api.utils.catalog import get_catalog
+from api.utils.xp import XP_PER_LEVEL
+
+LEADERBOARD_VERSION_KEY = 'leaderboard:version'
+LEADERBOARD_EPOCH_KEY = 'leaderboard:epoch'
+XP_BOARD = 'xp'
+STREAK_BOARD = 'streak'
+# Margen al leer cambios: una fila confirmada tarde con un updated_at anterior
+# a la última lectura se vuelve a aplicar (los puntajes son absolutos).
+SYNC_LAG = timedelta(seconds=10)
+
+_lock = threading.Lock()
+_boards = {}
+
+
+def xp_board(module_id=None) -> str:
+    return f"{XP_BOARD}:{module_id}" if module_id else XP_BOARD
+
+
+def streak_board(module_id=None) -> str:
+    return f"{STREAK_BOARD}:{module_id}" if module_id else STREAK_BOARD
+
+
+def is_xp_board(board) -> bool:
+    return board.split(':', 1)[0] == XP_BOARD
+
+
+def _module_for(catalog, reason, reference):
+    """Módulo al que pertenece un movimiento de XP, o None si no está ligado a uno."""
+    if reason == 'declaration':
+        return reference.split(':', 1)[0] or None
+    if reason == 'mission':
+        try:
+            mission = catalog.missions_by_id.get(UUID(reference))
+        except ValueError:
+            return None
+        return mission.module_id if mission else None
+    return None
+
+
+def _module_xp_rows(queryset, chunk_size=10000):
+    """[(user_id, module_id, xp), ...] agregando los movimientos por referencia."""
+    catalog = get_catalog()
+    totals = {}
+    rows = (
+        queryset.filter(reason__in=('declaration', 'mission'))
+        .values_list('user_id', 'reason', 'reference').annotate(total=Sum('amount')).order_by()
+    )
+    for user_id, reason, reference, total in rows.iterator(chunk_size=chunk_size):
+        module_id = _module_for(catalog, reason, reference)
+        if module_id is not None:
+            totals[user_id, module_id] = totals.get((user_id, module_id), 0) + total
+    return [(user_id, module_id, points) for (user_id, module_id), points in totals.items()]
+
+
+def level_for(points) -> int:
+    return max(points // XP_PER_LEVEL + 1, 1)
+
+
+class RankedIndex:
+    """Arreglo ordenado de (-puntaje, user_id) más un diccionario user_id -> puntaje."""
+    __slots__ = ('keys', 'scores')
+
+    def __init__(self, pairs=()):
+        self.scores = dict(pairs)
+        self.keys = sorted((-score, user_id) for user_id, score in self.scores.items())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def set(self, user_id, score) -> None:
+        previous = self.scores.get(user_id)
+        if previous == score:
+            return
+        if previous is not None:
+            del self.keys[bisect_left(self.keys, (-previous, user_id))]
+        self.scores[user_id] = score
+        insort(self.keys, (-score, user_id))
+
+    def count_above(self, score) -> int:
+        """Usuarios con puntaje estrictamente mayor."""
+        return bisect_left(self.keys, (-score,))
+
+    def count_at_least(self, score) -> int:
+        return bisect_right(self.keys, (-score, float('inf')))
+
+    def rank(self, user_id):
+        """(posición, puntaje); los empates comparten posición. Sin entrada cuenta como 0."""
+        score = self.scores.get(user_id, 0)
+        return self.count_above(score) + 1, score
+
+    def top(self, limit, offset=0) -> list:
+        """[(posición, user_id, puntaje), ...] a partir de `offset`."""
+        rows, rank, previous = [], None, None
+        for index, (negative, user_id) in enumerate(self.keys[offset:offset + limit], start=offset):
+            score = -negative
+            if score != previous:
+                rank = index + 1 if previous is not None else self.count_above(score) + 1
+                previous = score
+            rows.append((rank, user_id, score))
+        return rows
+
+
+class _LoadedBoard:
+    __slots__ = ('index', 'version', 'epoch', 'synced_at')
+
+    def __init__(self, index, version, epoch, synced_at):
+        self.index = index
+        self.version = version
+        self.epoch = epoch
+        self.synced_at = synced_at
+
+    def is_current(self, version, epoch):
+        return self.version == version and self.epoch == epoch
+
+
+def bump_version():
+    versions.bump_version(LEADERBOARD_VERSION_KEY)
+
+
+def bump_epoch():
+    versions.bump_version(LEADERBOARD_EPOCH_KEY)
+
+
+def get_board(name) -> RankedIndex:
+    """
+    Índice vigente del ranking, cargándolo o aplicando los cambios pendientes.
+    Quien lo lea debe hacerlo con `_lock` tomado (ver `leaderboard_page`).
+    """
+    version, epoch = versions.get_versions(LEADERBOARD_VERSION_KEY, LEADERBOARD_EPOCH_KEY)
+    loaded = _boards.get(name)
+    if loaded is not None and loaded.is_current(version, epoch):
+        return loaded.index
+    with _lock:
+        loaded = _boards.get(name)
+        if loaded is not None and loaded.is_current(version, epoch):
+            return loaded.index
+        started = timezone.now()
+        if loaded is None or loaded.epoch != epoch:
+            rows = LeaderboardEntry.objects.filter(board=name).order_by('-score', 'user_id')
+            pairs = rows.values_list('user_id', 'score').iterator(chunk_size=10000)
+            loaded = _LoadedBoard(RankedIndex(pairs), version, epoch, started)
+            _boards[name] = loaded
+        else:
+            changes = LeaderboardEntry.objects.filter(
+                board=name, updated_at__gte=loaded.synced_at - SYNC_LAG
+            ).values_list('user_id', 'score')
+            for user_id, score in changes:
+                loaded.index.set(user_id, score)
+            loaded.version = version
+            loaded.synced_at = started
+        return loaded.index
+
+
+def level_rank(index, points) -> int:
+    """Posición por nivel: usuarios con XP suficiente para un nivel mayor, más uno."""
+    return index.count_at_least(level_for(points) * XP_PER_LEVEL) + 1
+
+
+def leaderboard_page(board, limit, offset=0, by_level=False) -> list:
+    """
+    [(posición, user_id, puntaje), ...]; con `by_level` el ranking de XP se agrupa
+    por nivel y los usuarios del mismo nivel comparten posición.
+    """
+    index = get_board(board)
+    with _lock:
+        rows = index.top(limit, offset)
+        if by_level:
+            rows = [(level_rank(index, score), user_id, score) for _, user_id, score in rows]
+    return rows
+
+
+def user_rank(board, user_id, by_level=False):
+    """(posición, puntaje) del usuario en el ranking."""
+    index = get_board(board)
+    with _lock:
+        rank, score = index.rank(user_id)
+        if by_level:
+            rank = level_rank(index, score)
+    return rank, score
+
+
+def set_scores(board, scores: dict) -> None:
+    """Upsert de puntajes absolutos {user_id: puntaje} en la foto compartida."""
+    if not scores:
+        return
+    LeaderboardEntry.objects.bulk_create(
+        [LeaderboardEntry(board=board, user_id=user_id, score=score) for user_id, score in scores.items()],
+        update_conflicts=True, unique_fields=['board', 'user'], update_fields=['score', 'updated_at'],
+    )
+    transaction.on_commit(bump_version)
+
+
+def _snapshot_entries(chunk_size):
+    profiles = Profile.objects.filter(experience_points__gt=0).values_list('user_id', 'experience_points')
+    for user_id, points in profiles.iterator(chunk_size=chunk_size):
+        yield LeaderboardEntry(board=XP_BOARD, user_id=user_id, score=points)
+    for user_id, module_id, points in _module_xp_rows(XPEvent.objects.all(), chunk_size):
+        if points > 0:
+            yield LeaderboardEntry(board=xp_board(module_id), user_id=user_id, score=points)
+    streaks = Streak.objects.filter(longest_streak__gt=0).values_list('user_id', 'module_id', 'longest_streak')
+    for user_id, module_id, longest in streaks.iterator(chunk_size=chunk_size):
+        yield LeaderboardEntry(board=streak_board(module_id), user_id=user_id, score=longest)
+
+
+def rebuild_boards(chunk_size=10000) -> int:
+    """Reconstruye la foto completa desde Profile y Streak (migración o reparación)."""
+    LeaderboardEntry.objects.all().delete()
+    total, batch = 0, []
+    for entry in _snapshot_entries(chunk_size):
+        batch.append(entry)
+        if len(batch) >= chunk_size:
+            total += len(LeaderboardEntry.objects.bulk_create(batch))
+            batch = []
+    total += len(LeaderboardEntry.objects.bulk_create(batch))
+    # Las filas borradas no aparecen en una lectura incremental: cada worker recarga completo
+    transaction.on_commit(bump_epoch)
+    return total
+
+
+def _on_user_deleted(**kwargs):
+    transaction.on_commit(bump_epoch)
+
+
+post_delete.connect(_on_user_deleted, sender=User, dispatch_uid='leaderboard-user-deleted')
+
+
+@events.subscribe(events.XP_CHANGED)
+def _on_xp_changed(user_id, **payload):
+    points = Profile.objects.filter(user_id=user_id).values_list('experience_points', flat=True).first()
+    if points is not None:
+        set_scores(XP_BOARD, {user_id: points})
+    for _, module_id, module_points in _module_xp_rows(XPEvent.objects.filter(user_id=user_id)):
+        set_scores(xp_board(module_id), {user_id: module_points})
+
+
+@events.subscribe(events.STREAK_CHANGED)
+def _on_streak_changed(user_id, **payload):
+    streaks = Streak.objects.filter(user_id=user_id).values_list('module_id', 'longest_streak')
+    module_ids = set(payload.get('module_ids') or ())
+    for module_id, longest in streaks:
+        if module_id in module_ids:
+            set_scores(streak_board(module_id), {user_id: longest})
@@ -0,0 +1,138 @@
+"""
+Tablero de misiones del usuario (/user-missions/).
+Construye el tablero completo con un número fijo de consultas, sin importar
+cuántas misiones tenga el catálogo. "Hoy" y "esta semana" se cuentan en la zona
+horaria del perfil, como las rachas.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from api.models import Declaration, MissionProgress, ModuleProgress, Profile, Streak
+from api.utils.catalog import get_catalog
+from api.utils.streaks import current_streak, user_timezone
+
+
+def _load_counters(user: User, tz, today, week_start, week_end) -> dict:
+    """
+    Contadores del usuario usados por las misiones globales, agregados en una
+    sola pasada por tabla.
+    """
+    def start_of(day):
+        return timezone.make_aware(datetime.combine(day, time.min), tz)
+
+    # Rangos sobre created_at/last_activity (usa el índice user, -created_at) en vez de __date
+    declarations_today = Declaration.objects.filter(user=user, created_at__gte=start_of(today)).count()
+    modules_unlocked_this_week = ModuleProgress.objects.filter(
+        user=user,
+        state='unlocked',
+        last_activity__gte=start_of(week_start),
+        last_activity__lt=start_of(week_end + timedelta(days=1)),
+        auto_unlocked=False
+    ).count()
+    return {
+        'declarations_today': declarations_today,
+        'modules_unlocked_this_week': modules_unlocked_this_week,
+    }
+
+
+def _global_progress(mission, counters: dict, get_streak):
+    """
+    Devuelve (progress, completed) para una misión global según su frecuencia.
+    """
+    title = mission.title.lower()
+    if mission.frequency == "daily":
+        current = counters['declarations_today']
+        return {
+            "current": current,
+            "target": 1,
+            "label": f"{current}/1 declaraciones hoy"
+        }, current >= 1
+    if mission.frequency == "weekly" and "racha" in title:
+        # Racha global vigente del usuario (0 si ya se cortó)
+        current = get_streak()
+        return {
+            "current": current,
+            "target": 5,
+            "label": f"{current}/5 días de racha consecutiva"
+        }, current >= 5
+    if mission.frequency == "weekly" and "desbloquea" in title:
+        current = counters['modules_unlocked_this_week']
+        return {
+            "current": current,
+            "target": 1,
+            "label": f"{current}/1 módulos desbloqueados esta semana"
+        }, current >= 1
+    return None, False
+
+
+def build_mission_board(user: User) -> list:
+    """
+    Devuelve la lista de misiones globales y de módulos con el estado del usuario.
+    Las misiones salen del catálogo en memoria; las consultas son constantes:
+    zona horaria del perfil, progreso del usuario, módulos desbloqueados,
+    contadores y, solo si hace falta, la racha global.
+    """
+    tz = user_timezone(Profile.objects.filter(user=user).values_list('timezone', flat=True).first())
+    today = timezone.localdate(timezone.now(), tz)
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=6)
+
+    missions = get_catalog().missions
+    progress_by_mission = {
+        mp.mission_id: mp
+        for mp in MissionProgress.objects.filter(user=user)
+    }
+    unlocked_modules = set(ModuleProgress.objects.filter(
+        user=user,
+        state='unlocked'
+    ).values_list('module_id', flat=True))
+    counters = _load_counters(user, tz, today, week_start, week_end)
+
+    streak_cache = []
+
+    def get_streak():
+        if not streak_cache:
+            streak = Streak.objects.filter(user=user, module__isnull=True).first()
+            streak_cache.append(current_streak(streak, today) if streak else 0)
+        return streak_cache[0]
+
+    global_items = []
+    module_items = []
+    for mission in missions:
+        mp = progress_by_mission.get(mission.id)
+        item = {
+            "id": str(mission.id),
+            "title": mission.title,
+            "description": mission.description,
+            "xp_reward": mission.xp_reward,
+            "frequency": mission.frequency,
+            "requirements": list(mission.requirements),
+        }
+        if mission.module_id is None:
+            state = mp.state if mp else "active"
+            progress, completed = _global_progress(mission, counters, get_streak)
+            if completed:
+                state = "completed"
+            item.update({"type": "global", "state": state, "progress": progress})
+            target = global_items
+        else:
+            # Si el módulo está desbloqueado, usar el estado real; si no, marcar como "blocked"
+            if mission.module_id in unlocked_modules:
+                state = mp.state if mp else "active"
+            else:
+                state = "blocked"
+            item.update({
+                "type": "module",
+                "module_id": str(mission.module_id),
+                "state": state,
+                "progress": None,
+            })
+            target = module_items
+        item["started_at"] = mp.started_at if mp else None
+        item["completed_at"] = mp.completed_at if mp else None
+        target.append(item)
+
+    return global_items + module_items
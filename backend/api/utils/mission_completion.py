@@ -0,0 +1,162 @@
+"""
+Completado idempotente de misiones.
+La transición active -> completed se hace con un UPDATE condicional
+(`WHERE state='active'`): solo una petición concurrente gana y solo esa otorga
+XP y actualiza la racha. Las respuestas se guardan en la tabla
+MissionCompletionReceipt bajo una clave de idempotencia única por usuario (la
+cabecera `Idempotency-Key` o, si falta, misión + periodo), así que un reintento
+devuelve el mismo resultado aunque lo atienda otro worker.
+"""
+
+import hashlib
+from datetime import timedelta
+from uuid import UUID
+
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import MissionCompletionReceipt, MissionProgress, ModuleProgress
+from api.utils import events
+from api.utils.catalog import get_catalog
+from api.utils.streaks import record_activity
+from api.utils.xp import award_xp, award_xp_entries
+
+IDEMPOTENCY_TTL = 60 * 60 * 24
+MAX_BATCH_SIZE = 100
+
+
+def completion_period(mission, now=None) -> str:
+    """Periodo al que pertenece una completación según la frecuencia de la misión."""
+    today = timezone.localdate(now or timezone.now())
+    if mission.frequency == 'daily':
+        return today.isoformat()
+    if mission.frequency == 'weekly':
+        year, week, _ = today.isocalendar()
+        return f"{year}-W{week:02d}"
+    return 'once'
+
+
+def completion_key(mission, idempotency_key=None) -> str:
+    """Clave de idempotencia de una completación; las cabeceras demasiado largas se resumen."""
+    if not idempotency_key:
+        return f"{mission.id}:{completion_period(mission)}"
+    max_length = MissionCompletionReceipt._meta.get_field('key').max_length
+    if len(idempotency_key) > max_length:
+        return hashlib.sha256(idempotency_key.encode('utf-8')).hexdigest()
+    return idempotency_key
+
+
+def stored_response(user, key):
+    """Respuesta guardada para la clave, o None si no hay o ya expiró."""
+    return MissionCompletionReceipt.objects.filter(
+        user=user, key=key, created_at__gte=timezone.now() - timedelta(seconds=IDEMPOTENCY_TTL)
+    ).values_list('response', flat=True).first()
+
+
+def store_response(user, key, response):
+    """
+    Guarda la respuesta bajo la clave y devuelve la que quedó guardada: si una
+    petición concurrente con la misma clave ganó la inserción, la suya.
+    """
+    receipts = MissionCompletionReceipt.objects.filter(user=user)
+    receipts.filter(created_at__lt=timezone.now() - timedelta(seconds=IDEMPOTENCY_TTL)).delete()
+    receipts.bulk_create(
+        [MissionCompletionReceipt(user=user, key=key, response=response)], ignore_conflicts=True
+    )
+    return receipts.filter(key=key).values_list('response', flat=True).get()
+
+
+def complete_mission(user, mission):
+    """
+    Completa la misión para el usuario. Devuelve (progress, completed_now);
+    completed_now es False si otra petición ya la había completado.
+    """
+    with transaction.atomic():
+        progress, _ = MissionProgress.objects.get_or_create(user=user, mission=mission)
+        now = timezone.now()
+        won = MissionProgress.objects.filter(pk=progress.pk, state='active').update(
+            state='completed', completed_at=now
+        )
+        if not won:
+            progress.refresh_from_db(fields=['state', 'completed_at'])
+            return progress, False
+        progress.state = 'completed'
+        progress.completed_at = now
+        events.emit(events.MISSION_COMPLETED, user.pk, mission_ids=[str(mission.id)])
+        award_xp(user, mission.xp_reward, 'mission', str(mission.id))
+        record_activity(user, mission.module_id)
+    return progress, True
+
+
+def complete_missions_batch(user, mission_ids) -> list:
+    """
+    Completa varias misiones en una sola transacción (clientes que se reconectan
+    con una cola de completaciones). Valida todas contra los módulos desbloqueados
+    con una consulta, aplica un único UPDATE de XP y una actualización de racha por
+    módulo. Devuelve un resultado por id, en el orden recibido:
+    {"mission_id", "status", "xp_awarded"} con status en completed,
+    already_completed, failed, locked, not_found o invalid.
+    """
+    catalog = get_catalog()
+    results, candidates = [], {}
+    for raw_id in mission_ids:
+        result = {"mission_id": str(raw_id), "status": "invalid", "xp_awarded": 0}
+        results.append(result)
+        try:
+            mission_id = UUID(str(raw_id))
+        except ValueError:
+            continue
+        mission = catalog.missions_by_id.get(mission_id)
+        result["status"] = "not_found" if mission is None else "locked"
+        if mission is not None:
+            candidates.setdefault(mission_id, (mission, []))[1].append(result)
+
+    module_states = dict(ModuleProgress.objects.filter(
+        user=user, module_id__in={m.module_id for m, _ in candidates.values() if m.module_id}
+    ).values_list('module_id', 'state'))
+    allowed = {
+        mission_id: entry for mission_id, entry in candidates.items()
+        if entry[0].module_id and module_states.get(entry[0].module_id, 'locked') != 'locked'
+    }
+    if not allowed:
+        return results
+
+    now = timezone.now()
+    with transaction.atomic():
+        MissionProgress.objects.bulk_create(
+            [MissionProgress(user=user, mission_id=mission_id) for mission_id in allowed],
+            ignore_conflicts=True,
+        )
+        rows = list(MissionProgress.objects.select_for_update().filter(
+            user=user, mission_id__in=list(allowed)
+        ).values_list('id', 'mission_id', 'state'))
+        states = {mission_id: state for _, mission_id, state in rows}
+        winners = {mission_id: progress_id for progress_id, mission_id, state in rows if state == 'active'}
+        if winners:
+            updated = MissionProgress.objects.filter(id__in=winners.values(), state='active').update(
+                state='completed', completed_at=now
+            )
+            if updated != len(winners):
+                # Sin bloqueo de filas (SQLite) otra petición pudo completar alguna entre la
+                # lectura y el UPDATE: solo ganan las filas que este UPDATE marcó
+                winners = dict(MissionProgress.objects.filter(
+                    id__in=winners.values(), state='completed', completed_at=now
+                ).values_list('mission_id', 'id'))
+
+        for mission_id, (mission, mission_results) in allowed.items():
+            won = mission_id in winners
+            for index, result in enumerate(mission_results):
+                # Un id repetido en el lote solo cuenta una vez
+                if won and index == 0:
+                    result["status"] = "completed"
+                    result["xp_awarded"] = mission.xp_reward
+                else:
+                    result["status"] = "failed" if states.get(mission_id) == 'failed' else "already_completed"
+
+        if winners:
+            won_missions = [allowed[mission_id][0] for mission_id in winners]
+            events.emit(events.MISSION_COMPLETED, user.pk, mission_ids=[str(m.id) for m in won_missions])
+            award_xp_entries(user, [(m.xp_reward, 'mission', str(m.id)) for m in won_missions])
+            for module_id in sorted({m.module_id for m in won_missions}):
+                record_activity(user, module_id)
+    return results
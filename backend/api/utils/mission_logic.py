@@ -1,35 +1,107 @@
-from api.models import Mission, MissionProgress, ModuleProgress, Declaration
+"""
+Evaluación de requisitos de misiones.
+Los requisitos JSON de `Mission.requirements` se compilan una sola vez por
+versión del catálogo en un grafo de dependencias; cada evaluación precarga el
+estado del usuario y resuelve todas las misiones del módulo en memoria.
+"""
+
+from graphlib import CycleError, TopologicalSorter
+
+from django.utils import timezone
+
+from api.models import MissionProgress, ModuleProgress, Declaration
+from api.utils import events
+from api.utils.catalog import get_catalog
+
+_compiled = None  # (versión del catálogo, {module_id: [MissionEntry, ...]})
+
+
+def is_satisfied(mission, completed, unlocked_modules, pillars) -> bool:
+    """Indica si la misión del catálogo cumple todos sus requisitos."""
+    return (
+        mission.required_missions <= completed
+        and mission.required_modules <= unlocked_modules
+        and mission.required_pillars <= pillars
+    )
+
+
+def compile_requirements(missions) -> dict:
+    """
+    Agrupa las misiones por módulo en orden topológico, de modo que una misión
+    que depende de otra del mismo módulo se evalúa después de ella.
+    """
+    by_id = {m.id: m for m in missions}
+    graph = TopologicalSorter()
+    for mission in missions:
+        graph.add(mission.id, *(dep for dep in mission.required_missions if dep in by_id))
+    try:
+        order = list(graph.static_order())
+    except CycleError:
+        order = [m.id for m in missions]
+    compiled = {}
+    for mission_id in order:
+        mission = by_id[mission_id]
+        compiled.setdefault(mission.module_id, []).append(mission)
+    return compiled
+
+
+def get_compiled_requirements() -> dict:
+    """Devuelve el grafo compilado, recompilándolo solo si cambió el catálogo."""
+    global _compiled
+    catalog = get_catalog()
+    if _compiled is None or _compiled[0] != catalog.version:
+        _compiled = (catalog.version, compile_requirements(catalog.missions))
+    return _compiled[1]
+
 
 def check_and_complete_missions(user, module, pillar=None):
     """
     Evalúa y completa las misiones del módulo para el usuario según requisitos.
     Si la misión requiere un pilar, solo se completa si hay declaración en ese pilar.
+    Devuelve los ids de las misiones completadas en esta llamada.
     """
-    module_missions = Mission.objects.filter(module=module)
+    module_missions = get_compiled_requirements().get(module.pk, [])
+    if not module_missions:
+        return []
+
+    progress = {}
+    completed = set()
+    for mp_id, mission_id, state in MissionProgress.objects.filter(user=user).values_list('id', 'mission_id', 'state'):
+        progress[mission_id] = (mp_id, state)
+        if state == "completed":
+            completed.add(mission_id)
+    unlocked_modules = set(ModuleProgress.objects.filter(
+        user=user, state="unlocked"
+    ).values_list('module_id', flat=True))
+    pillars = set(Declaration.objects.filter(
+        user=user, module=module
+    ).values_list('pillar', flat=True).distinct())
+
+    to_create, to_update, newly_completed = [], [], []
     for mission in module_missions:
-        requisitos = getattr(mission, "requirements", [])
-        cumple_requisitos = True
-        for req in requisitos:
-            if req.get("type") == "mission":
-                prev_mission_id = req.get("id")
-                prev_mp = MissionProgress.objects.filter(user=user, mission_id=prev_mission_id, state="completed").first()
-                if not prev_mp:
-                    cumple_requisitos = False
-                    break
-            if req.get("type") == "module":
-                mod_id = req.get("id")
-                mod_prog = ModuleProgress.objects.filter(user=user, module_id=mod_id, state="unlocked").first()
-                if not mod_prog:
-                    cumple_requisitos = False
-                    break
-            if req.get("type") == "pillar":
-                pillar_id = req.get("id")
-                decl = Declaration.objects.filter(user=user, module=module, pillar=pillar_id).exists()
-                if not decl:
-                    cumple_requisitos = False
-                    break
-        if cumple_requisitos:
-            mp, created = MissionProgress.objects.get_or_create(user=user, mission=mission)
-            if mp.state != "completed":
-                mp.complete()
-                mp.save()
+        if mission.id in completed or not is_satisfied(mission, completed, unlocked_modules, pillars):
+            continue
+        existing = progress.get(mission.id)
+        if existing is None:
+            to_create.append(mission.id)
+        elif existing[1] == "active":
+            to_update.append(existing[0])
+        else:
+            continue
+        completed.add(mission.id)
+        newly_completed.append(mission.id)
+
+    now = timezone.now()
+    if to_create:
+        MissionProgress.objects.bulk_create(
+            [MissionProgress(user=user, mission_id=mission_id, state="completed", completed_at=now)
+             for mission_id in to_create],
+            ignore_conflicts=True,
+        )
+    if to_update:
+        MissionProgress.objects.filter(id__in=to_update, state="active").update(
+            state="completed", completed_at=now
+        )
+    if newly_completed:
+        events.emit(events.MISSION_COMPLETED, user.pk, mission_ids=[str(m) for m in newly_completed])
+    return newly_completed
@@ -0,0 +1,162 @@
+"""
+Servicio de desbloqueo de módulos basado en la tabla `ModuleUnlockRule`
+(leída desde el catálogo en memoria).
+Evalúa todos los módulos de un usuario contra una única foto precargada de su
+estado y persiste solo los cambios, en bloque.
+"""
+
+import hashlib
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from api.models import MissionProgress, Module, ModuleProgress, Profile
+from api.utils import events
+from api.utils.catalog import get_catalog
+
+DEFAULT_XP_MESSAGE = "Necesitas al menos {xp} XP para desbloquear este módulo."
+DEFAULT_MISSION_MESSAGE = "Debes completar la misión requerida para desbloquear este módulo."
+
+
+class UnlockSnapshot:
+    """Estado del usuario y catálogo de reglas necesarios para evaluar desbloqueos."""
+    __slots__ = ('user', 'profile', 'experience_points', 'completed_missions', 'catalog', 'modules')
+
+    def __init__(self, user, profile, completed_missions, catalog):
+        self.user = user
+        self.profile = profile
+        self.experience_points = profile.experience_points
+        self.completed_missions = completed_missions
+        self.catalog = catalog
+        self.modules = catalog.modules
+
+    @classmethod
+    def load(cls, user: User) -> "UnlockSnapshot":
+        profile = Profile.objects.get(user=user)
+        completed = frozenset(MissionProgress.objects.filter(
+            user=user, state='completed'
+        ).values_list('mission_id', flat=True))
+        return cls(user, profile, completed, get_catalog())
+
+    def fingerprint(self) -> str:
+        """Huella de XP, misiones completadas y catálogo; si no cambia, no hay nada que sincronizar."""
+        parts = [str(self.catalog.version), str(self.experience_points)]
+        parts.extend(sorted(str(mission_id) for mission_id in self.completed_missions))
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def check_unlock(module, snapshot: UnlockSnapshot):
+    """
+    Devuelve (puede_desbloquear, mensaje_de_error) para el módulo del catálogo.
+    """
+    rules = module.unlock_rules
+    if not rules:
+        if snapshot.experience_points >= module.xp_required:
+            return True, ""
+        return False, DEFAULT_XP_MESSAGE.format(xp=module.xp_required, module=module.name)
+    for rule in rules:
+        min_xp = module.xp_required if rule.min_xp is None else rule.min_xp
+        if snapshot.experience_points < min_xp:
+            return False, (rule.message or DEFAULT_XP_MESSAGE).format(xp=min_xp, module=module.name)
+        if rule.required_mission_id and rule.required_mission_id not in snapshot.completed_missions:
+            return False, (rule.message or DEFAULT_MISSION_MESSAGE).format(xp=min_xp, module=module.name)
+    return True, ""
+
+
+def _unlock_rows(progress_ids) -> int:
+    """Pasa a 'unlocked' las filas aún bloqueadas con un único UPDATE condicional."""
+    if not progress_ids:
+        return 0
+    return ModuleProgress.objects.filter(id__in=progress_ids).apply_transition('locked', 'unlocked')
+
+
+def unlock_module_for_users(module_id, user_ids) -> list:
+    """
+    Desbloquea un módulo para muchos usuarios sin evaluar requisitos: un INSERT
+    de las filas que faltan (bloqueadas), la lectura con bloqueo de las filas
+    bloqueadas y un UPDATE de esas filas. Emite MODULE_UNLOCKED solo por los
+    usuarios que esta llamada desbloqueó (no por los que desbloqueó otra
+    escritura concurrente) y devuelve sus ids.
+    """
+    user_ids = set(user_ids)
+    with transaction.atomic():
+        ModuleProgress.objects.bulk_create([
+            ModuleProgress(user_id=user_id, module_id=module_id, state='locked') for user_id in user_ids
+        ], ignore_conflicts=True)
+        locked = list(ModuleProgress.objects.select_for_update().filter(
+            module_id=module_id, user_id__in=user_ids, state='locked'
+        ).values_list('user_id', flat=True))
+        if locked:
+            ModuleProgress.objects.filter(module_id=module_id, user_id__in=locked).apply_transition('locked', 'unlocked')
+    unlocked = sorted(locked)
+    events.emit_many(events.MODULE_UNLOCKED, unlocked, module_ids=[module_id])
+    return unlocked
+
+
+def sync_module_unlocks(user: User) -> list:
+    """
+    Sincroniza el estado de desbloqueo de módulos según XP y requisitos.
+    Desbloquea automáticamente los módulos para los que el usuario cumple los requisitos
+    y devuelve sus ids. No hace nada si la XP y las misiones completadas no cambiaron
+    desde la última sincronización.
+    """
+    snapshot = UnlockSnapshot.load(user)
+    fingerprint = snapshot.fingerprint()
+    if snapshot.profile.unlock_fingerprint == fingerprint:
+        return []
+
+    progress = {
+        module_id: (progress_id, state)
+        for module_id, progress_id, state in ModuleProgress.objects.filter(
+            user=user
+        ).values_list('module_id', 'id', 'state')
+    }
+    to_create, to_unlock, unlocked = [], [], []
+    for module in snapshot.modules:
+        existing = progress.get(module.id)
+        if existing is not None and existing[1] != 'locked':
+            continue
+        can_unlock, _ = check_unlock(module, snapshot)
+        if existing is None:
+            to_create.append(ModuleProgress(
+                user=user, module_id=module.id, state='unlocked' if can_unlock else 'locked'
+            ))
+        elif can_unlock:
+            to_unlock.append(existing[0])
+        if can_unlock:
+            unlocked.append(module.id)
+
+    if to_create:
+        ModuleProgress.objects.bulk_create(to_create, ignore_conflicts=True)
+    _unlock_rows(to_unlock)
+    Profile.objects.filter(pk=snapshot.profile.pk).update(unlock_fingerprint=fingerprint)
+    if unlocked:
+        events.emit(events.MODULE_UNLOCKED, user.pk, module_ids=unlocked)
+    return unlocked
+
+
+def unlock_module(user: User, module: Module):
+    """
+    Desbloqueo manual de un módulo. Devuelve (progress, None) si se cumplen los
+    requisitos o (None, mensaje_de_error) si no.
+    """
+    snapshot = UnlockSnapshot.load(user)
+    entry = snapshot.catalog.modules_by_id.get(module.pk)
+    if entry is None:
+        return None, "No cumples los requisitos para desbloquear este módulo."
+    can_unlock, error_msg = check_unlock(entry, snapshot)
+    if not can_unlock:
+        return None, error_msg or "No cumples los requisitos para desbloquear este módulo."
+    progress, created = ModuleProgress.objects.get_or_create(
+        user=user, module=module, defaults={'state': 'unlocked'}
+    )
+    if created or (progress.state == 'locked' and progress.save_transition('unlock')):
+        events.emit(events.MODULE_UNLOCKED, user.pk, module_ids=[module.pk])
+    return progress, None
+
+
+@events.subscribe(events.XP_CHANGED)
+@events.subscribe(events.MISSION_COMPLETED)
+def _sync_on_progress_change(user_id, **payload):
+    """Los desbloqueos se recalculan en escritura, no en cada lectura."""
+    sync_module_unlocks(User(pk=user_id))
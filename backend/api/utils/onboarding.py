@@ -0,0 +1,82 @@
+"""
+Alta de usuarios: perfil y primer módulo desbloqueado.
+- `provision_user` es el camino de un registro individual (señal post_save de
+  User): dos INSERT, con el primer módulo leído del catálogo en memoria.
+- `onboard_users` da de alta una cohorte completa (p. ej. un colegio) con
+  `bulk_create` por bloques: usuarios, perfiles y ModuleProgress en unas pocas
+  sentencias. `bulk_create` no emite post_save, así que no hay cascada por fila.
+"""
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from api.models import ModuleProgress, Profile
+from api.utils.catalog import get_catalog
+
+ONBOARDING_BATCH_SIZE = 1000
+
+
+def _first_module_progress(user_ids, module):
+    if module is None:
+        return []
+    return [
+        ModuleProgress(user_id=user_id, module_id=module.id, state='unlocked', auto_unlocked=True)
+        for user_id in user_ids
+    ]
+
+
+def provision_user(user: User) -> None:
+    """Crea el perfil y deja desbloqueado el primer módulo (orden 1) de un usuario nuevo."""
+    Profile.objects.create(user=user)
+    ModuleProgress.objects.bulk_create(
+        _first_module_progress([user.pk], get_catalog().first_module()), ignore_conflicts=True
+    )
+
+
+def onboard_users(rows, batch_size=ONBOARDING_BATCH_SIZE) -> dict:
+    """
+    Da de alta en bloque los usuarios de `rows` (dicts con username y,
+    opcionalmente, email, password, first_name y last_name). Sin password la
+    cuenta queda con contraseña inutilizable hasta que el usuario la restablezca.
+    Los usernames que ya existen (o repetidos en `rows`) se omiten.
+    Devuelve {"created": [...], "skipped": [...]}.
+    """
+    rows = list(rows)
+    usernames = [row['username'] for row in rows]
+    existing = set()
+    for start in range(0, len(usernames), batch_size):
+        existing.update(User.objects.filter(
+            username__in=usernames[start:start + batch_size]
+        ).values_list('username', flat=True))
+
+    users, skipped, seen = [], [], set(existing)
+    for row in rows:
+        if row['username'] in seen:
+            skipped.append(row['username'])
+            continue
+        seen.add(row['username'])
+        users.append(User(
+            username=row['username'],
+            email=row.get('email') or '',
+            first_name=row.get('first_name') or '',
+            last_name=row.get('last_name') or '',
+            password=make_password(row.get('password') or None),
+        ))
+
+    created = []
+    first_module = get_catalog().first_module()
+    with transaction.atomic():
+        for start in range(0, len(users), batch_size):
+            chunk = users[start:start + batch_size]
+            User.objects.bulk_create(chunk)
+            user_ids = [user.pk for user in chunk]
+            if None in user_ids:
+                # El motor no devuelve los ids de bulk_create: se leen por username
+                user_ids = list(User.objects.filter(
+                    username__in=[user.username for user in chunk]
+                ).values_list('pk', flat=True))
+            Profile.objects.bulk_create([Profile(user_id=user_id) for user_id in user_ids])
+            ModuleProgress.objects.bulk_create(_first_module_progress(user_ids, first_module))
+            created.extend(user.username for user in chunk)
+    return {"created": created, "skipped": skipped}
@@ -0,0 +1,137 @@
+"""
+Cobertura de pilares por usuario y módulo (desbloqueo secuencial de constelaciones).
+Cada módulo guarda en `PillarCoverage.mask` un bit por pilar con al menos una
+declaración. La máscara se actualiza de forma incremental al crear, mover (cambio
+de pilar o módulo) o borrar declaraciones y el siguiente módulo se desbloquea solo en la transición a
+"los cuatro pilares cubiertos". Las coberturas que ya estaban completas antes
+de esa lógica (backfill de la migración 0016) se desbloquean con
+`unlock_covered_modules` (comando `unlock_covered_modules`).
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from api.models import Declaration, ModuleProgress, PillarCoverage
+from api.utils import events
+from api.utils.catalog import get_catalog
+from api.utils.module_unlocks import unlock_module_for_users
+
+logger = logging.getLogger(__name__)
+
+PILLAR_BITS = {pillar: 1 << index for index, (pillar, _) in enumerate(Declaration.PILLAR_CHOICES)}
+FULL_MASK = sum(PILLAR_BITS.values())
+
+
+def pillars_mask(pillars) -> int:
+    mask = 0
+    for pillar in pillars:
+        mask |= PILLAR_BITS.get(pillar, 0)
+    return mask
+
+
+def _locked_coverage(user_id, module_id) -> PillarCoverage:
+    coverage = PillarCoverage.objects.select_for_update().filter(user_id=user_id, module_id=module_id).first()
+    if coverage is None:
+        PillarCoverage.objects.bulk_create(
+            [PillarCoverage(user_id=user_id, module_id=module_id)], ignore_conflicts=True
+        )
+        coverage = PillarCoverage.objects.select_for_update().get(user_id=user_id, module_id=module_id)
+    return coverage
+
+
+def record_pillars(user_id, module_id, pillars) -> bool:
+    """
+    Marca los pilares como cubiertos. Devuelve True si con ellos el módulo pasa a
+    tener los cuatro pilares (y en ese caso desbloquea el siguiente módulo).
+    """
+    bits = pillars_mask(pillars)
+    if not bits:
+        return False
+    with transaction.atomic():
+        coverage = _locked_coverage(user_id, module_id)
+        mask = coverage.mask | bits
+        if mask == coverage.mask:
+            return False
+        PillarCoverage.objects.filter(pk=coverage.pk).update(mask=mask)
+        if mask != FULL_MASK:
+            return False
+        unlock_next_module(user_id, module_id)
+    return True
+
+
+def clear_pillar(user_id, module_id, pillar) -> None:
+    """Quita el bit del pilar si ya no queda ninguna declaración en él."""
+    bit = PILLAR_BITS.get(pillar, 0)
+    if not bit or Declaration.objects.filter(user_id=user_id, module_id=module_id, pillar=pillar).exists():
+        return
+    PillarCoverage.objects.filter(user_id=user_id, module_id=module_id).update(mask=F('mask').bitand(FULL_MASK & ~bit))
+
+
+def unlock_next_module(user_id, module_id):
+    """Desbloquea el siguiente módulo por orden según el catálogo en memoria."""
+    next_module = get_catalog().next_module(module_id)
+    if next_module is None:
+        logger.debug("No hay módulo después de %s", module_id)
+        return None
+    progress, created = ModuleProgress.objects.get_or_create(
+        user_id=user_id, module_id=next_module.id, defaults={'state': 'unlocked'}
+    )
+    if created or (progress.state == 'locked' and progress.save_transition('unlock')):
+        events.emit(events.MODULE_UNLOCKED, user_id, module_ids=[next_module.id])
+        logger.debug("Módulo %s desbloqueado para el usuario %s", next_module.id, user_id)
+    return progress
+
+
+def unlock_covered_modules(chunk_size=1000) -> int:
+    """
+    Desbloquea el siguiente módulo a todos los usuarios con los cuatro pilares
+    de un módulo cubiertos y ese siguiente módulo aún bloqueado (o sin fila).
+    Es idempotente; devuelve cuántos desbloqueos hizo.
+    """
+    catalog = get_catalog()
+    covered = {}
+    rows = PillarCoverage.objects.filter(mask=FULL_MASK).values_list('module_id', 'user_id')
+    for module_id, user_id in rows.iterator(chunk_size=chunk_size):
+        covered.setdefault(module_id, []).append(user_id)
+    total = 0
+    for module_id, user_ids in covered.items():
+        next_module = catalog.next_module(module_id)
+        if next_module is None:
+            continue
+        for start in range(0, len(user_ids), chunk_size):
+            total += len(unlock_module_for_users(next_module.id, user_ids[start:start + chunk_size]))
+    return total
+
+
+def _on_declaration_saving(sender, instance, update_fields=None, **kwargs):
+    # Pilar y módulo previos de una declaración existente, para mover su bit en post_save
+    if instance.pk is None or (update_fields is not None and not {'pillar', 'module'} & set(update_fields)):
+        return
+    instance._pillar_origin = Declaration.objects.filter(pk=instance.pk).values_list(
+        'user_id', 'module_id', 'pillar'
+    ).first()
+
+
+def _on_declaration_saved(sender, instance, created, **kwargs):
+    origin = instance.__dict__.pop('_pillar_origin', None)
+    current = (instance.user_id, instance.module_id, instance.pillar)
+    if created or origin is None:
+        if created:
+            record_pillars(instance.user_id, instance.module_id, [instance.pillar])
+        return
+    if origin != current:
+        with transaction.atomic():
+            clear_pillar(*origin)
+            record_pillars(instance.user_id, instance.module_id, [instance.pillar])
+
+
+def _on_declaration_deleted(sender, instance, **kwargs):
+    clear_pillar(instance.user_id, instance.module_id, instance.pillar)
+
+
+pre_save.connect(_on_declaration_saving, sender=Declaration, dispatch_uid='pillar-coverage-pre-save')
+post_save.connect(_on_declaration_saved, sender=Declaration, dispatch_uid='pillar-coverage-save')
+post_delete.connect(_on_declaration_deleted, sender=Declaration, dispatch_uid='pillar-coverage-delete')
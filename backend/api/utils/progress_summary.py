@@ -0,0 +1,177 @@
+"""
+Resumen materializado de progreso por usuario (`UserProgressSummary`).
+Las rutas de escritura emiten eventos de dominio y aquí se recalcula solo la
+parte del resumen que cada evento puede cambiar, con una consulta acotada al
+usuario. Recalcular (en vez de sumar deltas) hace que los manejadores sean
+idempotentes, como exige el modo 'queue'. /progress/overview/ lee una sola fila.
+Las rachas se guardan con su último día activo ({"streak", "last_active_date"})
+y el corte por inactividad se aplica al leer (`streaks_on`), porque una racha
+se pierde con el paso de los días sin que ocurra ninguna escritura.
+"""
+
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db.models import Count, F
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from api.models import MissionProgress, ModuleProgress, Profile, Streak, UserAchievement, UserProgressSummary
+from api.utils import events
+from api.utils.streaks import GLOBAL_STREAK_KEY, current_streak, local_date
+
+REBUILD_CHUNK_SIZE = 1000
+
+XP = 'xp'
+MISSIONS = 'missions'
+MODULES = 'modules'
+ACHIEVEMENTS = 'achievements'
+STREAKS = 'streaks'
+ALL_PARTS = (XP, MISSIONS, MODULES, ACHIEVEMENTS, STREAKS)
+
+SUMMARY_FIELDS = (
+    'total_xp', 'level', 'modules_unlocked', 'missions_completed', 'achievements_earned', 'current_streaks',
+)
+
+
+def _counts(queryset, user_ids):
+    return dict(queryset.filter(user_id__in=user_ids).values('user_id').annotate(
+        total=Count('id')
+    ).values_list('user_id', 'total'))
+
+
+def compute_summaries(user_ids, parts=ALL_PARTS) -> dict:
+    """Calcula desde las tablas origen {user_id: {campo: valor}} para las partes pedidas."""
+    values = {user_id: {} for user_id in user_ids}
+    if XP in parts:
+        profiles = Profile.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'experience_points', 'current_level'
+        )
+        for user_id, points, level in profiles:
+            values[user_id].update(total_xp=points, level=level)
+    if MISSIONS in parts:
+        counts = _counts(MissionProgress.objects.filter(state='completed'), user_ids)
+        for user_id in user_ids:
+            values[user_id]['missions_completed'] = counts.get(user_id, 0)
+    if MODULES in parts:
+        counts = _counts(ModuleProgress.objects.filter(state='unlocked'), user_ids)
+        for user_id in user_ids:
+            values[user_id]['modules_unlocked'] = counts.get(user_id, 0)
+    if ACHIEVEMENTS in parts:
+        counts = _counts(UserAchievement.objects.all(), user_ids)
+        for user_id in user_ids:
+            values[user_id]['achievements_earned'] = counts.get(user_id, 0)
+    if STREAKS in parts:
+        for user_id in user_ids:
+            values[user_id]['current_streaks'] = {}
+        streaks = Streak.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'module_id', 'current_streak', 'last_active_date'
+        )
+        for user_id, module_id, current, last_active in streaks:
+            values[user_id]['current_streaks'][module_id or GLOBAL_STREAK_KEY] = {
+                "streak": current,
+                "last_active_date": last_active.isoformat() if last_active else None,
+            }
+    return values
+
+
+def streaks_on(stored, today) -> dict:
+    """Rachas vigentes {clave: días} el día `today`, como `streaks.current_streak`."""
+    streaks = {}
+    for key, entry in stored.items():
+        last_active = entry.get("last_active_date")
+        streak = Streak(
+            current_streak=entry.get("streak", 0),
+            last_active_date=date.fromisoformat(last_active) if last_active else None,
+        )
+        streaks[key] = current_streak(streak, today)
+    return streaks
+
+
+def rebuild_summaries(user_ids) -> int:
+    """Recalcula por completo los resúmenes de los usuarios, en bloques con upsert."""
+    user_ids = list(user_ids)
+    total = 0
+    for start in range(0, len(user_ids), REBUILD_CHUNK_SIZE):
+        # Un evento puede llegar después de que se borrara el usuario
+        chunk = list(User.objects.filter(pk__in=user_ids[start:start + REBUILD_CHUNK_SIZE]).values_list('pk', flat=True))
+        now = timezone.now()
+        rows = [
+            UserProgressSummary(user_id=user_id, updated_at=now, **values)
+            for user_id, values in compute_summaries(chunk).items()
+        ]
+        UserProgressSummary.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['user'], update_fields=[*SUMMARY_FIELDS, 'updated_at'],
+        )
+        total += len(rows)
+    return total
+
+
+def verify_summaries(user_ids) -> list:
+    """Devuelve los ids cuyo resumen guardado falta o no coincide con las tablas origen."""
+    user_ids = list(user_ids)
+    stale = []
+    for start in range(0, len(user_ids), REBUILD_CHUNK_SIZE):
+        chunk = user_ids[start:start + REBUILD_CHUNK_SIZE]
+        stored = {
+            row['user_id']: row
+            for row in UserProgressSummary.objects.filter(user_id__in=chunk).values('user_id', *SUMMARY_FIELDS)
+        }
+        for user_id, values in compute_summaries(chunk).items():
+            row = stored.get(user_id)
+            if row is None or any(row[field] != value for field, value in values.items()):
+                stale.append(user_id)
+    return stale
+
+
+def refresh_summary(user_id, *parts) -> None:
+    """Recalcula las partes indicadas; si el usuario aún no tiene resumen, lo crea completo."""
+    values = compute_summaries([user_id], parts)[user_id]
+    if UserProgressSummary.objects.filter(pk=user_id).update(updated_at=timezone.now(), **values):
+        return
+    rebuild_summaries([user_id])
+
+
+def get_summary(user) -> UserProgressSummary:
+    """Fila del resumen con `today`, el día local del usuario (para `streaks_on`)."""
+    summaries = UserProgressSummary.objects.annotate(tz_name=F('user__profile__timezone'))
+    summary = summaries.filter(pk=user.pk).first()
+    if summary is None:
+        rebuild_summaries([user.pk])
+        summary = summaries.get(pk=user.pk)
+    summary.today = local_date(summary.tz_name)
+    return summary
+
+
+@events.subscribe(events.XP_CHANGED)
+def _on_xp_changed(user_id, **payload):
+    refresh_summary(user_id, XP)
+
+
+@events.subscribe(events.MISSION_COMPLETED)
+def _on_mission_completed(user_id, **payload):
+    refresh_summary(user_id, MISSIONS)
+
+
+@events.subscribe(events.MODULE_UNLOCKED)
+def _on_module_unlocked(user_id, **payload):
+    refresh_summary(user_id, MODULES)
+
+
+@events.subscribe(events.ACHIEVEMENT_EARNED)
+def _on_achievement_earned(user_id, **payload):
+    refresh_summary(user_id, ACHIEVEMENTS)
+
+
+@events.subscribe(events.STREAK_CHANGED)
+def _on_streak_changed(user_id, **payload):
+    refresh_summary(user_id, STREAKS)
+
+
+def _on_user_achievement_saved(sender, instance, created, **kwargs):
+    # Los logros se otorgan desde el admin o con loaddata; no hay otra ruta de escritura
+    if created:
+        events.emit(events.ACHIEVEMENT_EARNED, instance.user_id)
+
+
+post_save.connect(_on_user_achievement_saved, sender=UserAchievement, dispatch_uid='summary-achievement-save')
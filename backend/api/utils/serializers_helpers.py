@@ -5,6 +5,13 @@ Extrae lógica auxiliar y repetida para mantener serializers limpios y profesion
 
 from typing import Any, Optional
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
+
+# Clave de contexto de los serializers que embeben módulos (ModuleSerializer,
+# MissionSerializer, MissionProgressSerializer, StreakSerializer...). Su valor es
+# un dict {module_id: estado} del usuario autenticado; las vistas lo rellenan con
+# get_module_states(request) para que get_state no consulte la base por módulo.
+MODULE_STATES_CONTEXT_KEY = 'module_states'
 
 def get_title(profile) -> str:
     """Devuelve el título de nivel del perfil."""
@@ -29,20 +36,68 @@ def update_user_fields(user: User, user_data: dict) -> None:
 def get_state(module, context: dict) -> Any:
     """
     Devuelve el estado del módulo para el usuario autenticado en el contexto.
+    Si el contexto trae el mapa precargado de estados, no consulta la base de datos.
     """
-    user = context.get('request').user if context.get('request') else None
-    if user and user.is_authenticated:
-        from api.models import ModuleProgress
-        try:
-            progress = ModuleProgress.objects.get(user=user, module=module)
-            return progress.state
-        except ModuleProgress.DoesNotExist:
-            pass
+    module_states = context.get(MODULE_STATES_CONTEXT_KEY)
+    if module_states is None and context.get('request') is not None:
+        module_states = get_module_states(context['request'])
+    if module_states:
+        return module_states.get(module.pk, getattr(module, "state", None))
     return getattr(module, "state", None)
 
+def get_module_states(request) -> dict:
+    """
+    Devuelve el mapa {module_id: estado} del usuario de la petición.
+    Se carga con una única consulta y se guarda en la propia petición.
+    """
+    module_states = getattr(request, '_module_states', None)
+    if module_states is None:
+        user = getattr(request, 'user', None)
+        module_states = {}
+        if user and user.is_authenticated:
+            from api.models import ModuleProgress
+            module_states = dict(
+                ModuleProgress.objects.filter(user=user).values_list('module_id', 'state')
+            )
+        request._module_states = module_states
+    return module_states
+
+def get_module_states_context(request) -> dict:
+    """Contexto base para serializers que embeben módulos."""
+    return {'request': request, MODULE_STATES_CONTEXT_KEY: get_module_states(request)}
+
 def get_active_missions(user: User):
     """
     Devuelve los MissionProgress activos para un usuario.
     """
     from api.models import MissionProgress
     return MissionProgress.objects.filter(user=user, state='active').select_related('mission')
+
+def get_profile_queryset():
+    """
+    Plan de precarga del perfil para /auth/me/: una consulta por relación,
+    sin importar cuántos módulos, logros o misiones tenga el usuario.
+    """
+    from api.models import Profile, ModuleProgress, UserAchievement, Streak, MissionProgress
+    return Profile.objects.select_related('user').prefetch_related(
+        Prefetch(
+            'user__moduleprogress_set',
+            queryset=ModuleProgress.objects.select_related('module'),
+            to_attr='prefetched_module_progress',
+        ),
+        Prefetch(
+            'user__userachievement_set',
+            queryset=UserAchievement.objects.select_related('achievement'),
+            to_attr='prefetched_achievements',
+        ),
+        Prefetch(
+            'user__streak_set',
+            queryset=Streak.objects.select_related('module'),
+            to_attr='prefetched_streaks',
+        ),
+        Prefetch(
+            'user__missionprogress_set',
+            queryset=MissionProgress.objects.filter(state='active').select_related('mission__module'),
+            to_attr='prefetched_active_missions',
+        ),
+    )
@@ -0,0 +1,125 @@
+"""
+Motor de rachas.
+Cada racha (por módulo y la global, con module vacío) guarda el día local de su
+última actividad (`last_active_date`, en la zona horaria del perfil). Una
+actividad el mismo día no cambia nada; al día siguiente suma uno y tras un
+hueco vuelve a 1. Cada evento cuesta una lectura y, como mucho una vez al día,
+un UPDATE condicional por racha. El primer evento de cada día marca además el
+día en el mapa de actividad (api.utils.activity).
+"""
+
+from datetime import timedelta
+from uuid import UUID
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from api.models import MissionProgress, Profile, Streak
+from api.utils import events
+from api.utils.activity import mark_active
+from api.utils.catalog import get_catalog
+
+GLOBAL_STREAK_KEY = 'global'
+
+
+def user_timezone(name):
+    """Zona horaria del perfil o la del proyecto si está vacía o no es válida."""
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.get_default_timezone()
+
+
+def local_date(tz_name, when=None):
+    return timezone.localdate(when or timezone.now(), user_timezone(tz_name))
+
+
+def user_local_date(user_id, when=None):
+    """Día local del usuario según la zona horaria de su perfil (una consulta)."""
+    tz_name = Profile.objects.filter(user_id=user_id).values_list('timezone', flat=True).first()
+    return local_date(tz_name, when)
+
+
+def current_streak(streak, today) -> int:
+    """Racha vigente: se pierde si no hubo actividad ni hoy ni ayer."""
+    if streak is None or streak.last_active_date is None:
+        return 0
+    if streak.last_active_date >= today - timedelta(days=1):
+        return streak.current_streak
+    return 0
+
+
+def _global_streak_mission():
+    try:
+        mission_id = UUID(str(getattr(settings, 'GLOBAL_STREAK_MISSION_ID', '') or ''))
+    except ValueError:
+        return None
+    return get_catalog().missions_by_id.get(mission_id)
+
+
+def _complete_global_streak_mission(user_id, now) -> None:
+    mission = _global_streak_mission()
+    if mission is None:
+        return
+    progress, created = MissionProgress.objects.get_or_create(
+        user_id=user_id, mission_id=mission.id, defaults={'state': 'completed', 'completed_at': now}
+    )
+    won = created or (progress.state == 'active' and MissionProgress.objects.filter(
+        pk=progress.pk, state='active'
+    ).update(state='completed', completed_at=now))
+    if won:
+        events.emit(events.MISSION_COMPLETED, user_id, mission_ids=[str(mission.id)])
+
+
+def record_activity(user, module_id=None, when=None) -> dict:
+    """
+    Registra actividad del usuario en el módulo (y siempre en la racha global).
+    Devuelve {module_id o None: racha_actual} de las rachas que cambiaron.
+    """
+    now = when or timezone.now()
+    keys = [module_id, None] if module_id is not None else [None]
+    rows = {
+        streak.module_id: streak
+        for streak in Streak.objects.filter(user_id=user.pk).filter(
+            Q(module_id=module_id) | Q(module__isnull=True)
+        ).annotate(tz_name=F('user__profile__timezone'))
+    }
+    if rows:
+        today = local_date(next(iter(rows.values())).tz_name, now)
+    else:
+        today = user_local_date(user.pk, now)
+
+    changed, to_create = {}, []
+    for key in keys:
+        streak = rows.get(key)
+        if streak is None:
+            to_create.append(Streak(
+                user_id=user.pk, module_id=key, current_streak=1, longest_streak=1,
+                last_activity=now, last_active_date=today,
+            ))
+            changed[key] = 1
+            continue
+        previous = streak.last_active_date
+        if previous is not None and previous >= today:
+            continue
+        current = streak.current_streak + 1 if previous == today - timedelta(days=1) else 1
+        longest = max(streak.longest_streak, current)
+        # Condicional sobre el día anterior: dos peticiones simultáneas solo suman una vez
+        updated = Streak.objects.filter(pk=streak.pk, last_active_date=previous).update(
+            current_streak=current, longest_streak=longest, last_activity=now, last_active_date=today,
+        )
+        if updated:
+            changed[key] = current
+    if to_create:
+        Streak.objects.bulk_create(to_create, ignore_conflicts=True)
+    if changed:
+        events.emit(events.STREAK_CHANGED, user.pk, module_ids=list(changed))
+    if None in changed:
+        # La racha global cambia una vez por día activo: es cuando hay que marcar el día
+        mark_active(user.pk, today)
+        _complete_global_streak_mission(user.pk, now)
+    return changed
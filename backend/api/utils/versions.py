@@ -0,0 +1,76 @@
+"""
+Versiones compartidas entre procesos (`SharedVersion`).
+Las fotos en memoria de cada worker (catálogo, rankings) se comparan con estas
+versiones para saber si deben reconstruirse. Viven en la base de datos y no en
+la caché de Django porque la caché por defecto (LocMemCache) es propia de cada
+proceso: un cambio hecho en un worker nunca llegaría a los demás.
+Dentro de una petición HTTP (o de `version_scope`) todas las versiones se leen
+con una sola consulta; fuera de ese ámbito cada lectura consulta la tabla.
+Cada cambio guarda un valor nuevo (`time.time_ns()`), no un incremento: las
+fotos solo comparan igualdad, y un valor nuevo nunca coincide con uno anterior
+aunque una transacción revertida haya deshecho el cambio previo.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.signals import request_finished, request_started
+
+from api.models import SharedVersion
+
+_local = threading.local()
+
+
+def _scoped():
+    """Versiones del ámbito actual (cargándolas una vez) o None fuera de un ámbito."""
+    if not getattr(_local, 'active', False):
+        return None
+    if _local.versions is None:
+        _local.versions = dict(SharedVersion.objects.values_list('key', 'value'))
+    return _local.versions
+
+
+def get_versions(*keys) -> tuple:
+    """Valores de las claves pedidas; 0 si aún no existen."""
+    versions = _scoped()
+    if versions is None:
+        versions = dict(SharedVersion.objects.filter(key__in=keys).values_list('key', 'value'))
+    return tuple(versions.get(key, 0) for key in keys)
+
+
+def get_version(key):
+    return get_versions(key)[0]
+
+
+def bump_version(key) -> None:
+    """Marca como cambiada la foto asociada a `key` en todos los workers."""
+    value = time.time_ns()
+    if not SharedVersion.objects.filter(key=key).update(value=value):
+        SharedVersion.objects.bulk_create([SharedVersion(key=key, value=value)], ignore_conflicts=True)
+    versions = getattr(_local, 'versions', None)
+    if getattr(_local, 'active', False) and versions is not None:
+        versions[key] = value
+
+
+@contextmanager
+def version_scope():
+    """Lee las versiones como mucho una vez dentro del bloque (p. ej. un lote de eventos)."""
+    previous = getattr(_local, 'active', False), getattr(_local, 'versions', None)
+    _local.active, _local.versions = True, None
+    try:
+        yield
+    finally:
+        _local.active, _local.versions = previous
+
+
+def _begin_request(**kwargs):
+    _local.active, _local.versions = True, None
+
+
+def _end_request(**kwargs):
+    _local.active, _local.versions = False, None
+
+
+request_started.connect(_begin_request, dispatch_uid='shared-versions-begin')
+request_finished.connect(_end_request, dispatch_uid='shared-versions-end')
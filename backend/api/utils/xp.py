@@ -0,0 +1,85 @@
+"""
+Servicio de experiencia (XP).
+Cada cambio queda en el libro mayor `XPEvent` y el perfil se actualiza con un
+único UPDATE atómico (`F('experience_points') + n`), recalculando el nivel en
+SQL, sin leer ni reescribir la fila completa.
+"""
+
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+
+from api.models import Profile, XPEvent
+from api.utils import events
+
+XP_PER_LEVEL = 100
+BULK_CHUNK_SIZE = 500
+
+
+def _level_for(points):
+    """Expresión SQL del nivel: experience_points // 100 + 1, nunca menor que 1 (ajustes negativos)."""
+    return Greatest(points / XP_PER_LEVEL + 1, Value(1))
+
+
+def award_xp(user, amount: int, reason: str, reference: str = '') -> None:
+    """Suma (o resta) XP a un usuario y registra el movimiento."""
+    if not amount:
+        return
+    XPEvent.objects.create(user_id=user.pk, amount=amount, reason=reason, reference=reference)
+    points = F('experience_points') + amount
+    Profile.objects.filter(user_id=user.pk).update(
+        experience_points=points,
+        current_level=_level_for(points),
+    )
+    events.emit(events.XP_CHANGED, user.pk)
+
+
+def award_xp_entries(user, entries) -> int:
+    """
+    Registra varios movimientos de un mismo usuario, `entries` = [(cantidad,
+    motivo, referencia), ...], con un bulk_create y un único UPDATE agregado.
+    Devuelve la XP total aplicada.
+    """
+    entries = [entry for entry in entries if entry[0]]
+    total = sum(amount for amount, _, _ in entries)
+    if not entries:
+        return 0
+    XPEvent.objects.bulk_create([
+        XPEvent(user_id=user.pk, amount=amount, reason=reason, reference=reference)
+        for amount, reason, reference in entries
+    ])
+    points = F('experience_points') + total
+    Profile.objects.filter(user_id=user.pk).update(
+        experience_points=points,
+        current_level=_level_for(points),
+    )
+    events.emit(events.XP_CHANGED, user.pk)
+    return total
+
+
+def award_xp_bulk(awards: dict, reason: str, reference: str = '') -> int:
+    """
+    Otorga XP a muchos usuarios a la vez. `awards` es {user_id: cantidad}.
+    Inserta el libro mayor con bulk_create y actualiza los perfiles con un
+    UPDATE por bloque de usuarios. Devuelve cuántos perfiles se actualizaron.
+    """
+    awards = {user_id: amount for user_id, amount in awards.items() if amount}
+    updated = 0
+    user_ids = list(awards)
+    for start in range(0, len(user_ids), BULK_CHUNK_SIZE):
+        chunk = user_ids[start:start + BULK_CHUNK_SIZE]
+        XPEvent.objects.bulk_create([
+            XPEvent(user_id=user_id, amount=awards[user_id], reason=reason, reference=reference)
+            for user_id in chunk
+        ])
+        delta = Case(
+            *[When(user_id=user_id, then=Value(awards[user_id])) for user_id in chunk],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        points = F('experience_points') + delta
+        updated += Profile.objects.filter(user_id__in=chunk).update(
+            experience_points=points,
+            current_level=_level_for(points),
+        )
+    events.emit_many(events.XP_CHANGED, user_ids)
+    return updated
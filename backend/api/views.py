@@ -8,56 +8,50 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.db.models import Sum, Count
+from django.db import transaction
+from django.db.models import Sum, Count, F
 from django.utils import timezone
 from django.conf import settings
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from datetime import timedelta
 from uuid import UUID
 
 from .models import (
-    Profile, Module, ModuleProgress, Mission, MissionProgress,
-    Achievement, UserAchievement, Streak, Declaration, UnlockedPillar
+    Module, ModuleProgress, Mission, MissionProgress,
+    Achievement, Streak, Declaration, UnlockedPillar
 )
 from .serializers import (
     UserSerializer, UserRegistrationSerializer, ProfileSerializer,
     ModuleSerializer, ModuleProgressSerializer, MissionSerializer,
     MissionProgressSerializer, AchievementSerializer, UserAchievementSerializer,
     StreakSerializer, UserProfileDetailSerializer, ProgressOverviewSerializer,
-    DeclarationSerializer, UnlockedPillarSerializer,
+    MissionBatchCompleteSerializer,
+    DeclarationSerializer, DeclarationSyncSerializer, DeclarationSearchSerializer, UnlockedPillarSerializer,
     HabitSerializer, ComfortWallSerializer,
     UserProfileUpdateSerializer
 )
+from .pagination import DeclarationCursorPagination
+from .utils import events
+from .utils.catalog import get_catalog
+from .utils.module_unlocks import unlock_module
+from .utils.progress_summary import get_summary, streaks_on
+from .utils.streaks import record_activity, user_local_date
+from .utils.activity import HEATMAP_DAYS, load_activity
+from .utils.leaderboard import is_xp_board, leaderboard_page, level_for, streak_board, user_rank, xp_board
+from .utils.xp import award_xp
+from .utils.declaration_search import search_declarations
+from .utils.declaration_sync import declaration_xp, pull_declarations, push_declarations
+from .utils.mission_completion import (
+    complete_mission, complete_missions_batch, completion_key, store_response, stored_response
+)
+from .utils.serializers_helpers import MODULE_STATES_CONTEXT_KEY, get_module_states, get_module_states_context
 
-def sync_module_unlocks(user):
-    """
-    Sincroniza el estado de desbloqueo de módulos según XP y requisitos.
-    Desbloquea automáticamente los módulos para los que el usuario cumple los requisitos.
-    """
-    profile = user.profile
-    modules = Module.objects.all()
-    for module in modules:
-        progress, _ = ModuleProgress.objects.get_or_create(user=user, module=module)
-        if progress.state == 'locked':
-            # Lógica de requisitos personalizados
-            can_unlock = False
-            if module.id == "salud":
-                if profile.experience_points >= module.xp_required:
-                    can_unlock = True
-            elif module.id == "personalidad":
-                has_xp = profile.experience_points >= 200
-                try:
-                    mission = Mission.objects.get(id="46e39fc7-8a77-4e39-9559-283a73655d12")
-                    mp = MissionProgress.objects.filter(user=user, mission=mission, state="completed").exists()
-                except Exception:
-                    mp = False
-                if has_xp and mp:
-                    can_unlock = True
-            else:
-                if profile.experience_points >= module.xp_required:
-                    can_unlock = True
-            if can_unlock:
-                progress.unlock()
-                progress.save()
+class ModuleStatesContextMixin:
+    """Añade al contexto del serializer el mapa de estados de módulos del usuario."""
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context[MODULE_STATES_CONTEXT_KEY] = get_module_states(self.request)
+        return context
 
 @extend_schema(tags=['users'])
 class UserViewSet(viewsets.ModelViewSet):
@@ -77,7 +71,8 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_object(self):
-        return Profile.objects.get(user=self.request.user)
+        from api.utils.serializers_helpers import get_profile_queryset
+        return get_profile_queryset().get(user=self.request.user)
 
     def partial_update(self, request, *args, **kwargs):
         print("PATCH /auth/me/ request.data:", request.data)
@@ -121,13 +116,17 @@ class UserProfileUpdateView(generics.UpdateAPIView):
         return self.request.user.profile
 
 @extend_schema(tags=['modules'])
-class ModuleViewSet(viewsets.ModelViewSet):
+class ModuleViewSet(ModuleStatesContextMixin, viewsets.ModelViewSet):
     queryset = Module.objects.all()
     serializer_class = ModuleSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
         # Devuelve todos los módulos para el usuario autenticado
         return Module.objects.all()
+    def list(self, request, *args, **kwargs):
+        # El listado se sirve desde el catálogo en memoria
+        serializer = self.get_serializer(get_catalog().modules, many=True)
+        return Response(serializer.data)
 
 @extend_schema(
     tags=['modules'],
@@ -146,59 +145,20 @@ class ModuleUnlockView(APIView):
     serializer_class = ModuleProgressSerializer
     def post(self, request, module_id):
         module = get_object_or_404(Module, id=module_id)
-        user = request.user
-        profile = user.profile
-
-        # Lógica de requisitos personalizados
-        can_unlock = False
-        error_msg = ""
-        if module.id == "salud":
-            if profile.experience_points >= module.xp_required:
-                can_unlock = True
-            else:
-                error_msg = f"Necesitas al menos {module.xp_required} XP para desbloquear Salud."
-        elif module.id == "personalidad":
-            # XP y misión global
-            has_xp = profile.experience_points >= 200
-            try:
-                from .models import Mission, MissionProgress
-                mission = Mission.objects.get(id="46e39fc7-8a77-4e39-9559-283a73655d12")
-                mp = MissionProgress.objects.filter(user=user, mission=mission, state="completed").exists()
-            except Exception:
-                mp = False
-            if has_xp and mp:
-                can_unlock = True
-            elif not has_xp:
-                error_msg = "Necesitas al menos 200 XP para desbloquear Personalidad."
-            elif not mp:
-                error_msg = "Debes completar la misión global de racha de 1 día para desbloquear Personalidad."
-        else:
-            # Otros módulos: solo XP
-            if profile.experience_points >= module.xp_required:
-                can_unlock = True
-            else:
-                error_msg = f"Necesitas al menos {module.xp_required} XP para desbloquear este módulo."
-
-        if not can_unlock:
+        # Requisitos definidos en la tabla ModuleUnlockRule
+        progress, error_msg = unlock_module(request.user, module)
+        if progress is None:
             return Response(
-                {"error": error_msg or "No cumples los requisitos para desbloquear este módulo."},
+                {"error": error_msg},
                 status=status.HTTP_403_FORBIDDEN
             )
-
-        progress, created = ModuleProgress.objects.get_or_create(
-            user=user,
-            module=module
-        )
-        if progress.state == 'locked':
-            progress.unlock()
-            progress.save()
         return Response(
-            ModuleProgressSerializer(progress).data,
+            ModuleProgressSerializer(progress, context=get_module_states_context(request)).data,
             status=status.HTTP_200_OK
         )
 
 @extend_schema(tags=['missions'])
-class MissionViewSet(viewsets.ModelViewSet):
+class MissionViewSet(ModuleStatesContextMixin, viewsets.ModelViewSet):
     queryset = Mission.objects.all()
     serializer_class = MissionSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -208,7 +168,13 @@ class MissionViewSet(viewsets.ModelViewSet):
             user=user,
             state='unlocked'
         ).values_list('module_id', flat=True)
-        return Mission.objects.filter(module_id__in=unlocked_modules)
+        return Mission.objects.filter(module_id__in=unlocked_modules).select_related('module')
+    def list(self, request, *args, **kwargs):
+        # Misiones del catálogo en memoria de los módulos desbloqueados
+        module_states = get_module_states(request)
+        missions = [m for m in get_catalog().missions if module_states.get(m.module_id) == 'unlocked']
+        serializer = self.get_serializer(missions, many=True)
+        return Response(serializer.data)
 
 @extend_schema(
     tags=['missions'],
@@ -220,12 +186,20 @@ class MissionViewSet(viewsets.ModelViewSet):
             description='UUID of the mission to complete',
             required=True,
             pattern=r'^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$'
+        ),
+        OpenApiParameter(
+            name='Idempotency-Key',
+            type=str,
+            location=OpenApiParameter.HEADER,
+            description='Optional key to deduplicate retries; defaults to user + mission + period',
+            required=False
         )
     ]
 )
 class MissionCompleteView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = MissionProgressSerializer
+    @transaction.atomic
     def post(self, request, mission_id):
         try:
             if not isinstance(mission_id, UUID):
@@ -237,6 +211,11 @@ class MissionCompleteView(APIView):
             )
         mission = get_object_or_404(Mission, id=mission_id)
         user = request.user
+        key = completion_key(mission, request.headers.get('Idempotency-Key'))
+        stored = stored_response(user, key)
+        if stored is not None:
+            # Reintento: se devuelve el resultado ya calculado sin volver a escribir
+            return Response(stored, status=status.HTTP_200_OK)
         module_progress = get_object_or_404(
             ModuleProgress,
             user=user,
@@ -247,66 +226,104 @@ class MissionCompleteView(APIView):
                 {"error": "Module is locked"},
                 status=status.HTTP_403_FORBIDDEN
             )
-        progress, created = MissionProgress.objects.get_or_create(
-            user=user,
-            mission=mission
-        )
-        if progress.state != 'completed':
-            progress.complete()
-            progress.save()
-            profile = user.profile
-            profile.experience_points += mission.xp_reward
-            profile.calculate_level()
-            profile.save()
-            streak, _ = Streak.objects.get_or_create(
-                user=user,
-                module=mission.module
-            )
-            streak.update_streak()
-        return Response(
-            MissionProgressSerializer(progress).data,
-            status=status.HTTP_200_OK
-        )
+        progress, _ = complete_mission(user, mission)
+        data = MissionProgressSerializer(progress, context=get_module_states_context(request)).data
+        return Response(store_response(user, key, data), status=status.HTTP_200_OK)
+
+@extend_schema(tags=['missions'], request=MissionBatchCompleteSerializer)
+class MissionBatchCompleteView(APIView):
+    """Completa una cola de misiones en una sola petición (clientes offline)."""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = MissionBatchCompleteSerializer
+    def post(self, request):
+        serializer = MissionBatchCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = complete_missions_batch(request.user, serializer.validated_data['mission_ids'])
+        return Response({
+            "results": results,
+            "xp_awarded": sum(item["xp_awarded"] for item in results),
+        }, status=status.HTTP_200_OK)
 
 @extend_schema(tags=['progress'])
 class ProgressOverviewView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ProgressOverviewSerializer
     def get(self, request):
-        user = request.user
-        # --- Sincroniza desbloqueo de módulos antes de devolver el progreso ---
-        sync_module_unlocks(user)
-        profile = user.profile
-        modules_unlocked = ModuleProgress.objects.filter(
-            user=user,
-            state='unlocked'
-        ).count()
-        missions_completed = MissionProgress.objects.filter(
-            user=user,
-            state='completed'
-        ).count()
-        achievements_earned = UserAchievement.objects.filter(
-            user=user
-        ).count()
-        streaks = Streak.objects.filter(user=user)
-        current_streaks = {
-            streak.module.id: streak.current_streak
-            for streak in streaks
-        }
+        # Lectura de una fila: el resumen lo mantienen los eventos de escritura
+        summary = get_summary(request.user)
         data = {
-            'total_xp': profile.experience_points,
-            'level': profile.current_level,
-            'modules_unlocked': modules_unlocked,
-            'missions_completed': missions_completed,
-            'achievements_earned': achievements_earned,
-            'current_streaks': current_streaks,
-            'title': profile.get_level_title()
+            'total_xp': summary.total_xp,
+            'level': summary.level,
+            'modules_unlocked': summary.modules_unlocked,
+            'missions_completed': summary.missions_completed,
+            'achievements_earned': summary.achievements_earned,
+            'current_streaks': streaks_on(summary.current_streaks, summary.today),
+            'title': get_catalog().level_title(summary.level)
         }
         return Response(
             ProgressOverviewSerializer(data).data,
             status=status.HTTP_200_OK
         )
 
+@extend_schema(tags=['progress'])
+class ActivityView(APIView):
+    """Heatmap de actividad diaria del último año, días activos de la semana y racha más larga."""
+    permission_classes = [permissions.IsAuthenticated]
+    def get(self, request):
+        today = user_local_date(request.user.pk)
+        start = today - timedelta(days=HEATMAP_DAYS - 1)
+        activity = load_activity(request.user.pk)
+        return Response({
+            'start': start,
+            'end': today,
+            'days': activity.heatmap(today),
+            'active_this_week': activity.days_active(today - timedelta(days=today.weekday()), today),
+            'longest_run': activity.longest_run(start, today),
+        }, status=status.HTTP_200_OK)
+
+@extend_schema(
+    tags=['progress'],
+    parameters=[
+        OpenApiParameter(name='kind', type=str, location=OpenApiParameter.PATH, enum=['xp', 'level', 'streak']),
+        OpenApiParameter(name='module', type=str, description='Ranking de un módulo (XP ganada o racha en ese módulo)'),
+        OpenApiParameter(name='limit', type=int, description='Máximo 100 (por defecto 50)'),
+        OpenApiParameter(name='offset', type=int),
+    ]
+)
+class LeaderboardView(APIView):
+    """Ranking de XP, nivel o racha más larga (global o por módulo) y la posición del usuario."""
+    permission_classes = [permissions.IsAuthenticated]
+    def get(self, request, kind):
+        module_id = request.query_params.get('module')
+        if kind not in ('xp', 'level', 'streak'):
+            return Response({'error': 'Ranking no disponible'}, status=status.HTTP_404_NOT_FOUND)
+        if module_id and module_id not in get_catalog().modules_by_id:
+            return Response({'error': 'Módulo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        board = streak_board(module_id) if kind == 'streak' else xp_board(module_id)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 100)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+        except ValueError:
+            return Response({'error': 'limit y offset deben ser enteros'}, status=status.HTTP_400_BAD_REQUEST)
+        by_level = kind == 'level'
+        rows = leaderboard_page(board, limit, offset, by_level=by_level)
+        usernames = dict(User.objects.filter(pk__in=[user_id for _, user_id, _ in rows]).values_list('pk', 'username'))
+        rank, score = user_rank(board, request.user.pk, by_level=by_level)
+
+        def entry(rank, score, **extra):
+            data = {'rank': rank, **extra, 'score': score}
+            if is_xp_board(board):
+                data['level'] = level_for(score)
+            return data
+        return Response({
+            'board': board,
+            'results': [
+                entry(rank, score, user_id=user_id, username=usernames.get(user_id))
+                for rank, user_id, score in rows
+            ],
+            'me': entry(rank, score),
+        }, status=status.HTTP_200_OK)
+
 @extend_schema(
     tags=['progress'],
     parameters=[
@@ -325,24 +342,24 @@ class ModuleProgressView(APIView):
     def get(self, request, module_id):
         module = get_object_or_404(Module, id=module_id)
         user = request.user
-        # --- Sincroniza desbloqueo de módulos antes de devolver el progreso de uno ---
-        sync_module_unlocks(user)
-        progress, _ = ModuleProgress.objects.get_or_create(
+        # Lectura pura: si aún no hay filas se devuelven los valores por defecto
+        progress = ModuleProgress.objects.filter(
             user=user,
             module=module
-        )
+        ).first() or ModuleProgress(user=user, module=module)
         missions = MissionProgress.objects.filter(
             user=user,
             mission__module=module
-        )
-        streak, _ = Streak.objects.get_or_create(
+        ).select_related('mission__module')
+        streak = Streak.objects.filter(
             user=user,
             module=module
-        )
+        ).first() or Streak(user=user, module=module)
+        context = get_module_states_context(request)
         data = {
-            'progress': ModuleProgressSerializer(progress).data,
-            'missions': MissionProgressSerializer(missions, many=True).data,
-            'streak': StreakSerializer(streak).data
+            'progress': ModuleProgressSerializer(progress, context=context).data,
+            'missions': MissionProgressSerializer(missions, many=True, context=context).data,
+            'streak': StreakSerializer(streak, context=context).data
         }
         return Response(data, status=status.HTTP_200_OK)
 
@@ -407,16 +424,33 @@ class DeclarationViewSet(viewsets.ModelViewSet):
     queryset = Declaration.objects.all()
     serializer_class = DeclarationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = DeclarationCursorPagination
+    def get_sparse_fields(self):
+        """Campos pedidos con `?fields=id,module,pillar` (solo en list); None si son todos."""
+        raw = self.request.query_params.get('fields')
+        if self.action != 'list' or not raw:
+            return None
+        fields = [name for name in raw.split(',') if name in DeclarationSerializer.Meta.fields]
+        return fields or None
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
     def get_queryset(self):
         user = self.request.user
         queryset = Declaration.objects.filter(user=user)
         module_id = self.request.query_params.get('module')
         pillar = self.request.query_params.get('pillar')
         if module_id:
-            queryset = queryset.filter(module__id=module_id)
+            queryset = queryset.filter(module_id=module_id)
         if pillar:
             queryset = queryset.filter(pillar=pillar)
+        fields = self.get_sparse_fields()
+        if fields and 'text' not in fields:
+            queryset = queryset.defer('text')
         return queryset
+    @transaction.atomic
     def perform_create(self, serializer):
         # Guardar la declaración con el usuario actual
         declaration = serializer.save(user=self.request.user)
@@ -432,20 +466,47 @@ class DeclarationViewSet(viewsets.ModelViewSet):
         ).exclude(id=declaration.id).exists()
 
         if not exists:
-            # Calcular experiencia: base 20 + 10 * (orden-1)
-            base_xp = 20
-            xp = base_xp + 10 * (module.order - 1)
-            profile = user.profile
-            profile.experience_points += xp
-            profile.calculate_level()
-            profile.save()
-        # Actualizar streak diario al crear declaración
-        streak, _ = Streak.objects.get_or_create(user=user, module=module)
-        streak.update_streak()
+            award_xp(user, declaration_xp(module), 'declaration', f"{module.id}:{pillar}")
+        # Actualizar la racha diaria (una vez por día local) al crear declaración
+        record_activity(user, module.id)
 
         # --- Lógica de misiones delegada a utils ---
         from api.utils.mission_logic import check_and_complete_missions
         check_and_complete_missions(user, module, pillar)
+        events.emit(events.DECLARATION_CREATED, user.pk, module_ids=[module.id])
+
+    @action(detail=False, methods=['get', 'post'], url_path='sync', serializer_class=DeclarationSyncSerializer)
+    def sync(self, request):
+        """
+        Sincronización delta para clientes offline: POST inserta el lote pendiente
+        y ambos métodos devuelven las declaraciones modificadas desde `cursor`.
+        """
+        results = []
+        cursor = request.query_params.get('cursor')
+        if request.method == 'POST':
+            serializer = DeclarationSyncSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            results = push_declarations(request.user, serializer.validated_data.get('declarations', []))
+            cursor = serializer.validated_data.get('cursor') or cursor
+        rows, deleted, cursor, has_more = pull_declarations(request.user, cursor)
+        return Response({
+            "results": results,
+            "declarations": DeclarationSerializer(rows, many=True).data,
+            "deleted": deleted,
+            "cursor": cursor,
+            "has_more": has_more,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='search', serializer_class=DeclarationSearchSerializer)
+    def search(self, request):
+        """Búsqueda de texto completo en las declaraciones del usuario, ordenada por relevancia."""
+        serializer = DeclarationSearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        results = search_declarations(
+            request.user, params['q'], params.get('module'), params.get('pillar'), params['limit']
+        )
+        return Response(results, status=status.HTTP_200_OK)
 
 # --- Hábitos (serpiente) ---
 @extend_schema(tags=['habits'])
@@ -461,6 +522,21 @@ class HabitViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=True, methods=['post'], url_path='check-in')
+    def check_in(self, request, pk=None):
+        """Marca el hábito como cumplido hoy (una vez por día local) y registra la actividad."""
+        habit = self.get_object()
+        now = timezone.now()
+        today = user_local_date(request.user.pk, now)
+        with transaction.atomic():
+            checked = self.get_queryset().filter(pk=habit.pk).exclude(ultimo_check_in=today).update(
+                dias_activos=F('dias_activos') + 1, ultimo_check_in=today
+            )
+            if checked:
+                record_activity(request.user, None, now)
+        habit.refresh_from_db(fields=['dias_activos', 'ultimo_check_in'])
+        return Response(self.get_serializer(habit).data, status=status.HTTP_200_OK)
+
 # --- Muro de confort (zona de confort) ---
 @extend_schema(tags=['comfortwall'])
 class ComfortWallViewSet(viewsets.ModelViewSet):
@@ -507,115 +583,5 @@ class AchievementViewSet(viewsets.ReadOnlyModelViewSet):
 class UserMissionsAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     def get(self, request):
-        user = request.user
-        from .models import Mission, MissionProgress, Declaration, ModuleProgress
-        from datetime import timedelta
-
-        now = timezone.now()
-        today = now.date()
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-
-        # Misiones globales
-        global_missions = Mission.objects.filter(module__isnull=True)
-        # Todas las misiones de módulos (desbloqueados o no)
-        module_missions = Mission.objects.filter(module__isnull=False)
-        # Módulos desbloqueados por el usuario
-        unlocked_modules = set(ModuleProgress.objects.filter(
-            user=user,
-            state='unlocked'
-        ).values_list('module_id', flat=True))
-
-        # Progreso de usuario
-        declarations_today = Declaration.objects.filter(user=user, created_at__date=today).count()
-        declarations_this_week = Declaration.objects.filter(user=user, created_at__date__gte=week_start, created_at__date__lte=week_end)
-        days_with_declaration = declarations_this_week.values_list('created_at__date', flat=True).distinct()
-        modules_unlocked_this_week = ModuleProgress.objects.filter(
-            user=user,
-            state='unlocked',
-            last_activity__date__gte=week_start,
-            last_activity__date__lte=week_end,
-            auto_unlocked=False
-        ).count()
-
-        result = []
-
-        # Global missions
-        for mission in global_missions:
-            mp = MissionProgress.objects.filter(user=user, mission=mission).first()
-            state = mp.state if mp else "active"
-            progress = None
-            frequency = getattr(mission, "frequency", None)
-            if hasattr(mission, "frequency"):
-                frequency = mission.frequency
-            elif hasattr(mission, "fields") and "frequency" in mission.fields:
-                frequency = mission.fields["frequency"]
-            # Daily
-            if frequency == "daily":
-                progress = {
-                    "current": declarations_today,
-                    "target": 1,
-                    "label": f"{declarations_today}/1 declaraciones hoy"
-                }
-                if declarations_today >= 1:
-                    state = "completed"
-            # Weekly streak
-            elif frequency == "weekly" and "racha" in mission.title.lower():
-                # Usar la racha real del usuario (Streak)
-                from .models import Streak
-                streak = Streak.objects.filter(user=user, module__isnull=True).first()
-                current_streak = streak.current_streak if streak else 0
-                progress = {
-                    "current": current_streak,
-                    "target": 5,
-                    "label": f"{current_streak}/5 días de racha consecutiva"
-                }
-                if current_streak >= 5:
-                    state = "completed"
-            # Weekly unlock
-            elif frequency == "weekly" and "desbloquea" in mission.title.lower():
-                progress = {
-                    "current": modules_unlocked_this_week,
-                    "target": 1,
-                    "label": f"{modules_unlocked_this_week}/1 módulos desbloqueados esta semana"
-                }
-                if modules_unlocked_this_week >= 1:
-                    state = "completed"
-            result.append({
-                "id": str(mission.id),
-                "title": mission.title,
-                "description": mission.description,
-                "xp_reward": mission.xp_reward,
-                "frequency": frequency,
-                "requirements": getattr(mission, "requirements", []),
-                "type": "global",
-                "state": state,
-                "progress": progress,
-                "started_at": mp.started_at if mp else None,
-                "completed_at": mp.completed_at if mp else None,
-            })
-
-        # Module missions
-        for mission in module_missions:
-            mp = MissionProgress.objects.filter(user=user, mission=mission).first()
-            # Si el módulo está desbloqueado, usar el estado real; si no, marcar como "blocked"
-            if mission.module and str(mission.module.id) in unlocked_modules:
-                state = mp.state if mp else "active"
-            else:
-                state = "blocked"
-            result.append({
-                "id": str(mission.id),
-                "title": mission.title,
-                "description": mission.description,
-                "xp_reward": mission.xp_reward,
-                "frequency": getattr(mission, "frequency", None),
-                "requirements": getattr(mission, "requirements", []),
-                "type": "module",
-                "module_id": str(mission.module.id) if mission.module else None,
-                "state": state,
-                "progress": None,
-                "started_at": mp.started_at if mp else None,
-                "completed_at": mp.completed_at if mp else None,
-            })
-
-        return Response(result)
+        from api.utils.mission_board import build_mission_board
+        return Response(build_mission_board(request.user))
@@ -0,0 +1,238 @@
+"""
+Analítica de bienestar por cohorte con NumPy.
+Las respuestas de los envíos de una ventana de tiempo se leen en bloques
+(cursor del lado del servidor en PostgreSQL) a arreglos columnares: envío,
+categoría y respuesta. Con `bincount` se arma la matriz envío × categoría de
+promedios y, junto al usuario y la fecha de cada envío, se calculan
+distribuciones, percentiles, evolución por período, deltas por usuario y
+correlaciones entre categorías sin bucles de Python por fila. El resultado se
+guarda en la caché compartida ('shared', en la base de datos) por cohorte y
+ventana, así que la ven todos los workers y los comandos; la clave incluye la
+huella (cantidad e id máximo) de los envíos, así que un envío nuevo la invalida.
+"""
+
+import hashlib
+import warnings
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import WellnessSurveyAnswer, WellnessSurveyResult
+from .questions import get_question_bank
+
+ANALYTICS_CHUNK_SIZE = 100_000
+ANALYTICS_CACHE = 'shared'
+ANALYTICS_CACHE_SECONDS = 3600
+DEFAULT_WINDOW_DAYS = 365
+DEFAULT_PERIOD_DAYS = 30
+PERCENTILES = (10, 25, 50, 75, 90)
+SCORE_BINS = 11  # Respuestas de 0 a 10
+
+
+class CohortColumns:
+    """
+    Datos columnares de una cohorte: por respuesta (`submission`, `category`,
+    `answer`) y por envío (`user`, `submitted_at` en segundos epoch).
+    """
+    __slots__ = ('categories', 'submission', 'category', 'answer', 'user', 'submitted_at')
+
+    def __init__(self, categories, submission, category, answer, user, submitted_at):
+        self.categories = categories
+        self.submission = submission
+        self.category = category
+        self.answer = answer
+        self.user = user
+        self.submitted_at = submitted_at
+
+
+def window_end():
+    """Próxima hora en punto: el fin por defecto de la ventana, estable para la clave de caché."""
+    return timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+
+
+def _window(start, end):
+    end = end or window_end()
+    return start or end - timedelta(days=DEFAULT_WINDOW_DAYS), end
+
+
+def _results(user_ids, start, end):
+    queryset = WellnessSurveyResult.objects.filter(
+        session__isnull=False, created_at__gte=start, created_at__lt=end
+    )
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+    return queryset
+
+
+def load_columns(user_ids=None, start=None, end=None, chunk_size=ANALYTICS_CHUNK_SIZE) -> CohortColumns:
+    """Lee en bloques las respuestas de los envíos de la cohorte en [start, end)."""
+    start, end = _window(start, end)
+    results = _results(user_ids, start, end)
+    meta = list(results.order_by('session_id').values_list('session_id', 'user_id', 'created_at'))
+    session_ids = np.fromiter((row[0] for row in meta), dtype=np.int64, count=len(meta))
+    _, user_index = np.unique(np.fromiter((row[1] for row in meta), dtype=np.int64, count=len(meta)),
+                              return_inverse=True)
+    submitted_at = np.fromiter((row[2].timestamp() for row in meta), dtype=np.float64, count=len(meta))
+
+    # Las categorías del banco van primero, en orden alfabético como el radar chart
+    categories = sorted(category for category, _, _ in get_question_bank().categories)
+    category_index = {category: index for index, category in enumerate(categories)}
+
+    def lookup(category):
+        if category not in category_index:
+            category_index[category] = len(categories)
+            categories.append(category)
+        return category_index[category]
+
+    rows = WellnessSurveyAnswer.objects.filter(
+        session_id__in=results.values('session_id')
+    ).values_list('session_id', 'category', 'answer').iterator(chunk_size=chunk_size)
+    sessions, category_chunks, answers = [], [], []
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        session_column, category_column, answer_column = zip(*chunk)
+        sessions.append(np.fromiter(session_column, dtype=np.int64, count=len(chunk)))
+        category_chunks.append(np.fromiter(map(lookup, category_column), dtype=np.int16, count=len(chunk)))
+        answers.append(np.fromiter(answer_column, dtype=np.int8, count=len(chunk)))
+
+    def concat(parts, dtype):
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    return CohortColumns(
+        categories=categories,
+        submission=np.searchsorted(session_ids, concat(sessions, np.int64)),
+        category=concat(category_chunks, np.int16),
+        answer=concat(answers, np.int8),
+        user=user_index.astype(np.int64),
+        submitted_at=submitted_at,
+    )
+
+
+def submission_matrix(columns: CohortColumns) -> np.ndarray:
+    """Matriz envío × categoría con el promedio de cada categoría (NaN si no hay respuestas)."""
+    shape = (len(columns.user), len(columns.categories))
+    flat = columns.submission * shape[1] + columns.category
+    sums = np.bincount(flat, weights=columns.answer, minlength=shape[0] * shape[1]).reshape(shape)
+    counts = np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _distributions(matrix):
+    """Histograma por categoría del promedio de cada envío, en cajas 0..10."""
+    categories = matrix.shape[1]
+    valid = ~np.isnan(matrix)
+    bins = np.clip(np.floor(np.nan_to_num(matrix)), 0, SCORE_BINS - 1).astype(np.int64)
+    flat = (np.arange(categories) * SCORE_BINS + bins)[valid]
+    return np.bincount(flat, minlength=categories * SCORE_BINS).reshape(categories, SCORE_BINS)
+
+
+def _periods(matrix, submitted_at, start, period_seconds):
+    """Promedio por período y categoría."""
+    period = ((submitted_at - start) // period_seconds).astype(np.int64)
+    count = int(period.max()) + 1 if len(period) else 0
+    categories = matrix.shape[1]
+    valid = ~np.isnan(matrix)
+    flat = (period[:, None] * categories + np.arange(categories))[valid]
+    sums = np.bincount(flat, weights=matrix[valid], minlength=count * categories).reshape(count, categories)
+    counts = np.bincount(flat, minlength=count * categories).reshape(count, categories)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _first_and_last(user, submitted_at):
+    """Índices del primer y último envío de cada usuario."""
+    order = np.lexsort((submitted_at, user))
+    boundaries = np.flatnonzero(np.diff(user[order])) + 1
+    first = order[np.concatenate(([0], boundaries))]
+    last = order[np.concatenate((boundaries - 1, [len(order) - 1]))]
+    return first, last
+
+
+def _clean(array):
+    """Listas JSON con None en lugar de NaN."""
+    return np.where(np.isnan(array), None, np.round(array, 2)).tolist()
+
+
+def compute_cohort_stats(columns: CohortColumns, start, period_days=DEFAULT_PERIOD_DAYS) -> dict:
+    matrix = submission_matrix(columns)
+    categories = columns.categories
+    stats = {
+        "categories": categories,
+        "submissions": int(matrix.shape[0]),
+        "users": int(columns.user.max()) + 1 if len(columns.user) else 0,
+        "answers": int(len(columns.answer)),
+    }
+    if not matrix.shape[0]:
+        return stats
+
+    distributions = _distributions(matrix)
+    stats["distributions"] = {category: distributions[i].tolist() for i, category in enumerate(categories)}
+    with warnings.catch_warnings():
+        # Una categoría sin respuestas en la ventana da NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        percentiles = np.nanpercentile(matrix, PERCENTILES, axis=0)
+    stats["percentiles"] = {f"p{p}": _clean(percentiles[i]) for i, p in enumerate(PERCENTILES)}
+
+    period_seconds = period_days * 86400
+    means = _periods(matrix, columns.submitted_at, start.timestamp(), period_seconds)
+    stats["over_time"] = {
+        "period_days": period_days,
+        "periods": [(start + timedelta(days=period_days * i)).date().isoformat() for i in range(means.shape[0])],
+        "values": [_clean(row) for row in means],
+    }
+
+    first, last = _first_and_last(columns.user, columns.submitted_at)
+    repeated = first != last
+    deltas = matrix[last[repeated]] - matrix[first[repeated]]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean_deltas = np.nanmean(deltas, axis=0) if repeated.any() else np.full(len(categories), np.nan)
+    stats["deltas"] = {"users": int(repeated.sum()), "mean": _clean(mean_deltas)}
+
+    # Correlaciones entre categorías con el último envío completo de cada usuario
+    latest = matrix[last]
+    latest = latest[~np.isnan(latest).any(axis=1)]
+    if latest.shape[0] > 1:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats["correlations"] = _clean(np.corrcoef(latest, rowvar=False))
+    else:
+        stats["correlations"] = None
+    return stats
+
+
+def _cache_key(user_ids, start, end, period_days):
+    cohort = 'all' if user_ids is None else hashlib.sha1(
+        ','.join(str(user_id) for user_id in sorted(user_ids)).encode('utf-8')
+    ).hexdigest()
+    fingerprint = _results(user_ids, start, end).aggregate(total=Count('id'), last=Max('id'))
+    return (
+        f"wellness:cohort:{cohort}:{start.isoformat()}:{end.isoformat()}:{period_days}:"
+        f"{fingerprint['total']}:{fingerprint['last']}"
+    )
+
+
+def cohort_analytics(user_ids=None, start=None, end=None, period_days=DEFAULT_PERIOD_DAYS, use_cache=True) -> dict:
+    """
+    Estadísticas de la cohorte (`user_ids`, o todos los usuarios si es None) en
+    la ventana [start, end). Por defecto, el último año.
+    """
+    start, end = _window(start, end)
+    if user_ids is not None:
+        user_ids = list(user_ids)
+    key = _cache_key(user_ids, start, end, period_days) if use_cache else None
+    if key:
+        stats = caches[ANALYTICS_CACHE].get(key)
+        if stats is not None:
+            return stats
+    stats = compute_cohort_stats(load_columns(user_ids, start, end), start, period_days)
+    stats["window"] = {"start": start.isoformat(), "end": end.isoformat()}
+    if key:
+        caches[ANALYTICS_CACHE].set(key, stats, ANALYTICS_CACHE_SECONDS)
+    return stats
@@ -3,6 +3,10 @@ from django.conf import settings
 
 class WellnessSurveyAnswer(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Envío al que pertenece; las respuestas no se reescriben, cada envío agrega las suyas
+    session = models.ForeignKey(
+        'WellnessSurveySession', null=True, blank=True, on_delete=models.CASCADE, related_name='answers'
+    )
     category = models.CharField(max_length=50)
     question = models.CharField(max_length=255)
     answer = models.IntegerField()
@@ -15,3 +19,23 @@ class WellnessSurveySession(models.Model):
     is_completed = models.BooleanField(default=False)
     started_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
+
+class WellnessSurveyResult(models.Model):
+    """
+    Foto inmutable de un envío: versión correlativa por usuario y vector del radar
+    chart (promedio por categoría), calculado al guardar.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    session = models.OneToOneField(
+        WellnessSurveySession, null=True, blank=True, on_delete=models.CASCADE, related_name='result'
+    )
+    version = models.PositiveIntegerField(default=1)
+    categories = models.JSONField(default=list)  # Nombres en orden alfabético
+    values = models.JSONField(default=list)  # Promedios, en el mismo orden que categories
+    scores = models.JSONField(default=list)  # Respuestas de cada categoría, en el orden enviado
+    answer_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # También sirve las lecturas por rango de versiones del historial
+        constraints = [models.UniqueConstraint(fields=['user', 'version'], name='wellness_result_version_uniq')]
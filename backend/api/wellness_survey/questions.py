@@ -0,0 +1,106 @@
+"""
+Banco de preguntas de la encuesta de bienestar, precargado en memoria.
+El fixture se lee y valida una vez (al arrancar la app) en una estructura
+inmutable junto con el cuerpo JSON ya serializado y su ETag (hash del
+contenido). Cada petición solo compara la firma (mtime, tamaño) del archivo:
+si cambió, se recarga sin reiniciar los workers; si el archivo nuevo no es
+válido, se sigue sirviendo el anterior.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'wellnessSurveyQuestions.json')
+CACHE_CONTROL = 'private, max-age=300, must-revalidate'
+QUESTION_TYPES = ('satisfaction', 'agreement')
+
+_lock = threading.Lock()
+_bank = None
+
+
+class QuestionBank:
+    """Categorías inmutables, cuerpo JSON precalculado y su ETag."""
+    __slots__ = ('categories', 'body', 'etag', 'signature')
+
+    def __init__(self, categories, body, etag, signature):
+        self.categories = categories
+        self.body = body
+        self.etag = etag
+        self.signature = signature
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _validate(data):
+    if not isinstance(data, list) or not data:
+        raise ValueError("el banco debe ser una lista de categorías")
+    seen = set()
+    categories = []
+    for item in data:
+        category, kind, questions = item.get('category'), item.get('type'), item.get('questions')
+        if not isinstance(category, str) or not category or category in seen:
+            raise ValueError(f"categoría inválida o repetida: {category!r}")
+        if kind not in QUESTION_TYPES:
+            raise ValueError(f"tipo inválido en {category}: {kind!r}")
+        if not isinstance(questions, list) or not all(isinstance(q, str) and q for q in questions):
+            raise ValueError(f"preguntas inválidas en {category}")
+        seen.add(category)
+        categories.append((category, kind, tuple(questions)))
+    return tuple(categories)
+
+
+def load_question_bank(path=None) -> QuestionBank:
+    """Lee y valida el fixture; lanza ValueError (u OSError) si no es válido."""
+    path = path or QUESTIONS_PATH
+    signature = _signature(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    categories = _validate(data)
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+    return QuestionBank(categories, body, etag, signature)
+
+
+def get_question_bank() -> QuestionBank:
+    """Banco vigente; lo recarga si el fixture cambió desde la última lectura."""
+    global _bank
+    bank = _bank
+    try:
+        signature = _signature(QUESTIONS_PATH)
+    except OSError:
+        if bank is None:
+            raise
+        logger.error("No se encontró el banco de preguntas %s; se sirve la versión cargada", QUESTIONS_PATH)
+        return bank
+    if bank is not None and bank.signature == signature:
+        return bank
+    with _lock:
+        if _bank is not bank:
+            return _bank
+        try:
+            _bank = load_question_bank()
+        except (OSError, ValueError) as exc:
+            if bank is None:
+                raise
+            logger.error("Banco de preguntas inválido (%s); se sirve la versión cargada", exc)
+            # Se recuerda la firma para no reintentar en cada petición hasta el próximo cambio
+            _bank = QuestionBank(bank.categories, bank.body, bank.etag, signature)
+        return _bank
+
+
+def preload_question_bank() -> None:
+    """Carga el banco al arrancar; un fixture inválido impide iniciar la app."""
+    try:
+        get_question_bank()
+    except (OSError, ValueError) as exc:
+        raise ImproperlyConfigured(f"Banco de preguntas de bienestar inválido: {exc}") from exc
@@ -0,0 +1,113 @@
+"""
+Guardado e historial de los envíos de la encuesta de bienestar.
+Cada envío es una foto inmutable: sus respuestas se insertan con un único
+`bulk_create` ligadas a su `WellnessSurveySession` (nunca se borran las
+anteriores) y su vector queda en `WellnessSurveyResult` con una versión
+correlativa por usuario. Los promedios se calculan en memoria desde el payload
+validado, así que ninguna lectura agrega respuestas.
+"""
+
+import json
+import logging
+from itertools import groupby
+from operator import itemgetter
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import WellnessSurveyAnswer, WellnessSurveyResult, WellnessSurveySession
+
+logger = logging.getLogger(__name__)
+
+HISTORY_LIMIT = 12
+MAX_HISTORY = 100
+LIST_CHUNK_SIZE = 500
+
+
+def category_scores(validated_data_list):
+    """(categorías, promedios, respuestas por categoría) en orden alfabético de categoría."""
+    grouped = {}
+    for data in validated_data_list:
+        grouped.setdefault(data['category'], []).append(data['answer'])
+    categories = sorted(grouped)
+    values = [round(sum(grouped[category]) / len(grouped[category]), 2) for category in categories]
+    return categories, values, [grouped[category] for category in categories]
+
+
+def latest_session(user):
+    return WellnessSurveySession.objects.filter(user=user).order_by('-started_at', '-id').first()
+
+
+def save_submission(user, validated_data_list):
+    """Agrega un envío (respuestas, sesión y vector versionado); devuelve (respuestas, resultado)."""
+    categories, values, scores = category_scores(validated_data_list)
+    now = timezone.now()
+    with transaction.atomic():
+        # Serializa los envíos del mismo usuario para que la versión sea correlativa
+        list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+        session = WellnessSurveySession.objects.filter(user=user, is_completed=False).order_by(
+            '-started_at', '-id'
+        ).first()
+        if session is None:
+            session = WellnessSurveySession.objects.create(user=user, is_completed=True, finished_at=now)
+        else:
+            session.is_completed, session.finished_at = True, now
+            session.save(update_fields=['is_completed', 'finished_at'])
+        answers = WellnessSurveyAnswer.objects.bulk_create([
+            WellnessSurveyAnswer(
+                user=user, session=session, category=data['category'], question=data['question'], answer=data['answer']
+            )
+            for data in validated_data_list
+        ])
+        last_version = WellnessSurveyResult.objects.filter(user=user).order_by('-version').values_list(
+            'version', flat=True
+        ).first()
+        result = WellnessSurveyResult.objects.create(
+            user=user, session=session, version=(last_version or 0) + 1,
+            categories=categories, values=values, scores=scores, answer_count=len(answers),
+        )
+    # Ordenar las respuestas por categoría para el radar chart
+    answers.sort(key=lambda x: x.category)
+    return answers, result
+
+
+def load_history(user, limit=HISTORY_LIMIT, before=None) -> list:
+    """Los `limit` envíos más recientes (anteriores a la versión `before`), del más antiguo al más nuevo."""
+    queryset = WellnessSurveyResult.objects.filter(user=user)
+    if before is not None:
+        queryset = queryset.filter(version__lt=before)
+    rows = list(queryset.order_by('-version').values('version', 'created_at', 'categories', 'values')[:limit])
+    rows.reverse()
+    return rows
+
+
+def stream_grouped_answers(rows):
+    """
+    Genera el JSON {"categories": [...], "values": [...]} a partir de filas
+    (categoría, pregunta, respuesta) ordenadas por categoría, en una sola pasada.
+    """
+    values = []
+    yield '{"categories":['
+    for index, (category, group) in enumerate(groupby(rows, key=itemgetter(0))):
+        answers = [{"category": category, "question": question, "answer": answer} for _, question, answer in group]
+        average = round(sum(item["answer"] for item in answers) / len(answers), 2)
+        values.append(average)
+        yield (',' if index else '') + json.dumps(
+            {"category": category, "average": average, "answers": answers}, ensure_ascii=False
+        )
+    yield '],"values":' + json.dumps(values) + '}'
+
+
+def log_stream_errors(chunks):
+    """
+    Reenvía el cuerpo de una respuesta en streaming registrando cualquier error.
+    Las cabeceras (200) ya se enviaron, así que el error no puede convertirse en
+    un 500: se vuelve a lanzar para que el servidor corte la conexión y el
+    cliente reciba un cuerpo incompleto en lugar de un JSON aparentemente válido.
+    """
+    try:
+        yield from chunks
+    except Exception:
+        logger.exception("Error a mitad del streaming de respuestas de bienestar")
+        raise
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import WellnessSurveyAnswer, WellnessSurveySession
-from django.db import transaction
+from .results import save_submission
 
 class WellnessSurveyAnswerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -39,28 +39,10 @@ class WellnessSurveyAnswerListSerializer(serializers.Serializer):
     @classmethod
     def create_answers(cls, validated_data_list, user):
         """
-        Crea o actualiza las respuestas de la encuesta para un usuario.
-        Todas las operaciones se realizan en una única transacción.
+        Guarda un nuevo envío de la encuesta para un usuario; los anteriores se conservan.
+        Todas las operaciones se realizan en una única transacción (ver results.save_submission).
         """
-        answers = []
-        with transaction.atomic():
-            # Eliminar respuestas anteriores
-            WellnessSurveyAnswer.objects.filter(user=user).delete()
-            
-            # Crear nuevas respuestas
-            answers = []
-            for data in validated_data_list:
-                answer = WellnessSurveyAnswer.objects.create(
-                    user=user,
-                    category=data['category'],
-                    question=data['question'],
-                    answer=data['answer']
-                )
-                answers.append(answer)
-            
-            # Ordenar las respuestas por categoría para el radar chart
-            answers.sort(key=lambda x: x.category)
-            
+        answers, _ = save_submission(user, validated_data_list)
         return answers
 
 class WellnessSurveySessionSerializer(serializers.ModelSerializer):
@@ -4,5 +4,6 @@ from . import views
 urlpatterns = [
     path('questions/', views.WellnessSurveyQuestionsView.as_view(), name='wellness-survey-questions'),
     path('answers/', views.WellnessSurveyAnswerListCreateView.as_view(), name='wellness-survey-answers'),
+    path('history/', views.WellnessSurveyHistoryView.as_view(), name='wellness-survey-history'),
     path('session/', views.WellnessSurveySessionView.as_view(), name='wellness-survey-session'),
 ]
@@ -1,42 +1,54 @@
 import logging
 from rest_framework import generics, permissions, status
-from .models import WellnessSurveyAnswer, WellnessSurveySession
+from .models import WellnessSurveyAnswer, WellnessSurveyResult, WellnessSurveySession
 from .serializers import (
     WellnessSurveyAnswerSerializer,
     WellnessSurveySessionSerializer,
     WellnessSurveyAnswerListSerializer
 )
+from .questions import CACHE_CONTROL, get_question_bank
+from .results import (
+    HISTORY_LIMIT, LIST_CHUNK_SIZE, MAX_HISTORY, latest_session, load_history, log_stream_errors, save_submission,
+    stream_grouped_answers
+)
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db import transaction
-from django.db.models import Avg
-from django.utils import timezone
+from itertools import chain, islice
+from django.db.models import Subquery
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags
 
 logger = logging.getLogger(__name__)
 
 class WellnessSurveyQuestionsView(APIView):
+    """Banco de preguntas precargado: cuerpo JSON ya serializado, con ETag y 304."""
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
         try:
-            import os, json
-            path = os.path.join(os.path.dirname(__file__), 'fixtures', 'wellnessSurveyQuestions.json')
-            with open(path, 'r', encoding='utf-8') as f:
-                questions = json.load(f)
-            return Response(questions)
+            bank = get_question_bank()
         except Exception as e:
             logger.error(f"Error loading survey questions: {str(e)}")
             return Response(
                 {"error": "Error al cargar las preguntas"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        if bank.etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(bank.body, content_type='application/json; charset=utf-8')
+        response['ETag'] = bank.etag
+        response['Cache-Control'] = CACHE_CONTROL
+        return response
 
 class WellnessSurveyAnswerListCreateView(generics.ListCreateAPIView):
     serializer_class = WellnessSurveyAnswerSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return WellnessSurveyAnswer.objects.filter(user=self.request.user)
+        # Respuestas del último envío; los anteriores quedan en el historial
+        latest = WellnessSurveyResult.objects.filter(user=self.request.user).order_by('-version').values('session_id')[:1]
+        return WellnessSurveyAnswer.objects.filter(user=self.request.user, session_id=Subquery(latest))
 
     def create(self, request, *args, **kwargs):
         try:
@@ -55,40 +67,14 @@ class WellnessSurveyAnswerListCreateView(generics.ListCreateAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            with transaction.atomic():
-                # Eliminar respuestas anteriores
-                WellnessSurveyAnswer.objects.filter(user=request.user).delete()
-
-                # Crear nuevas respuestas
-                answers = []
-                for data in serializer.validated_data:
-                    answer = WellnessSurveyAnswer.objects.create(
-                        user=request.user,
-                        category=data['category'],
-                        question=data['question'],
-                        answer=data['answer']
-                    )
-                    answers.append(answer)
-
-                # Actualizar sesión
-                session = WellnessSurveySession.objects.get_or_create(user=request.user)[0]
-                session.is_completed = True
-                session.finished_at = timezone.now()
-                session.save()
-
-                # Calcular promedios por categoría
-                averages = (WellnessSurveyAnswer.objects
-                    .filter(user=request.user)
-                    .values('category')
-                    .annotate(average=Avg('answer'))
-                    .order_by('category'))
-
-                return Response({
-                    "status": "success",
-                    "message": "Respuestas guardadas correctamente",
-                    "count": len(answers),
-                    "values": [round(item['average'], 2) for item in averages]
-                }, status=status.HTTP_201_CREATED)
+            # Envío nuevo: un bulk_create, sesión cerrada y vector versionado calculado desde el payload
+            answers, result = save_submission(request.user, serializer.validated_data)
+            return Response({
+                "status": "success",
+                "message": "Respuestas guardadas correctamente",
+                "count": len(answers),
+                "values": result.values
+            }, status=status.HTTP_201_CREATED)
 
         except Exception as e:
             logger.error(f"Error creating survey answers: {str(e)}")
@@ -99,28 +85,22 @@ class WellnessSurveyAnswerListCreateView(generics.ListCreateAPIView):
 
     def list(self, request, *args, **kwargs):
         try:
-            queryset = self.get_queryset()
-            
-            # Obtener promedios por categoría
-            averages = (queryset
-                .values('category')
-                .annotate(average=Avg('answer'))
-                .order_by('category'))
-
-            # Obtener todas las respuestas
-            serializer = self.get_serializer(queryset, many=True)
-            
-            return Response({
-                "categories": [{
-                    "category": avg['category'],
-                    "average": round(avg['average'], 2),
-                    "answers": [
-                        answer for answer in serializer.data 
-                        if answer['category'] == avg['category']
-                    ]
-                } for avg in averages],
-                "values": [round(item['average'], 2) for item in averages]
-            })
+            if request.query_params.get('summary_only') in ('1', 'true', 'True'):
+                # Solo el vector del radar chart, leído del resultado guardado del último envío
+                result = WellnessSurveyResult.objects.filter(user=request.user).order_by('-version').values(
+                    'version', 'created_at', 'categories', 'values'
+                ).first()
+                return Response(result or {"categories": [], "values": []})
+
+            # Una consulta ordenada por categoría; se agrupa y promedia al recorrerla
+            rows = self.get_queryset().order_by('category', 'id').values_list(
+                'category', 'question', 'answer'
+            ).iterator(chunk_size=LIST_CHUNK_SIZE)
+            # La consulta se ejecuta aquí, antes de enviar las cabeceras: si falla, la
+            # respuesta aún puede ser un 500. Los errores posteriores solo se registran.
+            first = list(islice(rows, 1))
+            body = log_stream_errors(stream_grouped_answers(chain(first, rows)))
+            return StreamingHttpResponse(body, content_type='application/json')
 
         except Exception as e:
             logger.error(f"Error retrieving survey answers: {str(e)}")
@@ -129,9 +109,26 @@ class WellnessSurveyAnswerListCreateView(generics.ListCreateAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class WellnessSurveyHistoryView(APIView):
+    """Vectores del radar chart de los últimos envíos del usuario, del más antiguo al más nuevo."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', HISTORY_LIMIT)), 1), MAX_HISTORY)
+            before = request.query_params.get('before')
+            before = int(before) if before else None
+        except ValueError:
+            return Response(
+                {"error": "limit y before deben ser enteros"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({"results": load_history(request.user, limit, before)})
+
 class WellnessSurveySessionView(generics.RetrieveUpdateAPIView):
     serializer_class = WellnessSurveySessionSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return WellnessSurveySession.objects.get_or_create(user=self.request.user)[0]
+        # Cada envío deja su sesión; se trabaja sobre la más reciente
+        return latest_session(self.request.user) or WellnessSurveySession.objects.create(user=self.request.user)
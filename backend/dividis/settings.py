@@ -92,6 +92,18 @@ print("=== DJANGO DATABASE SETTINGS ===")
 print("DEBUG:", DEBUG)
 print("DATABASE ENGINE:", DATABASES['default']['ENGINE'])
 print("DATABASE NAME:", DATABASES['default']['NAME'])
+# Cachés: 'default' es local a cada proceso; 'shared' guarda en la base de datos lo
+# que deben ver todos los workers y los comandos (`python manage.py createcachetable`)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'dividis_cache',
+    },
+}
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -167,6 +179,12 @@ ACTSTREAM_SETTINGS = {
 # Module Settings
 INITIAL_MODULE = os.getenv('INITIAL_MODULE', 'salud')
 DEFAULT_MISSION_POINTS = int(os.getenv('DEFAULT_MISSION_POINTS', '100'))
+# Misión global que se completa con la primera actividad de la racha global
+GLOBAL_STREAK_MISSION_ID = os.getenv('GLOBAL_STREAK_MISSION_ID', '46e39fc7-8a77-4e39-9559-283a73655d12')
+
+# Eventos de dominio: 'sync' (en proceso, tras el commit) o 'queue' (tabla DomainEvent
+# consumida por `python manage.py process_domain_events`)
+DOMAIN_EVENTS_MODE = os.getenv('DOMAIN_EVENTS_MODE', 'sync')
 
 # Logging config para mostrar logs de api.models a nivel INFO
 LOGGING = {
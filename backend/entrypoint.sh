@@ -6,6 +6,7 @@ echo "==> Esperando a que Postgres esté listo..."
 
 echo "==> Ejecutando migraciones de Django..."
 python manage.py migrate --noinput
+python manage.py createcachetable
 
 echo "==> Estado de migraciones Django:"
 python manage.py showmigrations
@@ -18,6 +19,8 @@ python manage.py load_level_titles || echo " [ERROR] Falló cargar títulos"
 echo "==> Cargando fixtures iniciales en orden..."
 echo " - Cargando módulos..."
 python manage.py loaddata api/fixtures/initial_modules.json || echo " [ERROR] Falló cargar módulos"
+echo " - Cargando reglas de desbloqueo de módulos..."
+python manage.py loaddata api/fixtures/module_unlock_rules.json || echo " [ERROR] Falló cargar reglas de desbloqueo"
 echo " - Cargando misiones (solo si no existen)..."
 python manage.py load_initial_missions || echo " [ERROR] Falló cargar misiones"
 